@@ -1,11 +1,14 @@
 """
 Wrapper-script to launch the builder for multiple setting combinations.
+
+The combinations form a build matrix that is run by the builder's 'matrix' command.
 """
 
 import os
-import shutil
+import json
 import argparse
 import subprocess
+import tempfile
 from pathlib import Path
 
 
@@ -21,117 +24,73 @@ def parse_args() -> argparse.Namespace:
         choices={"docker", "podman", "local"},
         default="docker"
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        help="maximum number of concurrent builds"
+    )
 
     return parser.parse_args()
 
 
-def rmove(src: Path, dst: Path) -> None:
-    """Recursively move files from one directory to another.
-
-    :param Path src: Source path.
-    :param Path dst: Destination path.
-    :return: None
-    """
-    # for a directory
-    if src.is_dir():
-
-        if not dst.is_dir():
-            os.makedirs(dst)
-
-        contents = os.listdir(src)
-        for e in contents:
-            # do not copy restricted files
-            if e != src:
-                src_e = src / e
-                dst_e = dst / e
-                shutil.move(src_e, dst_e)
-
-    # for a single file
-    elif src.is_file():
-        shutil.move(src, dst)
-
-
 def main(args: argparse.Namespace) -> None:
     rootpath = Path(__file__).absolute().parents[1]
-    argsets = (
-        {
-            "command": "bundle",
-            "rom": "los",
-            "codename": "dumpling",
-            "lkv": "4.4",
-            "ksu": False
-        },
-        {
-            "command": "kernel",
-            "rom": "los",
-            "codename": "dumpling",
-            "lkv": "4.4",
-            "ksu": True
-        },
-        {
-            "command": "kernel",
-            "rom": "x",
-            "codename": "dumpling",
-            "lkv": "4.4",
-            "ksu": False
-        },
-        {
-            "command": "kernel",
-            "rom": "x",
-            "codename": "dumpling",
-            "lkv": "4.4",
-            "ksu": True
-        },
-        {
-            "command": "kernel",
-            "rom": "x",
-            "codename": "dumpling",
-            "lkv": "4.14",
-            "ksu": False
-        },
-        {
-            "command": "assets",
-            "rom": "los",
-            "codename": "cheeseburger",
-            "ksu": True
-        },
-    )
+    matrix = {
+        "jobs": [
+            {
+                "command": "bundle",
+                "base": "los",
+                "codename": "dumpling",
+                "lkv": "4.4",
+                "package_type": "slim",
+                "ksu": False
+            },
+            {
+                "command": "kernel",
+                "base": "los",
+                "codename": "dumpling",
+                "lkv": "4.4",
+                "ksu": True
+            },
+            {
+                "command": "kernel",
+                "base": "x",
+                "codename": "dumpling",
+                "lkv": "4.4",
+                "ksu": [False, True]
+            },
+            {
+                "command": "kernel",
+                "base": "x",
+                "codename": "dumpling",
+                "lkv": "4.14",
+                "ksu": False
+            },
+            {
+                "command": "assets",
+                "base": "los",
+                "codename": "cheeseburger",
+                "chroot": "minimal",
+                "rom_only": True,
+                "clean_assets": True,
+                "ksu": True
+            },
+        ]
+    }
 
     os.chdir(rootpath)
-    dir_shared = rootpath / "multi-build"
-    shutil.rmtree(dir_shared, ignore_errors=True)
-    os.makedirs(dir_shared)
-
-    for count, argset in enumerate(argsets, 1):
-        # define some of the values individually
-        benv = f"--build-env {args.env}"
-        base = f'--base {argset["rom"]}'
-        codename = f'--codename {argset["codename"]}'
-        lkv = f'--lkv {argset["lkv"]}' if argset["command"] in ("kernel", "bundle") else ""
-        ksu = "--ksu" if argset["ksu"] else ""
-        size = "--package-type slim" if argset["command"] == "bundle" else ""
-        extra = "--chroot minimal --rom-only --clean" if argset["command"] == "assets" else ""
-
-        # if the build is last, make it automatically remove the Docker/Podman image from runner
-        clean_image = "--clean-image" if count == len(argsets) and args.env in ("docker", "podman") else ""
-
-        # form and launch the command
-        cmd = f"python3 zkb {argset['command']} {benv} {base} {codename} {lkv} {size} {ksu} {clean_image} {extra}"
+    with tempfile.NamedTemporaryFile("w", suffix=".json") as f:
+        json.dump(matrix, f, indent=4)
+        f.flush()
+
+        # form and launch the command, the Docker/Podman image is removed from runner after the last build
+        cmd = f"python3 zkb matrix --build-env {args.env} --file {f.name} --output {rootpath / 'multi-build'}"
+        if args.jobs:
+            cmd += f" --jobs {args.jobs}"
+        if args.env in ("docker", "podman"):
+            cmd += " --clean-image"
         print(f"[CMD]: {cmd}")
-        subprocess.run(cmd.strip(), shell=True, check=True)
-
-        # define directory to copy artifacts to
-        out = ""
-        match argset["command"]:
-            case "bundle":
-                out = "bundle"
-            case "kernel":
-                out = "kernel"
-            case "assets":
-                out = "assets"
-        # convert into full path
-        out = Path(rootpath, out)
-        rmove(out, dir_shared)
+        subprocess.run(cmd, shell=True, check=True)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,42 @@
+import pytest
+
+from zkb.tools import network as net
+# interfaces have to be loaded before the clients, to avoid a circular import
+from zkb.interfaces import IRomApiClient # noqa
+from zkb.clients import GithubApiClient
+
+
+def test__prefetch__batch(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that releases of several projects are resolved in one query, with file filters applied."""
+    queries = []
+    data = {
+        "p0": {"latestRelease": {"releaseAssets": {"nodes": [
+            {"downloadUrl": "https://github.com/a/b/releases/download/v1/b.apk", "digest": "sha256:abc"},
+            {"downloadUrl": "https://github.com/a/b/releases/download/v1/b.zip"},
+        ]}}},
+        "p1": {"latestRelease": None},
+    }
+    monkeypatch.setattr(net, "api_query", lambda query: queries.append(query) or data)
+
+    clients = [
+        GithubApiClient(project="a/b", file_filter=".apk"),
+        GithubApiClient(project="c/d", file_filter=".apk"),
+        GithubApiClient(project="e/f"),
+    ]
+    GithubApiClient.prefetch(clients)
+
+    assert len(queries) == 1
+    assert clients[0].run() == "https://github.com/a/b/releases/download/v1/b.apk"
+    assert clients[0].digest == "abc"
+    assert clients[1].release_assets is None
+    assert clients[2].release_assets is None
+
+
+def test__run__no_filter(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a project without a file filter is exported without API requests."""
+    exported = []
+    monkeypatch.setattr(net, "api_get", lambda url: pytest.fail("unexpected API request"))
+    monkeypatch.setattr(GithubApiClient, "_export", lambda self: exported.append(self.project))
+
+    assert GithubApiClient(project="a/b").run() is None
+    assert exported == ["a/b"]
@@ -0,0 +1,25 @@
+import pytest
+from pathlib import Path
+
+from zkb.core import KernelBuilder, AssetsCollector
+from zkb.managers import ResourceManager
+from zkb.configs import DirectoryConfig as dcfg
+from zkb.commands import BundleCommand
+
+
+def test__kernel_zip__exact(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a kernel ZIP file left by a build with other versions is not reused."""
+    monkeypatch.setattr(dcfg, "kernel", tmp_path)
+    monkeypatch.setenv("KVERSION", "2.0")
+    monkeypatch.delenv("KNAME", raising=False)
+
+    kb = KernelBuilder(codename="cheeseburger", base="los", lkv="4.4", clean_kernel=False, ksu=False, rmanager=ResourceManager())
+    ac = AssetsCollector(codename="cheeseburger", base="los", clean_assets=False, rom_only=True, ksu=False)
+    bc = BundleCommand(kernel_builder=kb, assets_collector=ac, package_type="slim", base="los")
+
+    (tmp_path / "zero-1.0-dumplinger-los-4.4.zip").touch()
+    (tmp_path / "zero-2.0-dumplinger-los-4.14.zip").touch()
+    assert bc._kernel_zip is None
+
+    (tmp_path / "zero-2.0-dumplinger-los-4.4.zip").touch()
+    assert bc._kernel_zip == tmp_path / "zero-2.0-dumplinger-los-4.4.zip"
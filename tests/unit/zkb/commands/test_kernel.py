@@ -0,0 +1,16 @@
+import pytest
+
+from zkb.core import KernelBuilder
+from zkb.managers import ResourceManager
+from zkb.commands import KernelCommand
+
+
+def test__execute__once_per_family(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the kernel is built once for each device family."""
+    built = []
+    monkeypatch.setattr(KernelBuilder, "run", lambda self: built.append((self.codename, self.rmanager.codename)))
+
+    kb = KernelBuilder(codename="dumpling", base="los", lkv="4.4", clean_kernel=False, ksu=False, rmanager=ResourceManager())
+    KernelCommand(kernel_builder=kb, codenames=["dumpling", "lemonade", "cheeseburger"]).execute()
+
+    assert built == [("dumpling", "dumpling"), ("lemonade", "lemonade")]
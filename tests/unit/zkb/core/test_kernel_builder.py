@@ -32,3 +32,64 @@ def test__defconfig__check(config: dict[str, str], expected_defconfig: Path) ->
     res_actual = t._defconfig
     res_expected = expected_defconfig
     assert res_actual == res_expected
+
+
+def test__fingerprint__inputs(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that build output fingerprint follows the build inputs."""
+    monkeypatch.setattr("zkb.tools.commands.launch", lambda cmd, get_output=False, loglvl="normal": cmd)
+    rmanager = ResourceManager(paths={"dumpling": Path("k"), "KernelSU": Path("ksu"), "clang": Path("clang")})
+    config = {"codename": "dumpling", "base": "los", "lkv": "4.4", "clean_kernel": False}
+
+    plain = KernelBuilder(**config, ksu=False, rmanager=rmanager)._fingerprint
+    assert plain == KernelBuilder(**config, ksu=False, rmanager=rmanager)._fingerprint
+    assert plain != KernelBuilder(**config, ksu=True, rmanager=rmanager)._fingerprint
+
+
+def test__fingerprint__toolchain(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the toolchain is fingerprinted by its version, regardless of the installation directory."""
+    monkeypatch.setattr(
+        "zkb.tools.commands.launch",
+        lambda cmd, get_output=False, loglvl="normal": f"clang version 14.0.6\nInstalledDir: {cmd.split()[0]}"
+    )
+    config = {"codename": "dumpling", "base": "los", "lkv": "4.4", "clean_kernel": False, "ksu": False}
+
+    fingerprints = [
+        KernelBuilder(**config, rmanager=ResourceManager(paths={"dumpling": root / "k", "clang": root / "clang"}))
+        ._fingerprint["toolchain"]
+        for root in (Path("/a"), Path("/b"))
+    ]
+    assert fingerprints == ["clang version 14.0.6"] * 2
+
+
+def test__build__variants(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that variants are configured separately and built under a shared jobserver."""
+    cmds = []
+    monkeypatch.setattr("zkb.tools.commands.launch", lambda cmd, get_output=False, loglvl="normal": cmds.append(cmd) or "8")
+    (tmp_path / "Makefile").write_text("VERSION = 4\nPATCHLEVEL = 4\n")
+    for variant in ("plain", "ksu"):
+        (tmp_path / "out" / variant).mkdir(parents=True)
+        (tmp_path / "out" / variant / ".config").write_text("CONFIG_KSU=y\n")
+
+    kb = KernelBuilder(
+        codename="dumpling", base="los", lkv="4.4", clean_kernel=False, ksu=False, variants=True,
+        rmanager=ResourceManager(paths={"dumpling": tmp_path})
+    )
+    monkeypatch.chdir(tmp_path)
+    kb.build()
+
+    assert (tmp_path / "out" / "plain" / ".config").read_text().endswith("# CONFIG_KSU is not set\n")
+    assert (tmp_path / "out" / "ksu" / ".config").read_text().endswith("CONFIG_KPROBE_EVENTS=y\n")
+    assert cmds[-1] == f'make -j8 -f {tmp_path / "out" / "variants.mk"}'
+    wrapper = (tmp_path / "out" / "variants.mk").read_text()
+    assert f"\t+$(MAKE) -C {tmp_path} O={tmp_path / 'out' / 'ksu'} ARCH=arm64" in wrapper
+    assert "all: plain ksu\n" in wrapper
+
+
+def test__clean_build__no_repos(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the build environment can be cleaned before any repository is journaled."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "out").mkdir()
+    rmanager = ResourceManager(paths={"dumpling": tmp_path})
+
+    KernelBuilder(codename="dumpling", base="los", lkv="4.4", clean_kernel=False, ksu=False, rmanager=rmanager).clean_build()
+    assert not (tmp_path / "out").exists()
@@ -0,0 +1,65 @@
+import json
+import pytest
+from pathlib import Path
+
+from zkb.core import MatrixBuilder
+from zkb.configs import ArgumentConfig
+
+
+def test__plan__dedupe(tmp_path: Path) -> None:
+    """Test that the build matrix is expanded, shared work is merged, and identical kernels wait for each other."""
+    matrix = tmp_path / "matrix.json"
+    matrix.write_text(json.dumps({"jobs": [
+        {"command": "kernel", "base": "x", "codename": "dumpling", "lkv": "4.4", "ksu": [False, True]},
+        {"command": "kernel", "base": "x", "codename": "dumpling", "lkv": "4.4", "ksu": False},
+        {"command": "kernel", "base": "los", "codename": ["dumpling"], "lkv": "4.4"},
+        {"command": "kernel", "base": "los", "codename": "cheeseburger", "lkv": "4.4"},
+        {"command": "bundle", "base": "los", "codename": "cheeseburger", "lkv": "4.4", "package_type": "slim"},
+        {"command": "assets", "base": "los", "codename": "dumpling", "chroot": "minimal", "rom_only": True},
+    ]}))
+
+    mb = MatrixBuilder(matrix=matrix, benv="docker")
+    jobs = mb.read()
+    plan = mb.plan(jobs)
+
+    assert len(jobs) == 7
+    assert [(j.command, j.base, j.codename, j.ksu, j.variants, deps) for j, deps in plan] == [
+        ("kernel", "x", ["dumpling"], False, True, set()),
+        ("kernel", "los", ["dumpling", "cheeseburger"], False, False, set()),
+        ("bundle", "los", ["cheeseburger"], False, False, {1}),
+        ("assets", "los", ["dumpling"], False, False, set()),
+    ]
+    assert [mb._name(i, j) for i, (j, _) in enumerate(plan)][:2] == [
+        "01-kernel-x-dumpling-4.4-variants",
+        "02-kernel-los-dumpling+cheeseburger-4.4",
+    ]
+
+
+def test__execute__exception(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that an exception in a job fails only that job."""
+    def command(self: MatrixBuilder, job: ArgumentConfig, output: Path) -> str:
+        raise RuntimeError("no engine")
+
+    monkeypatch.setattr(MatrixBuilder, "_command", command)
+    (tmp_path / "logs").mkdir()
+    mb = MatrixBuilder(matrix=tmp_path / "matrix.json", benv="docker", output=tmp_path)
+    job = ArgumentConfig(benv="docker", command="kernel", codename=["dumpling"], base="x", lkv="4.4")
+
+    result = mb._execute(job, "01-kernel-x-dumpling-4.4")
+    assert result["status"] == "failed"
+    assert result["artifacts"] == []
+
+
+def test__collect__same_names(tmp_path: Path) -> None:
+    """Test that artifacts with the same names from different jobs are all kept."""
+    mb = MatrixBuilder(matrix=tmp_path / "matrix.json", benv="docker", output=tmp_path)
+    job = ArgumentConfig(benv="docker", command="assets", codename=["dumpling"], base="los", chroot="minimal")
+
+    for name in ("01-assets", "02-assets"):
+        output = tmp_path / "jobs" / name
+        output.mkdir(parents=True)
+        (output / "rootfs.tar.xz").write_text(name)
+        assert mb._collect(job, name, output) == [tmp_path / name / "rootfs.tar.xz"]
+        assert not output.exists()
+
+    assert [(tmp_path / n / "rootfs.tar.xz").read_text() for n in ("01-assets", "02-assets")] == ["01-assets", "02-assets"]
@@ -0,0 +1,16 @@
+import shlex
+import pytest
+from pathlib import Path
+
+from zkb.engines import GenericContainerEngine
+
+
+def test__container_options__quoted(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that forwarded builder variables survive shell word splitting."""
+    monkeypatch.setenv("ZKB_TEST_VALUE", "a b; touch pwned")
+    monkeypatch.delenv("ZKB_CCACHE_DIR", raising=False)
+    monkeypatch.delenv("ZKB_ARTIFACT_REMOTE", raising=False)
+
+    gce = GenericContainerEngine(benv="docker", command="kernel", codename=["dumpling"], base="los", lkv="4.4", output=tmp_path)
+    words = shlex.split(" ".join(gce.container_options))
+    assert "ZKB_TEST_VALUE=a b; touch pwned" in words
@@ -0,0 +1,33 @@
+from pathlib import Path
+
+from zkb.managers import ArtifactManager
+
+
+def test__lookup__remote(tmp_path: Path) -> None:
+    """Test that stored artifacts are found locally, and on another host via the remote store."""
+    image = tmp_path / "Image.gz-dtb"
+    image.write_bytes(b"kernel")
+    inputs = {"source": "abc", "codename": "dumplinger"}
+    key = ArtifactManager.key(inputs)
+
+    host1 = ArtifactManager(directory=tmp_path / "host1", remote=f"file://{tmp_path / 'remote'}")
+    assert host1.lookup(key) is None
+    host1.store(key, {"Image.gz-dtb": image}, inputs)
+    assert (host1.lookup(key) / "Image.gz-dtb").read_bytes() == b"kernel" # type: ignore
+
+    host2 = ArtifactManager(directory=tmp_path / "host2", remote=str(tmp_path / "remote"))
+    assert (host2.lookup(key) / "Image.gz-dtb").read_bytes() == b"kernel" # type: ignore
+    assert ArtifactManager(directory=tmp_path / "host3").lookup(key) is None
+
+    # a corrupted remote entry is not used
+    (tmp_path / "remote" / key / "Image.gz-dtb").write_bytes(b"broken")
+    assert ArtifactManager(directory=tmp_path / "host4", remote=str(tmp_path / "remote")).lookup(key) is None
+
+
+def test__store__failure(tmp_path: Path) -> None:
+    """Test that a failure to store artifacts is not fatal and leaves nothing behind."""
+    store = ArtifactManager(directory=tmp_path / "store")
+
+    assert store.store("abc", {"Image.gz-dtb": tmp_path / "missing"}, {}) is None
+    assert store.lookup("abc") is None
+    assert list((tmp_path / "store").iterdir()) == []
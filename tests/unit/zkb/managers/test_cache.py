@@ -0,0 +1,104 @@
+import time
+import pytest
+import requests
+from pathlib import Path
+from typing import Optional
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+
+from zkb.managers import CacheManager
+from zkb.tools import fileoperations as fo, network as net
+
+
+@pytest.fixture
+def cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> CacheManager:
+    """Cache manager with a fake downloader writing 10 bytes per file."""
+    monkeypatch.setattr(fo, "download", lambda url, dst, sha256=None: Path(dst).write_bytes(b"0123456789") and None)
+    return CacheManager(directory=tmp_path, budget=25)
+
+
+def test__key__content_addressed(cache: CacheManager) -> None:
+    """Test that a declared checksum takes precedence over URL in cache key."""
+    assert cache.key("https://a/file.tar.gz", "ABC") == "abc"
+    assert cache.key("https://a/file.tar.gz") != cache.key("https://b/file.tar.gz")
+
+
+def test__fetch__hit(cache: CacheManager) -> None:
+    """Test that a repeated fetch is served from the cache."""
+    path = cache.fetch("https://a/file.tar.gz")
+    assert cache.lookup("https://a/file.tar.gz") == path
+
+
+def test__evict__lru(cache: CacheManager) -> None:
+    """Test that least recently used files are evicted once the budget is exceeded."""
+    cache.fetch("https://a/1.tar.gz")
+    cache.fetch("https://a/2.tar.gz")
+    cache.lookup("https://a/1.tar.gz")
+    cache.fetch("https://a/3.tar.gz")
+
+    assert cache.lookup("https://a/1.tar.gz")
+    assert cache.lookup("https://a/2.tar.gz") is None
+    assert cache.lookup("https://a/3.tar.gz")
+
+
+def test__fetch__revalidate(cache: CacheManager, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a file changed upstream is downloaded again, and an unchanged one is not."""
+    calls = []
+    monkeypatch.setattr(
+        fo, "download", lambda url, dst, sha256=None: calls.append(url) or Path(dst).write_bytes(b"0123456789") and None
+    )
+    monkeypatch.setattr(CacheManager, "_validators", staticmethod(lambda url: {"etag": '"v1"'}))
+
+    monkeypatch.setattr(CacheManager, "_changed", lambda self, url, sha256=None: False)
+    cache.fetch("https://a/NetHunter.apk", revalidate=True)
+    cache.fetch("https://a/NetHunter.apk", revalidate=True)
+    assert len(calls) == 1
+
+    monkeypatch.setattr(CacheManager, "_changed", lambda self, url, sha256=None: True)
+    cache.fetch("https://a/NetHunter.apk", revalidate=True)
+    assert len(calls) == 2
+
+
+def test__changed__validators(cache: CacheManager, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a file is considered changed only if its validators differ, even without 304 support."""
+    monkeypatch.setattr(CacheManager, "_validators", staticmethod(lambda url: {"etag": '"v1"'}))
+    cache.fetch("https://a/NetHunter.apk", revalidate=True)
+
+    for etag, changed in (('"v1"', False), ('"v2"', True), (None, False)):
+        response = requests.Response()
+        response.status_code = 200
+        if etag:
+            response.headers["ETag"] = etag
+        monkeypatch.setattr(net, "session", lambda: SimpleNamespace(head=lambda *a, **kw: response))
+        assert cache._changed("https://a/NetHunter.apk") is changed
+
+    # without validators in the response, the file is downloaded again once it expires
+    cache.ttl = 0
+    assert cache._changed("https://a/NetHunter.apk") is True
+
+
+def test__changed__ttl(cache: CacheManager, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a file without validators is considered changed once it is older than TTL."""
+    monkeypatch.setattr(CacheManager, "_validators", staticmethod(lambda url: {}))
+    cache.fetch("https://a/rootfs.tar.xz", revalidate=True)
+    assert cache._changed("https://a/rootfs.tar.xz") is False
+
+    cache.ttl = 0
+    assert cache._changed("https://a/rootfs.tar.xz") is True
+
+
+def test__fetch__concurrent(cache: CacheManager, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that concurrent fetches of the same file download it only once."""
+    calls = []
+
+    def download(url: str, dst: Path, sha256: Optional[str] = None) -> None:
+        calls.append(url)
+        time.sleep(0.2)
+        Path(dst).write_bytes(b"0123456789")
+
+    monkeypatch.setattr(fo, "download", download)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        paths = set(pool.map(lambda _: cache.fetch("https://a/toolchain.tar.gz"), range(4)))
+
+    assert calls == ["https://a/toolchain.tar.gz"]
+    assert len(paths) == 1
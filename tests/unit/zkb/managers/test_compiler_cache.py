@@ -0,0 +1,47 @@
+import json
+import shutil
+import pytest
+from pathlib import Path
+
+from zkb.managers import CompilerCacheManager
+from zkb.tools import commands as ccmd
+
+
+@pytest.fixture(autouse=True)
+def environment(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Restore variables set by the compiler cache setup, pretend that the tools are installed."""
+    for var in (
+        "CCACHE_DIR", "CCACHE_SLOPPINESS", "CCACHE_NOHASHDIR", "CCACHE_COMPILERCHECK", "CCACHE_BASEDIR",
+        "CCACHE_STATSLOG", "SCCACHE_DIR", "SCCACHE_BASEDIRS"
+    ):
+        monkeypatch.delenv(var, raising=False)
+    monkeypatch.setattr(shutil, "which", lambda cmd: f"/usr/bin/{cmd}")
+
+
+def test__stats__ccache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that ccache statistics are counted from the log of the build, without resetting shared ones."""
+    calls = []
+    monkeypatch.setattr(ccmd, "launch", lambda cmd, get_output=False, loglvl="normal": calls.append(cmd))
+
+    ccache = CompilerCacheManager(tool="ccache", directory=tmp_path)
+    ccache.setup()
+    with open(ccache._statslog, "a", encoding="utf-8") as f: # type: ignore
+        f.write("# a.c\ndirect_cache_hit\n# b.c\ncache_miss\n# c.c\npreprocessed_cache_hit\nlocal_storage_hit\n")
+
+    assert ccache.stats() == (2, 1)
+    assert not calls
+
+
+def test__stats__sccache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that sccache statistics are counted since the setup."""
+    counts = iter(((10, 5), (17, 8)))
+
+    def launch(cmd: str, get_output: bool = False, loglvl: str = "normal") -> str:
+        hits, misses = next(counts) if "--show-stats" in cmd else (0, 0)
+        return json.dumps({"stats": {"cache_hits": {"counts": {"C/C++": hits}}, "cache_misses": {"counts": {"C/C++": misses}}}})
+
+    monkeypatch.setattr(ccmd, "launch", launch)
+
+    sccache = CompilerCacheManager(tool="sccache", directory=tmp_path, basedir=tmp_path)
+    sccache.setup()
+    assert sccache.stats() == (7, 3)
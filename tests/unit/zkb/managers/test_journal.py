@@ -0,0 +1,58 @@
+import os
+import subprocess
+from pathlib import Path
+
+from zkb.managers import JournalManager
+
+
+def test__reset__journaled(tmp_path: Path) -> None:
+    """Test that reset restores journaled paths and leaves the rest of the tree untouched."""
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "tracked.c").write_text("int f(void);\n")
+    subprocess.run(
+        "git init -q . && git add . && git -c user.name=t -c user.email=t@t commit -q -m init",
+        shell=True, cwd=repo, check=True
+    )
+
+    jm = JournalManager(repos=[repo])
+    jm.reset(repo)
+
+    # modifications are recorded ahead
+    jm.record(repo / "tracked.c", repo / "added.c")
+    (repo / "tracked.c").write_text("int f();\n")
+    (repo / "added.c").write_text("")
+    (repo / "untouched.o").write_text("")
+
+    jm.reset(repo)
+    assert (repo / "tracked.c").read_text() == "int f(void);\n"
+    assert not (repo / "added.c").exists()
+    assert (repo / "untouched.o").exists()
+    assert jm.journal(repo).read_text() == ""
+
+
+def test__restamp__unchanged(tmp_path: Path) -> None:
+    """Test that files patched again into the same contents get their modification times back."""
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "same.c").write_text("int f(void);\n")
+    (repo / "other.c").write_text("int g(void);\n")
+    subprocess.run(
+        "git init -q . && git add . && git -c user.name=t -c user.email=t@t commit -q -m init",
+        shell=True, cwd=repo, check=True
+    )
+
+    jm = JournalManager(repos=[repo])
+    jm.reset(repo)
+    jm.record(repo / "same.c", repo / "other.c")
+    for name in ("same.c", "other.c"):
+        (repo / name).write_text("/* patched */\n")
+        os.utime(repo / name, (0, 0))
+
+    jm.reset(repo)
+    (repo / "same.c").write_text("/* patched */\n")
+    (repo / "other.c").write_text("/* patched differently */\n")
+
+    assert jm.restamp(repo) == 1
+    assert (repo / "same.c").stat().st_mtime == 0
+    assert (repo / "other.c").stat().st_mtime != 0
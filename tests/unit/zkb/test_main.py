@@ -0,0 +1,25 @@
+import sys
+import pytest
+
+from zkb import __main__ as zkb_main
+from zkb.configs import ArgumentConfig
+from zkb.commands import AssetsCommand, BundleCommand
+
+
+@pytest.mark.parametrize(
+    "argv",
+    (
+        ["assets", "--build-env", "local", "--base", "los", "--codename", "dumpling", "--chroot", "minimal"],
+        ["bundle", "--build-env", "local", "--base", "los", "--codename", "dumpling", "--lkv", "4.4", "--package-type", "slim"],
+    )
+)
+def test__main__local(argv: list[str], monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that local commands are set up from the options their parsers define."""
+    executed = []
+    monkeypatch.setattr(sys, "argv", ["zkb", *argv])
+    monkeypatch.setattr(ArgumentConfig, "check_settings", lambda self: None)
+    for command in (AssetsCommand, BundleCommand):
+        monkeypatch.setattr(command, "execute", lambda self: executed.append(type(self).__name__))
+
+    zkb_main.main()
+    assert executed == [f"{argv[0].capitalize()}Command"]
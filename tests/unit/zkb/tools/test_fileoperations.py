@@ -0,0 +1,70 @@
+import os
+import hashlib
+import pytest
+import tarfile
+import requests
+from pathlib import Path
+
+from zkb.tools import fileoperations as fo
+
+
+def test__digest__resumed(tmp_path: Path) -> None:
+    """Test that checksum of a resumed file covers both the previous and the new bytes."""
+    part = tmp_path / "file.part"
+    part.write_bytes(b"0123456789")
+
+    digest = fo._Digest()
+    digest.catch_up(part, 10)
+    digest.update(b"abcdef")
+
+    assert digest.hexdigest() == hashlib.sha256(b"0123456789abcdef").hexdigest()
+
+
+def test__mutate__unchanged(tmp_path: Path) -> None:
+    """Test that files are rewritten only when their contents change."""
+    fn = tmp_path / "tx.c"
+    fn.write_text("case IEEE80211_BAND_60GHZ:\n\tbreak;\n")
+    fn.chmod(0o755)
+    os.utime(fn, (0, 0))
+
+    assert fo.replace_lines(fn, ("NOT PRESENT",), ("",)) is False
+    assert fo.insert_before_line(fn, "NOT PRESENT", "") is False
+    assert fn.stat().st_mtime == 0
+
+    assert fo.insert_before_line(fn, "\tbreak;", "\t/* injected */") is True
+    assert fn.read_text() == "case IEEE80211_BAND_60GHZ:\n\t/* injected */\n\tbreak;\n"
+    assert fn.stat().st_mode & 0o777 == 0o755
+
+
+def test__download__client_error(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a download failing with a client error is not retried."""
+    calls = []
+
+    def probe(url: str) -> None:
+        calls.append(url)
+        response = requests.Response()
+        response.status_code = 404
+        raise requests.HTTPError("404 Not Found", response=response)
+
+    monkeypatch.setattr(fo, "_probe", probe)
+    monkeypatch.setattr(fo.time, "sleep", lambda s: None)
+
+    with pytest.raises(SystemExit):
+        fo.download("https://example.com/missing.zip", tmp_path / "missing.zip")
+    assert len(calls) == 1
+
+
+def test__extract__checksum(tmp_path: Path) -> None:
+    """Test that an archive is extracted only if it matches the expected checksum."""
+    (tmp_path / "file").write_text("data")
+    with tarfile.open(tmp_path / "archive.tar", "w") as tf:
+        tf.add(tmp_path / "file", arcname="file")
+    sha256 = hashlib.sha256((tmp_path / "archive.tar").read_bytes()).hexdigest()
+
+    with pytest.raises(SystemExit):
+        fo.extract(tmp_path / "archive.tar", tmp_path / "bad", sha256="0" * 64)
+    assert not (tmp_path / "bad").exists()
+    assert not (tmp_path / "bad.partial").exists()
+
+    fo.extract(tmp_path / "archive.tar", tmp_path / "good", sha256=sha256)
+    assert (tmp_path / "good" / "file").read_text() == "data"
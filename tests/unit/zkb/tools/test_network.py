@@ -0,0 +1,68 @@
+import pytest
+from pathlib import Path
+
+from zkb.tools import network as net
+from zkb.configs import DirectoryConfig as dcfg
+
+
+class FakeResponse:
+    """Minimal stand-in for a GitHub API response."""
+
+    def __init__(self, status_code: int, headers: dict, data: dict) -> None:
+        self.status_code = status_code
+        self.headers = headers
+        self.text = str(data)
+        self.ok = status_code < 400
+        self._data = data
+
+    def json(self) -> dict:
+        return self._data
+
+
+class FakeSession:
+    """Session answering with 304 to revalidation requests."""
+
+    def __init__(self) -> None:
+        self.requests: list[dict] = []
+
+    def get(self, url: str, headers: dict, timeout: int) -> FakeResponse:
+        self.requests.append(headers)
+        if headers.get("If-None-Match") == '"v1"':
+            return FakeResponse(304, {}, {})
+        return FakeResponse(200, {"ETag": '"v1"'}, {"tag_name": "v1"})
+
+
+@pytest.fixture
+def session(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> FakeSession:
+    """Fake session with the API cache placed into a temporary directory."""
+    fake = FakeSession()
+    monkeypatch.setattr(dcfg, "cache", tmp_path)
+    monkeypatch.setattr(net, "session", lambda: fake)
+    monkeypatch.setattr(net, "_tokens", {})
+    monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+    monkeypatch.delenv("GITHUB_TOKENS", raising=False)
+    return fake
+
+
+def test__api_get__fresh(session: FakeSession) -> None:
+    """Test that a fresh cached response is served without a request."""
+    assert net.api_get("https://api.github.com/x", ttl=600) == {"tag_name": "v1"}
+    assert net.api_get("https://api.github.com/x", ttl=600) == {"tag_name": "v1"}
+    assert len(session.requests) == 1
+
+
+def test__api_get__revalidate(session: FakeSession) -> None:
+    """Test that a stale cached response is revalidated via ETag."""
+    net.api_get("https://api.github.com/x", ttl=0)
+    assert net.api_get("https://api.github.com/x", ttl=0) == {"tag_name": "v1"}
+    assert session.requests[-1]["If-None-Match"] == '"v1"'
+
+
+def test__api_query__partial(session: FakeSession, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that data of a query is used even if some of its fields failed."""
+    data = {"p0": {"latestRelease": None}, "p1": None}
+    response = FakeResponse(200, {}, {"data": data, "errors": [{"message": "Could not resolve to a Repository"}]})
+    monkeypatch.setenv("GITHUB_TOKEN", "token")
+    monkeypatch.setattr(net, "_api_request", lambda url, headers, max_wait, payload=None: response)
+
+    assert net.api_query("query { p0: ... p1: ... }") == data
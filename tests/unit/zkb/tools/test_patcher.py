@@ -0,0 +1,76 @@
+import pytest
+from pathlib import Path
+
+from zkb.tools import patcher
+from zkb.configs import DirectoryConfig as dcfg
+
+
+ORIGINAL = "".join(f"line {i}\n" for i in range(1, 21))
+PATCH = """\
+diff --git a/src/file.c b/src/file.c
+--- a/src/file.c
++++ b/src/file.c
+@@ -4,7 +4,8 @@
+ line 4
+ line 5
+ line 6
+-line 7
++line seven
++line 7.5
+ line 8
+ line 9
+ line 10
+@@ -17,4 +18,3 @@
+ line 17
+ line 18
+-line 19
+ line 20
+--- /dev/null
++++ b/src/new.c
+@@ -0,0 +1,2 @@
++int x;
++int y;
+"""
+
+
+@pytest.fixture
+def tree(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Source tree with a single file and a patch for it."""
+    monkeypatch.setattr(dcfg, "cache", tmp_path / "cache")
+    (tmp_path / "src" / "src").mkdir(parents=True)
+    (tmp_path / "src" / "src" / "file.c").write_text(ORIGINAL)
+    (tmp_path / "fix.patch").write_text(PATCH)
+    return tmp_path
+
+
+def _expected(original: str) -> str:
+    return original.replace("line 7\n", "line seven\nline 7.5\n").replace("line 19\n", "")
+
+
+def test__apply__reapply(tree: Path) -> None:
+    """Test that patches apply with an offset and that re-applying them is a no-op."""
+    src = tree / "src"
+    (src / "src" / "file.c").write_text("header\n" * 3 + ORIGINAL)
+
+    assert sorted(patcher.apply([tree / "fix.patch"], src)) == ["src/file.c", "src/new.c"]
+    assert (src / "src" / "file.c").read_text() == "header\n" * 3 + _expected(ORIGINAL)
+    assert (src / "src" / "new.c").read_text() == "int x;\nint y;\n"
+
+    assert patcher.apply([tree / "fix.patch"], src) == []
+    assert (src / "src" / "file.c").read_text() == "header\n" * 3 + _expected(ORIGINAL)
+
+
+def test__apply__cached(tree: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that results of a patch set are reused for the same commit."""
+    src = tree / "src"
+    patcher.apply([tree / "fix.patch"], src, commit="abc")
+    # the entry is published as a whole, without leftovers
+    assert not any(p.name.endswith(".tmp") for p in (tree / "cache" / "patches").iterdir())
+
+    # a pristine tree at the same commit is patched from cache, without parsing the patches
+    (src / "src" / "file.c").write_text(ORIGINAL)
+    (src / "src" / "new.c").unlink()
+    monkeypatch.setattr(patcher, "parse", None)
+
+    assert sorted(patcher.apply([tree / "fix.patch"], src, commit="abc")) == ["src/file.c", "src/new.c"]
+    assert (src / "src" / "file.c").read_text() == _expected(ORIGINAL)
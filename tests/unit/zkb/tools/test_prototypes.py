@@ -0,0 +1,73 @@
+import pytest
+from pathlib import Path
+
+from zkb.tools import prototypes
+from zkb.configs import DirectoryConfig as dcfg
+
+
+SOURCE = """\
+#define MACRO() 1
+int declared();
+static void defined();
+static void defined()
+{
+\tdefined();
+}
+struct irq_info *pointer() {
+\treturn 0;
+}
+int prototyped(void)
+{
+\treturn 0;
+}
+"""
+
+
+@pytest.fixture
+def tree(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Kernel source tree with a driver file and a file outside of the build."""
+    monkeypatch.setattr(dcfg, "cache", tmp_path / "cache")
+    root = tmp_path / "kernel"
+    (root / "drivers").mkdir(parents=True)
+    (root / "tools").mkdir()
+    (root / "drivers" / "a.c").write_text(SOURCE)
+    (root / "tools" / "b.c").write_text(SOURCE)
+    return root
+
+
+def test__scan__fix(tree: Path) -> None:
+    """Test that only definitions without prototypes (and their declarations) are fixed, and only once."""
+    found = prototypes.scan(tree)
+    assert found == {"drivers/a.c": [2, 3, 7]}
+
+    assert prototypes.fix(tree, found) == ["drivers/a.c"]
+    text = (tree / "drivers" / "a.c").read_text()
+    assert "int declared();" in text
+    assert "static void defined(void);\nstatic void defined(void)\n" in text
+    assert "struct irq_info *pointer(void) {" in text
+    assert "\tdefined();" in text and "#define MACRO() 1" in text
+
+    assert prototypes.fix(tree, found) == []
+
+
+def test__scan__cached(tree: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that cached results are reused for the same commit, except for modified files."""
+    prototypes.scan(tree, "abc")
+    (tree / "drivers" / "c.c").write_text("void new_one()\n{\n}\n")
+    monkeypatch.setattr(prototypes, "_files", None)
+
+    assert prototypes.scan(tree, "abc", ["drivers/c.c"]) == {"drivers/a.c": [2, 3, 7], "drivers/c.c": [0]}
+
+
+def test__cache_file__layout(tree: Path) -> None:
+    """Test that the cache key ignores files created by the build, but not the layout of a sparse checkout."""
+    (tree / "arch" / "arm64").mkdir(parents=True)
+    key = prototypes._cache_file(tree, "abc")
+
+    (tree / "out").mkdir()
+    (tree / "localversion").write_text("~zero_kernel")
+    assert prototypes._cache_file(tree, "abc") == key
+
+    (tree / ".git" / "info").mkdir(parents=True)
+    (tree / ".git" / "info" / "sparse-checkout").write_text("/*\n!/arch/x86/\n")
+    assert prototypes._cache_file(tree, "abc") != key
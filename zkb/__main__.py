@@ -6,11 +6,11 @@ import argparse
 from pathlib import Path
 from importlib.metadata import version
 
-from zkb.core import KernelBuilder, AssetsCollector
+from zkb.core import KernelBuilder, AssetsCollector, MatrixBuilder
 from zkb.tools import cleaning as cm, commands as ccmd, Logger as logger
 from zkb.configs import ArgumentConfig, DirectoryConfig as dcfg
 from zkb.engines import GenericContainerEngine
-from zkb.commands import KernelCommand, AssetsCommand, BundleCommand
+from zkb.commands import KernelCommand, AssetsCommand, BundleCommand, MatrixCommand
 from zkb.managers import ResourceManager
 
 
@@ -48,6 +48,7 @@ def parse_args() -> argparse.Namespace:
     parser_kernel = subparsers.add_parser("kernel", help="build the kernel")
     parser_assets = subparsers.add_parser("assets", help="collect assets")
     parser_bundle = subparsers.add_parser("bundle", help="build the kernel + collect assets")
+    parser_matrix = subparsers.add_parser("matrix", help="run a matrix of builds concurrently")
 
     # main parser arguments
     parser_parent.add_argument(
@@ -61,6 +62,7 @@ def parse_args() -> argparse.Namespace:
     # common argument attributes for subparsers
     help_base = "select a kernel base for the build"
     help_codename = "select device codename"
+    help_codenames = "select device codename(s), the kernel is built once for devices of the same family"
     help_benv = "select build environment"
     help_clean = "remove Docker/Podman image from the host machine after build"
     choices_benv = {"local", "docker", "podman"}
@@ -68,6 +70,10 @@ def parse_args() -> argparse.Namespace:
     help_defconfig = "specify path to custom defconfig"
     help_ksu = "add KernelSU support"
     help_lkv = "select Linux Kernel Version"
+    help_compiler_cache = "speed up repeated builds with a compiler cache"
+    choices_compiler_cache = ("ccache", "sccache")
+    help_incremental = "keep build output between builds, rebuild only what changed"
+    help_variants = "build both KernelSU and non-KernelSU variants concurrently from one patched tree"
 
     # kernel
     parser_kernel.add_argument(
@@ -88,8 +94,9 @@ def parse_args() -> argparse.Namespace:
     parser_kernel.add_argument(
         "--codename",
         type=str,
+        nargs="+",
         required=True,
-        help=help_codename
+        help=help_codenames
     )
     parser_kernel.add_argument(
         "--lkv",
@@ -121,6 +128,25 @@ def parse_args() -> argparse.Namespace:
         dest="defconfig",
         help=help_defconfig
     )
+    parser_kernel.add_argument(
+        "--compiler-cache",
+        type=str,
+        dest="compiler_cache",
+        choices=choices_compiler_cache,
+        help=help_compiler_cache
+    )
+    parser_kernel.add_argument(
+        "--incremental",
+        action="store_true",
+        dest="incremental",
+        help=help_incremental
+    )
+    parser_kernel.add_argument(
+        "--variants",
+        action="store_true",
+        dest="variants",
+        help=help_variants
+    )
 
     # assets
     parser_assets.add_argument(
@@ -195,8 +221,9 @@ def parse_args() -> argparse.Namespace:
     parser_bundle.add_argument(
         "--codename",
         type=str,
+        nargs="+",
         required=True,
-        help=help_codename
+        help=help_codenames
     )
     parser_bundle.add_argument(
         "--lkv",
@@ -236,6 +263,66 @@ def parse_args() -> argparse.Namespace:
         dest="defconfig",
         help=help_defconfig
     )
+    parser_bundle.add_argument(
+        "--compiler-cache",
+        type=str,
+        dest="compiler_cache",
+        choices=choices_compiler_cache,
+        help=help_compiler_cache
+    )
+    parser_bundle.add_argument(
+        "--incremental",
+        action="store_true",
+        dest="incremental",
+        help=help_incremental
+    )
+
+    # matrix
+    parser_matrix.add_argument(
+        "--build-env",
+        type=str,
+        dest="benv",
+        required=True,
+        choices=choices_benv,
+        help=help_benv
+    )
+    parser_matrix.add_argument(
+        "--file",
+        type=Path,
+        dest="matrix",
+        required=True,
+        help="specify path to the build matrix file"
+    )
+    parser_matrix.add_argument(
+        "--jobs",
+        type=int,
+        dest="jobs",
+        help="select the maximum number of concurrent jobs"
+    )
+    parser_matrix.add_argument(
+        "--memory",
+        type=float,
+        dest="memory",
+        help="limit RAM used by concurrent jobs, in GiB"
+    )
+    parser_matrix.add_argument(
+        "--disk",
+        type=float,
+        dest="disk",
+        help="limit disk space used by concurrent jobs, in GiB"
+    )
+    parser_matrix.add_argument(
+        "--output",
+        type=Path,
+        dest="output",
+        help="specify path to the directory with collected artifacts"
+    )
+    parser_matrix.add_argument(
+        "--clean-image",
+        action="store_true",
+        dest="clean_image",
+        help=help_clean
+    )
     return parser_parent.parse_args(args)
 
 
@@ -253,9 +340,25 @@ def main() -> None:
     with open(dcfg.root / "pyproject.toml", encoding="utf-8") as f:
         os.environ["KVERSION"] = f.read().split('version = "')[1].split('"')[0]
 
+    # matrix jobs are configured and checked one by one
+    if args.command == "matrix":
+        options = {k: getattr(args, k) for k in ("jobs", "memory", "disk", "output") if getattr(args, k) is not None}
+        mc = MatrixCommand(
+            matrix_builder = MatrixBuilder(
+                matrix = args.matrix.absolute(),
+                benv = args.benv,
+                clean_image = args.clean_image,
+                **options
+            )
+        )
+        mc.execute()
+        sys.exit(0)
+
     # create a config for checking and storing arguments
     if args.command != "assets" and args.defconfig:
         args.defconfig = args.defconfig if args.defconfig.is_absolute() else Path.cwd() / args.defconfig
+    if isinstance(args.codename, str):
+        args.codename = [args.codename]
     arguments = vars(args)
     acfg = ArgumentConfig(**arguments)
     acfg.check_settings()
@@ -267,43 +370,70 @@ def main() -> None:
                 ccmd.launch(engined_cmd)
 
         case "local":
-            kernel_builder = KernelBuilder(
-                codename = args.codename,
-                base = args.base,
-                lkv = args.lkv,
-                clean_kernel = args.clean_kernel,
-                ksu = args.ksu,
-                defconfig = args.defconfig,
-                rmanager = ResourceManager(
-                    codename = args.codename,
-                    lkv = args.lkv,
-                    base = args.base
-                )
-            )
-            assets_collector = AssetsCollector(
-                codename = args.codename,
-                base = args.base,
-                chroot = args.chroot,
-                clean_assets = args.clean_assets,
-                rom_only = args.rom_only,
-                ksu = args.ksu,
-            )
-
+            # objects are created per command, as each parser defines only the options of its command
             match args.command:
                 case "kernel":
-                    kc = KernelCommand(kernel_builder=kernel_builder)
+                    kernel_builder = KernelBuilder(
+                        codename = args.codename[0],
+                        base = args.base,
+                        lkv = args.lkv,
+                        clean_kernel = args.clean_kernel,
+                        ksu = args.ksu,
+                        defconfig = args.defconfig,
+                        compiler_cache = args.compiler_cache,
+                        incremental = args.incremental,
+                        variants = args.variants,
+                        rmanager = ResourceManager(
+                            codename = args.codename[0],
+                            lkv = args.lkv,
+                            base = args.base
+                        )
+                    )
+                    kc = KernelCommand(kernel_builder=kernel_builder, codenames=args.codename)
                     kc.execute()
 
                 case "assets":
+                    assets_collector = AssetsCollector(
+                        codename = args.codename[0],
+                        base = args.base,
+                        chroot = args.chroot,
+                        clean_assets = args.clean_assets,
+                        rom_only = args.rom_only,
+                        ksu = args.ksu,
+                    )
                     ac = AssetsCommand(assets_collector=assets_collector)
                     ac.execute()
 
-                case "bundle":  
+                case "bundle":
+                    # cleaning, chroot and ROM-only flags are set by the bundle command itself
+                    kernel_builder = KernelBuilder(
+                        codename = args.codename[0],
+                        base = args.base,
+                        lkv = args.lkv,
+                        clean_kernel = False,
+                        ksu = args.ksu,
+                        defconfig = args.defconfig,
+                        compiler_cache = args.compiler_cache,
+                        incremental = args.incremental,
+                        rmanager = ResourceManager(
+                            codename = args.codename[0],
+                            lkv = args.lkv,
+                            base = args.base
+                        )
+                    )
+                    assets_collector = AssetsCollector(
+                        codename = args.codename[0],
+                        base = args.base,
+                        clean_assets = True,
+                        rom_only = False,
+                        ksu = args.ksu,
+                    )
                     bc = BundleCommand(
                         kernel_builder = kernel_builder,
                         assets_collector = assets_collector,
                         package_type = args.package_type,
-                        base = args.base
+                        base = args.base,
+                        codenames = args.codename
                     )
                     bc.execute()
 
@@ -1,13 +1,10 @@
-import os
 import sys
-import shutil
 import logging
-import requests
 from pathlib import Path
 from typing import Optional
 from pydantic import BaseModel
 
-from zkb.tools import cleaning as cm, commands as ccmd
+from zkb.tools import network as net, vcs
 from zkb.configs import DirectoryConfig as dcfg
 
 
@@ -19,10 +16,14 @@ class GithubApiClient(BaseModel):
 
     :param str project: GitHub project name (owner/repo).
     :param Optional[str]=None file_filter: A filter to select specific files from project's artifacts.
+    :param Optional[list[dict[str,str]]]=None release_assets: Latest release's artifacts, if already resolved.
+    :param Optional[str]=None digest: SHA-256 checksum of the selected artifact, if published.
     """
 
     project: str
     file_filter: Optional[str] = None
+    release_assets: Optional[list[dict[str, str]]] = None
+    digest: Optional[str] = None
 
     @property
     def endpoint(self) -> str:
@@ -42,13 +43,66 @@ class GithubApiClient(BaseModel):
         """
         return f"https://github.com/{self.project}"
 
+    @staticmethod
+    def prefetch(clients: list["GithubApiClient"]) -> None:
+        """Resolve latest releases of several projects at once, via a single GraphQL query.
+
+        Projects that could not be resolved this way are left to a regular REST request in run().
+
+        :param list[GithubApiClient] clients: GitHub API clients.
+        :return: None
+        """
+        # projects without a file filter are cloned instead
+        clients = [c for c in clients if c.file_filter is not None]
+        if not clients:
+            return
+
+        query = "query {\n"
+        for i, c in enumerate(clients):
+            owner, name = c.project.split("/", 1)
+            query += f'  p{i}: repository(owner: "{owner}", name: "{name}") {{ '\
+                     "latestRelease { releaseAssets(first: 100) { nodes { downloadUrl digest } } } }\n"
+        query += "}"
+
+        data = net.api_query(query)
+        if not data:
+            return
+
+        for i, c in enumerate(clients):
+            release = (data.get(f"p{i}") or {}).get("latestRelease")
+            if release:
+                c.release_assets = [
+                    {"browser_download_url": n["downloadUrl"], "digest": n.get("digest") or ""}
+                    for n in release["releaseAssets"]["nodes"]
+                ]
+
+        log.info(f"Resolved {sum(c.release_assets is not None for c in clients)} GitHub releases in one request")
+
+    def _export(self) -> None:
+        """Get a snapshot of the project's repository as an archive.
+
+        :return: None
+        """
+        log.warning(f"Non-API GitHub resolution for {self.project}")
+
+        # repository snapshot is streamed into the archive, without a working tree
+        vcs.export_zip(self.direct_url, Path(dcfg.assets, f"{self.direct_url.rsplit('/', 1)[1]}.zip"))
+
     def run(self) -> str | None:
         """Get the latest version of an artifact from GitHub project.
 
         :return: URL to download release artifact from if applicable.
         :rtype: str | None
         """
-        response = requests.get(self.endpoint).json()
+        # projects without a file filter are cloned instead
+        if self.file_filter is None:
+            self._export()
+            return None
+
+        if self.release_assets is not None:
+            response = {"assets": self.release_assets}
+        else:
+            response = net.api_get(self.endpoint)
 
         # check whether the GitHub API usage is exceeded
         try:
@@ -67,6 +121,8 @@ class GithubApiClient(BaseModel):
                 url_dto = elem["browser_download_url"]
                 if url_dto and self.file_filter in url_dto:
                     browser_download_urls.append(url_dto)
+                    # GitHub publishes checksums of release artifacts as "sha256:<hex>"
+                    self.digest = (elem.get("digest") or "").removeprefix("sha256:") or None
 
             # if there is more than one fitting response -- throw an error
             if len(browser_download_urls) > 1:
@@ -80,21 +136,7 @@ class GithubApiClient(BaseModel):
 
         except Exception:
             # if not available via API -- use regular "git clone"
-            log.warning(f"Non-API GitHub resolution for {self.project}")
-
-            rdir = Path(dcfg.assets, self.direct_url.rsplit("/", 1)[1])
-
-            cm.remove(rdir)
-            ccmd.launch(
-                "git clone --depth 1 --remote-submodules --recurse-submodules --shallow-submodules {} {}"
-                .format(self.direct_url, rdir)
-            )
-            os.chdir(rdir)
-            cm.remove(".git*")
-            os.chdir(dcfg.assets)
-            shutil.make_archive(str(rdir), "zip", rdir)
-            cm.remove(rdir)
-
+            self._export()
             return None
 
         return data
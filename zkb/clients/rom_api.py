@@ -1,7 +1,13 @@
-import requests
+import os
+import sys
+import json
+import fcntl
 import logging
+from pathlib import Path
 from pydantic import BaseModel
 
+from zkb.tools import cleaning as cm, fileoperations as fo, network as net
+from zkb.configs import DirectoryConfig as dcfg
 from zkb.interfaces import IRomApiClient
 
 
@@ -15,6 +21,7 @@ class RomApiClient(BaseModel, IRomApiClient):
     :param str json_key: A JSON key to look for in the response data.
     :param str rom_name: ROM project's name.
     :param bool rom_only: Flag indicating ROM-only asset collection.
+    :param int keep: Number of most recent ROM builds kept locally per codename.
     """
 
     endpoint: str
@@ -22,22 +29,71 @@ class RomApiClient(BaseModel, IRomApiClient):
     rom_name: str
     codename: str
     rom_only: bool
+    keep: int = int(os.getenv("ZKB_ROM_KEEP", "2"))
 
     def __init__(self, **kwargs) -> None:
         super().__init__(**kwargs)
         self.endpoint = self.endpoint.format(self.map_codename())
 
+    @property
+    def _store(self) -> Path:
+        """Directory with locally kept ROM builds.
+
+        :return: Path to the directory.
+        :rtype: Path
+        """
+        return dcfg.cache / "roms" / self.rom_name.lower() / self.codename
+
     def map_codename(self) -> str:
         # by default, codename is devicename
         return self.codename
 
-    def run(self) -> str:
-        data = requests.get(self.endpoint)
+    def latest(self) -> dict:
+        data = net.get_json(self.endpoint)
 
         try:
-            data = data.json()[self.json_key][0]["url"]
+            return data[self.json_key][0]
         except Exception:
-            exit_flag = False if self.rom_only else True
-            log.error(f"Could not connect to {self.rom_name} API, HTTP status code: {data.status_code}")
+            message = data.get("message", "no builds found") if isinstance(data, dict) else "no builds found"
+            log.error(f"Could not get ROM build from {self.rom_name} API: {message}")
+            sys.exit(1)
+
+    def run(self) -> str:
+        return str(self.latest()["url"])
+
+    def sync(self) -> Path:
+        build = self.latest()
+        meta = {k: str(build.get(k, "")) for k in ("id", "datetime", "sha256", "url")}
+        meta["filename"] = build.get("filename") or fo.url_name(meta["url"])
+        path = self._store / meta["filename"]
+
+        os.makedirs(self._store, exist_ok=True)
+
+        # builds of the same codename can be synced by concurrent jobs
+        with open(self._store / ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+            manifest = []
+            if (self._store / "builds.json").is_file():
+                with open(self._store / "builds.json", encoding="utf-8") as f:
+                    manifest = json.load(f)
+
+            known = next((b for b in manifest if (b["id"], b["datetime"]) == (meta["id"], meta["datetime"])), None)
+
+            if known and path.is_file() and (not meta["sha256"] or meta["sha256"] == known["sha256"]):
+                log.info(f"{self.rom_name} build {meta['filename']} is unchanged, skipping download")
+                meta = known
+            else:
+                # checksum from the API is verified while downloading, the computed one is recorded
+                meta["sha256"] = fo.download(meta["url"], path, meta["sha256"] or None)
+
+            # the most recent build goes first, older ones are removed past the retention limit
+            manifest = [meta] + [b for b in manifest if b["filename"] != meta["filename"]]
+            for b in manifest[max(self.keep, 1):]:
+                log.warning(f"Removing old {self.rom_name} build {b['filename']}..")
+                cm.remove(self._store / b["filename"])
+
+            with open(self._store / "builds.json", "w", encoding="utf-8") as f:
+                json.dump(manifest[:max(self.keep, 1)], f, indent=4)
 
-        return str(data)
+        return path
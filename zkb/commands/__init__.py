@@ -1,3 +1,4 @@
 from .kernel import KernelCommand
 from .bundle import BundleCommand
 from .assets import AssetsCommand
+from .matrix import MatrixCommand
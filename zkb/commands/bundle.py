@@ -23,15 +23,50 @@ class BundleCommand(BaseModel, ICommand):
     :param builder.core.AssetsCollector assets_collector: Assets collector object.
     :param str package_type: Package type.
     :param str base: ROM base for the kernel.
+    :param list[str]=[] codenames: Device codenames to bundle, the builder's one if empty.
     """
 
     kernel_builder: KernelBuilder
     assets_collector: AssetsCollector
     package_type: str
     base: str
+    codenames: list[str] = []
+
+    @property
+    def _families(self) -> dict[str, list[str]]:
+        """Group device codenames by their family, all devices of which share the same kernel.
+
+        :return: Unified codenames mapped to the device codenames.
+        :rtype: dict[str, list[str]]
+        """
+        families: dict[str, list[str]] = {}
+        for codename in self.codenames or [self.kernel_builder.codename]:
+            families.setdefault(KernelBuilder.family(codename), []).append(codename)
+
+        return families
+
+    def _select(self, codename: str) -> None:
+        """Switch the kernel builder and the assets collector to a device.
+
+        :param str codename: Device codename.
+        :return: None
+        """
+        self.kernel_builder.codename = codename
+        self.kernel_builder.rmanager.codename = codename
+        self.assets_collector.codename = codename
+
+    @property
+    def _kernel_zip(self) -> Optional[Path]:
+        """Find the kernel ZIP file built for the selected device's family.
+
+        :return: Path to the ZIP file, if the kernel is built.
+        :rtype: Optional[Path]
+        """
+        return self.kernel_builder.packaged_zip()
 
     def build_kernel(self, rom_name: str, clean_only: Optional[bool] = False) -> None:
-        if not dcfg.kernel.is_dir() or clean_only is True:
+        # the kernel is built once for the whole device family
+        if not self._kernel_zip or clean_only is True:
             self.kernel_builder.clean_kernel = clean_only  # type: ignore
 
             self.kernel_builder.run()
@@ -109,57 +144,69 @@ class BundleCommand(BaseModel, ICommand):
         # determine the bundle type and process it
         match self.package_type:
             case "slim" | "full":
-                self.build_kernel(self.base)
-
-                # "full" chroot is hardcoded here
-                self.collect_assets(self.base, "full")
-
                 # clean up
                 if dcfg.bundle.is_dir():
-                    contents = dcfg.bundle.glob("*")
-                    for f in contents:
-                        os.remove(f)
+                    cm.remove(list(dcfg.bundle.glob("*")))
                 else:
                     os.makedirs(dcfg.bundle)
 
-                # copy kernel
-                kfn = "".join(os.listdir(dcfg.kernel))
-                shutil.copy(dcfg.kernel / kfn, dcfg.bundle / kfn)
+                families = self._families
+                for members in families.values():
+                    # the kernel is built for the first device of the family, and bundled for each of them
+                    self._select(members[0])
+                    self.build_kernel(self.base)
+                    kzip = self._kernel_zip
 
-                # move assets (and not copy because they are way too big)
-                for afn in os.listdir(dcfg.assets):
-                    # here, because of their size assets are moved and not copied
-                    shutil.move(dcfg.assets / afn, dcfg.bundle / afn)
+                    for codename in members:
+                        self._select(codename)
 
-            case "conan":
-                # form Conan reference
-                name = "zero_kernel"
-                version = os.getenv("KVERSION")
-                user = self.kernel_builder.codename
-                channel = ""
-
-                if ccmd.launch("git branch --show-current", get_output=True) == "main":
-                    channel = "stable"
-                else:
-                    channel = "testing"
+                        # "full" chroot is hardcoded here
+                        self.collect_assets(self.base, "full")
 
-                reference = f"{name}/{version}@{user}/{channel}"
+                        # several devices are bundled into their own directories
+                        bdir = dcfg.bundle / codename if sum(map(len, families.values())) > 1 else dcfg.bundle
+                        os.makedirs(bdir, exist_ok=True)
 
-                # form option sets
-                chroot = ("minimal", "full")
-                option_sets = list(itertools.product([self.base], chroot))
+                        # copy kernel
+                        shutil.copy(kzip, bdir / kzip.name) # type: ignore
 
-                # build and upload Conan packages
-                for opset in option_sets:
-                    self.build_kernel(opset[0])
-                    self.build_kernel(opset[0], True)
-                    self.conan_sources()
-                    self.collect_assets(opset[0], opset[1])
-                    self.conan_package(opset, reference)
+                        # move assets (and not copy because they are way too big)
+                        for afn in os.listdir(dcfg.assets):
+                            # here, because of their size assets are moved and not copied
+                            shutil.move(dcfg.assets / afn, bdir / afn)
 
-                # upload packages
-                if os.getenv("CONAN_UPLOAD_CUSTOM") == "1":
-                    self.conan_upload(reference)
+            case "conan":
+                for codename in self.codenames or [self.kernel_builder.codename]:
+                    self._select(codename)
+
+                    # form Conan reference
+                    name = "zero_kernel"
+                    version = os.getenv("KVERSION")
+                    user = self.kernel_builder.codename
+                    channel = ""
+
+                    if ccmd.launch("git branch --show-current", get_output=True) == "main":
+                        channel = "stable"
+                    else:
+                        channel = "testing"
+
+                    reference = f"{name}/{version}@{user}/{channel}"
+
+                    # form option sets
+                    chroot = ("minimal", "full")
+                    option_sets = list(itertools.product([self.base], chroot))
+
+                    # build and upload Conan packages
+                    for opset in option_sets:
+                        self.build_kernel(opset[0])
+                        self.build_kernel(opset[0], True)
+                        self.conan_sources()
+                        self.collect_assets(opset[0], opset[1])
+                        self.conan_package(opset, reference)
+
+                    # upload packages
+                    if os.getenv("CONAN_UPLOAD_CUSTOM") == "1":
+                        self.conan_upload(reference)
 
         # navigate back to root directory
         os.chdir(dcfg.root)
@@ -12,10 +12,25 @@ log = logging.getLogger("ZeroKernelLogger")
 class KernelCommand(BaseModel, ICommand):
     """Command responsible for launching the 'kernel_builder' core module directly.
 
+    Devices of the same family share a kernel, so it is built once per family:
+    the resulting ZIP file is installable on each of the family's devices.
+
     :param builder.core.KernelBuilder kernel_builder: Kernel builder object.
+    :param list[str]=[] codenames: Device codenames to build the kernel for, the builder's one if empty.
     """
 
     kernel_builder: KernelBuilder
+    codenames: list[str] = []
 
     def execute(self) -> None:
-        self.kernel_builder.run()
+        families: dict[str, str] = {}
+        for codename in self.codenames or [self.kernel_builder.codename]:
+            families.setdefault(KernelBuilder.family(codename), codename)
+
+        for family, codename in families.items():
+            if len(families) > 1:
+                log.warning(f"Building the kernel for {family} device family..")
+
+            self.kernel_builder.codename = codename
+            self.kernel_builder.rmanager.codename = codename
+            self.kernel_builder.run()
@@ -0,0 +1,20 @@
+import logging
+from pydantic import BaseModel
+
+from zkb.core import MatrixBuilder
+from zkb.interfaces import ICommand
+
+
+log = logging.getLogger("ZeroKernelLogger")
+
+
+class MatrixCommand(BaseModel, ICommand):
+    """Command responsible for launching the 'matrix_builder' core module directly.
+
+    :param builder.core.MatrixBuilder matrix_builder: Matrix builder object.
+    """
+
+    matrix_builder: MatrixBuilder
+
+    def execute(self) -> None:
+        self.matrix_builder.run()
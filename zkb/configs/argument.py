@@ -17,7 +17,7 @@ class ArgumentConfig(BaseModel):
 
     :param Literal["docker","podman","local"] benv: Build environment.
     :param Literal["kernel","assets","bundle"] command: Builder command to be launched.
-    :param str codename: Device codename.
+    :param list[str] codename: Device codenames.
     :param str base: Kernel source base.
     :param str lkv: Linux kernel version.
     :param Optional[str]=None chroot: Chroot type.
@@ -29,11 +29,14 @@ class ArgumentConfig(BaseModel):
     :param Optional[bool]=False conan_upload: Flag to enable Conan upload.
     :param Optional[bool]=False ksu: Flag indicating KernelSU support.
     :param Optional[Path]=None defconfig: Path to custom defconfig.
+    :param Optional[Literal["ccache","sccache"]]=None compiler_cache: Compiler cache to be used in the build.
+    :param Optional[bool]=False incremental: Flag to keep build output between the builds.
+    :param Optional[bool]=False variants: Flag to build both KernelSU and non-KernelSU variants.
     """
 
     benv: Literal["docker", "podman", "local"]
     command: Literal["kernel", "assets", "bundle"]
-    codename: str
+    codename: list[str]
     base: str
     lkv: Optional[str] = None
     chroot: Optional[str] = None
@@ -45,6 +48,9 @@ class ArgumentConfig(BaseModel):
     conan_upload: Optional[bool] = False
     ksu: Optional[bool] = False
     defconfig: Optional[Path] = None
+    compiler_cache: Optional[Literal["ccache", "sccache"]] = None
+    incremental: Optional[bool] = False
+    variants: Optional[bool] = False
 
     def check_settings(self) -> None:
         """Run settings validations.
@@ -70,7 +76,7 @@ class ArgumentConfig(BaseModel):
         ) as f:
             devices = json.load(f)
 
-        if self.codename not in devices.keys():
+        if any(c not in devices.keys() for c in self.codename):
             log.error("Unsupported device codename specified.")
             sys.exit(1)
         if self.command == "bundle":
@@ -79,6 +85,11 @@ class ArgumentConfig(BaseModel):
                 log.error("Cannot use Conan-related arguments with non-Conan packaging\n")
                 sys.exit(1)
 
+        # both variants include KernelSU one
+        if self.variants and self.ksu:
+            log.error("KernelSU flag is redundant, both variants are built with variants enabled.")
+            sys.exit(1)
+
         # check that the provided defconfig file is valid
         if self.defconfig and not self.defconfig.is_file():
             log.error("Provided path to defconfig is invalid.")
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 from pydantic.dataclasses import dataclass
 
@@ -9,3 +10,5 @@ class DirectoryConfig:
     kernel: Path = root / "kernel"
     assets: Path = root / "assets"
     bundle: Path = root / "bundle"
+    # persistent cache, shared between different roots and containers
+    cache: Path = Path(os.getenv("ZKB_CACHE_DIR", Path.home() / ".cache" / "zero_kernel")).absolute()
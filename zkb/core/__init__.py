@@ -1,2 +1,3 @@
 from .kernel_builder import KernelBuilder
 from .assets_collector import AssetsCollector
+from .matrix_builder import MatrixBuilder
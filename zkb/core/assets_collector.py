@@ -1,12 +1,14 @@
 import os
 import sys
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Literal, Optional
 from pydantic import BaseModel
 
 from zkb.tools import banner, fileoperations as fo, cleaning as cm
 from zkb.clients import GithubApiClient, LineageOsApiClient, ParanoidAndroidApiClient
 from zkb.configs import DirectoryConfig as dcfg
+from zkb.managers import CacheManager
 from zkb.interfaces import IAssetsCollector
 
 
@@ -21,6 +23,8 @@ class AssetsCollector(BaseModel, IAssetsCollector):
     :param Optional[Literal["full","minimal"]]=None chroot: Chroot type.
     :param bool rom_only: Flag indicating ROM-only asset collection.
     :param bool ksu: Flag indicating KernelSU support.
+    :param int jobs: Number of assets resolved and downloaded in parallel.
+    :param CacheManager cmanager: Persistent asset store.
     """
 
     codename: str
@@ -29,6 +33,11 @@ class AssetsCollector(BaseModel, IAssetsCollector):
     clean_assets: bool
     rom_only: bool
     ksu: bool
+    jobs: int = int(os.getenv("ZKB_FETCH_JOBS", "1"))
+    cmanager: CacheManager = CacheManager(
+        directory=dcfg.cache / "assets",
+        budget=int(float(os.getenv("ZKB_ASSET_CACHE_SIZE", "10")) * 1024 ** 3)
+    )
 
     @property
     def rom_collector_dto(self) -> LineageOsApiClient | ParanoidAndroidApiClient | None:
@@ -55,7 +64,7 @@ class AssetsCollector(BaseModel, IAssetsCollector):
                 # add DFD alongside the ROM
                 print("\n", end="")
                 log.info("ROM-only asset collection specified")
-                return [self.rom_collector_dto.run(), dfd]
+                return [self.rom_collector_dto, dfd]
 
         # process the full download
         else:
@@ -100,7 +109,7 @@ class AssetsCollector(BaseModel, IAssetsCollector):
 
             # add ROM if kernel base is not universal
             if self.rom_collector_dto:
-                assets.append(self.rom_collector_dto.run()) # type: ignore
+                assets.append(self.rom_collector_dto) # type: ignore
 
             return assets
 
@@ -132,6 +141,34 @@ class AssetsCollector(BaseModel, IAssetsCollector):
 
         print("\n", end="")
 
+    def _collect(self, asset: str | GithubApiClient | LineageOsApiClient | ParanoidAndroidApiClient) -> None:
+        """Resolve an asset into it's download URL (if needed) and download it.
+
+        Downloads go through the persistent asset store, from which files are hard linked into assets directory.
+
+        :param str/GithubApiClient/LineageOsApiClient/ParanoidAndroidApiClient asset: Asset URL or API client.
+        :return: None
+        """
+        # ROM builds are kept in their own store, where they are updated incrementally
+        if isinstance(asset, LineageOsApiClient | ParanoidAndroidApiClient):
+            path = asset.sync()
+            fo.link(path, dcfg.assets / path.name)
+            return
+
+        url = asset if isinstance(asset, str) else asset.run()
+
+        # GitHub projects without release artifacts are packaged by the client itself
+        if not url:
+            return
+
+        # artifact checksum published by GitHub is verified during download
+        sha256 = asset.digest if isinstance(asset, GithubApiClient) else None
+
+        if self.cmanager.budget > 0:
+            fo.link(self.cmanager.fetch(url, sha256, revalidate=True), dcfg.assets / fo.url_name(url))
+        else:
+            fo.download(url, sha256=sha256)
+
     def run(self) -> None:
         banner.print_banner("zero asset collector")
 
@@ -139,14 +176,37 @@ class AssetsCollector(BaseModel, IAssetsCollector):
         self.check()
         os.chdir(dcfg.assets)
         # NOTE: call "self.assets" only once!
-        assets = self.assets
-
-        if isinstance(assets, list) or isinstance(assets, tuple):
-            for e in assets:
-                if isinstance(e, GithubApiClient):
-                    e.run()
-                else:
-                    fo.download(e)
+        assets = self.assets or []
+
+        # assets are independent of each other, so the slowest one sets the overall time
+        jobs = max(1, min(self.jobs, len(assets)))
+        if jobs > 1:
+            log.warning(f"Collecting {len(assets)} assets with {jobs} parallel jobs..")
+
+        # GitHub releases are resolved in one batch, instead of a request per project
+        GithubApiClient.prefetch([e for e in assets if isinstance(e, GithubApiClient)])
+
+        failed = []
+
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(self._collect, e): e for e in assets}
+
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                # failed downloads exit via sys.exit(), which has to be caught here as well
+                except (Exception, SystemExit) as e:
+                    asset = futures[future]
+                    name = asset if isinstance(asset, str) else getattr(asset, "project", type(asset).__name__)
+                    failed.append(name)
+                    if not isinstance(e, SystemExit):
+                        log.error(f"{name}: {e}")
+
+        if failed:
+            print("\n", end="")
+            log.error(f"Could not collect assets: {', '.join(failed)}")
+            os.chdir(dcfg.root)
+            sys.exit(1)
 
         print("\n", end="")
         log.info("Assets collected!")
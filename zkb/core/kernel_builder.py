@@ -1,14 +1,17 @@
 import os
 import sys
+import json
 import time
+import hashlib
 import logging
 from pathlib import Path
-from typing import Optional
+from typing import Literal, Optional
+from concurrent.futures import ThreadPoolExecutor
 from pydantic import BaseModel
 
-from zkb.tools import cleaning as cm, commands as ccmd, fileoperations as fo, banner
+from zkb.tools import cleaning as cm, commands as ccmd, fileoperations as fo, banner, patcher, prototypes, vcs
 from zkb.configs import DirectoryConfig as dcfg
-from zkb.managers import ResourceManager
+from zkb.managers import ResourceManager, CompilerCacheManager, JournalManager, ArtifactManager
 from zkb.interfaces import IKernelBuilder
 
 
@@ -24,6 +27,11 @@ class KernelBuilder(BaseModel, IKernelBuilder):
     :param bool clean_kernel: Flag to clean folder with kernel sources.
     :param bool ksu: Flag indicating KernelSU support.
     :param Optional[Path]=None defconfig: Path to custom defconfig.
+    :param Optional[Literal["ccache","sccache"]]=None compiler_cache: Compiler cache to be used in the build.
+    :param Optional[bool]=False incremental: Flag to keep build output between the builds.
+    :param Optional[bool]=False variants: Flag to build both KernelSU and non-KernelSU variants from one patched tree.
+    :param JournalManager jmanager: Journal of paths modified in git repositories.
+    :param ArtifactManager amanager: Store of build artifacts.
     """
 
     codename: str
@@ -33,11 +41,24 @@ class KernelBuilder(BaseModel, IKernelBuilder):
     ksu: bool
     rmanager: ResourceManager
     defconfig: Optional[Path] = None
+    compiler_cache: Optional[Literal["ccache", "sccache"]] = None
+    incremental: Optional[bool] = False
+    variants: Optional[bool] = False
+    jmanager: JournalManager = JournalManager()
+    amanager: ArtifactManager = ArtifactManager()
 
     @staticmethod
     def write_localversion() -> None:
-        with open("localversion", "w", encoding="utf-8") as f:
-            f.write("~zero_kernel")
+        fo.write_if_changed("localversion", b"~zero_kernel")
+
+    @staticmethod
+    def family(codename: str) -> str:
+        if codename in ("dumpling", "cheeseburger"):
+            return "dumplinger"
+        elif "guacamole" in codename:
+            return "guacamoles"
+        else:
+            return codename
 
     @property
     def _ucodename(self) -> str:
@@ -46,12 +67,7 @@ class KernelBuilder(BaseModel, IKernelBuilder):
         :return: Unified codename.
         :rtype: str
         """
-        if self.codename in ("dumpling", "cheeseburger"):
-            return "dumplinger"
-        elif "guacamole" in self.codename:
-            return "guacamoles"
-        else:
-            return self.codename
+        return self.family(self.codename)
 
     @property
     def _defconfig(self) -> Path:
@@ -82,193 +98,172 @@ class KernelBuilder(BaseModel, IKernelBuilder):
         else:
             return Path()
 
-    def clean_build(self) -> None:
-        print("\n", end="")
-        log.warning("Cleaning the build environment..")
+    @property
+    def _fingerprint(self) -> dict[str, str]:
+        """Fingerprint the inputs that define the patched sources and the build output.
 
-        cm.git(self.rmanager.paths[self.codename])
-        cm.git(self.rmanager.paths["AnyKernel3"])
-        cm.git(self.rmanager.paths["KernelSU"])
+        :return: Fingerprint components.
+        :rtype: dict[str, str]
+        """
+        kdir = self.rmanager.paths[self.codename]
+
+        # patch set covers both the modification files and the patching logic itself
+        patches = hashlib.sha256(Path(__file__).read_bytes())
+        for tool in (patcher, prototypes):
+            patches.update(Path(tool.__file__).read_bytes()) # type: ignore
+        mods = dcfg.root / "zkb" / "modifications" / self._ucodename
+        for fn in sorted(p for p in mods.rglob("*") if p.is_file()):
+            patches.update(str(fn.relative_to(mods)).encode("utf-8"))
+            patches.update(fn.read_bytes())
+
+        defconfig = self.defconfig.read_bytes() if self.defconfig else str(self._defconfig).encode("utf-8")
+
+        return {
+            "source": str(ccmd.launch(f"git -C {kdir} rev-parse HEAD", get_output=True)),
+            "kernelsu": str(ccmd.launch(f'git -C {self.rmanager.paths["KernelSU"]} rev-parse HEAD', get_output=True))
+                        if self.ksu or self.variants else "",
+            "patches": patches.hexdigest(),
+            "defconfig": hashlib.sha256(defconfig).hexdigest(),
+            # only the version line, the rest of the output names the installation directory of the root
+            "toolchain": str(ccmd.launch(f'{self.rmanager.paths["clang"] / "bin" / "clang"} --version', get_output=True))
+                         .partition("\n")[0],
+            "ksu": "variants" if self.variants else str(self.ksu),
+        }
 
-        for fn in os.listdir():
-            if fn == "localversion" or fn.endswith(".zip"):
-                cm.remove(fn)
+    @property
+    def _fingerprint_file(self) -> Path:
+        """Path to the fingerprint of the build output.
 
-        log.info("Done!")
+        :return: Path to the fingerprint file.
+        :rtype: Path
+        """
+        return self.rmanager.paths[self.codename] / "out" / ".zkb-fingerprint.json"
 
-    def patch_strict_prototypes(self) -> None:
-        log.warning("Patching sources for Clang 15+ compatibility..")
+    @property
+    def _variants(self) -> dict[str, bool]:
+        """Define build variants.
 
-        data = {
-            self.rmanager.paths[self.codename] /\
-            "drivers" /\
-            "char" /\
-            "diag" /\
-            "diagchar_core.c":
-            ("void diag_ws_init()", "void diag_ws_on_notify()", "void diag_ws_release()",),
+        :return: Names of the variants (empty for a single build) mapped to their KernelSU flags.
+        :rtype: dict[str, bool]
+        """
+        return {"plain": False, "ksu": True} if self.variants else {"": bool(self.ksu)}
 
-            self.rmanager.paths[self.codename] /\
-            "drivers" /\
-            "char" /\
-            "diag" /\
-            "diag_mux.c":
-            ("int diag_mux_init()", "void diag_mux_exit()",),
+    @property
+    def _ksu_configs(self) -> list[str]:
+        """Define kernel configuration options required by KernelSU.
 
-            self.rmanager.paths[self.codename] /\
-            "drivers" /\
-            "char" /\
-            "diag" /\
-            "diag_memorydevice.c":
-            ("void diag_md_open_all()", "void diag_md_close_all()",),
+        :return: Configuration options.
+        :rtype: list[str]
+        """
+        return [
+            "CONFIG_KSU=y",
+            "CONFIG_MODULES=y",
+            "CONFIG_MODULE_UNLOAD=y",
+            "CONFIG_MODVERSIONS=y",
+            "CONFIG_DIAG_CHAR=y",
+            "CONFIG_KPROBES=y",
+            "CONFIG_HAVE_KPROBES=y",
+            "CONFIG_KPROBE_EVENTS=y",
+        ]
+
+    def _out(self, variant: str = "") -> Path:
+        """Define build output directory of a variant.
+
+        :param str="" variant: Name of the variant.
+        :return: Path to the build output directory.
+        :rtype: Path
+        """
+        return self.rmanager.paths[self.codename] / "out" / variant
 
-            self.rmanager.paths[self.codename] /\
-            "drivers" /\
-            "char" /\
-            "diag" /\
-            "diag_dci.c":
-            ("void diag_dci_wakeup_clients()",),
+    def _image(self, variant: str = "") -> Path:
+        """Define path to the kernel image in the build output of a variant.
 
-            self.rmanager.paths[self.codename] /\
-            "drivers" /\
-            "char" /\
-            "diag" /\
-            "diagfwd_bridge.c":
-            ("void diagfwd_bridge_exit()", "uint16_t diag_get_remote_device_mask()",),
+        :param str="" variant: Name of the variant.
+        :return: Path to the kernel image.
+        :rtype: Path
+        """
+        return self._out(variant) / "arch" / "arm64" / "boot" / "Image.gz-dtb"
 
-            self.rmanager.paths[self.codename] /\
-            "drivers" /\
-            "char" /\
-            "diag" /\
-            "diagfwd_mhi.c":
-            ("int diag_mhi_init()", "void diag_mhi_exit()",),
+    @staticmethod
+    def _artifact(variant: str = "") -> str:
+        """Define name of the stored kernel image of a variant.
 
-            self.rmanager.paths[self.codename] /\
-            "drivers" /\
-            "media" /\
-            "platform" /\
-            "msm" /\
-            "camera_v2" /\
-            "common" /\
-            "msm_camera_tz_util.c":
-            ("struct qseecom_handle *msm_camera_tz_get_ta_handle()",),
+        :param str="" variant: Name of the variant.
+        :return: Name of the artifact.
+        :rtype: str
+        """
+        return f"{variant}.Image.gz-dtb" if variant else "Image.gz-dtb"
 
-            self.rmanager.paths[self.codename] /\
-            "drivers" /\
-            "media" /\
-            "platform" /\
-            "msm" /\
-            "vidc" /\
-            "msm_vidc_common.c":
-            ("void msm_comm_handle_thermal_event()",),
+    def _zip(self, ksu: bool) -> Path:
+        """Define path to the final ZIP file.
 
-            self.rmanager.paths[self.codename] /\
-            "drivers" /\
-            "soc" /\
-            "qcom" /\
-            "msm_bus" /\
-            "msm_bus_rpm_smd.c":
-            ("static int voice_svc_dummy_reg()",),
+        :param bool ksu: Flag indicating KernelSU support.
+        :return: Path to the ZIP file.
+        :rtype: Path
+        """
+        # define kernel versions: Linux (the same as in sources, which is checked before the build) and internal
+        verbase = self.lkv
+        ver_int = os.getenv("KVERSION")
 
-            self.rmanager.paths[self.codename] /\
-            "drivers" /\
-            "soc" /\
-            "qcom" /\
-            "msm_bus" /\
-            "msm_bus_rpm_smd.c":
-            ("void msm_bus_rpm_set_mt_mask()",),
+        name_suffix = "-ksu" if ksu else ""
+        name_full = f'{os.getenv("KNAME", "zero")}-{ver_int}-{self._ucodename}-{self.base}-{verbase}{name_suffix}'
 
-            self.rmanager.paths[self.codename] /\
-            "drivers" /\
-            "staging" /\
-            "qca-wifi-host-cmn" /\
-            "hif" /\
-            "src" /\
-            "ce" /\
-            "ce_service.c":
-            ("struct ce_ops *ce_services_legacy()",),
+        return dcfg.root / dcfg.kernel / f"{name_full}.zip"
 
-            self.rmanager.paths[self.codename] /\
-            "drivers" /\
-            "staging" /\
-            "qcacld-3.0" /\
-            "core" /\
-            "hdd" /\
-            "src" /\
-            "wlan_hdd_main.c":
-            ("hdd_adapter_t *hdd_get_first_valid_adapter()",),
+    def _stored_fingerprint(self) -> dict[str, str]:
+        """Read the fingerprint of the previous build.
 
-            self.rmanager.paths[self.codename] /\
-            "drivers" /\
-            "video" /\
-            "fbdev" /\
-            "msm" /\
-            "mdss_mdp.c":
-            ("struct irq_info *mdss_intr_line()",),
+        :return: Fingerprint components, empty if there is none.
+        :rtype: dict[str, str]
+        """
+        if not self._fingerprint_file.is_file():
+            return {}
 
-            self.rmanager.paths[self.codename] /\
-            "drivers" /\
-            "video" /\
-            "fbdev" /\
-            "msm" /\
-            "mdss_util.c":
-            ("struct mdss_util_intf *mdss_get_util_intf()",)
-        }
+        with open(self._fingerprint_file, encoding="utf-8") as f:
+            return json.load(f)
 
-        # the following files are not present in 4.14
-        if self.lkv_src != "4.14":
-            extra_non_414 = {
-                self.rmanager.paths[self.codename] /\
-                "drivers" /\
-                "soc" /\
-                "qcom" /\
-                "qdsp6v2" /\
-                "voice_svc.c":
-                ("void msm_bus_rpm_set_mt_mask()", "static int voice_svc_dummy_reg()"),
+    def clean_build(self) -> None:
+        print("\n", end="")
+        log.warning("Cleaning the build environment..")
 
-                self.rmanager.paths[self.codename] /\
-                "drivers" /\
-                "thermal" /\
-                "msm_thermal-dev.c":
-                ("int msm_thermal_ioctl_init()", "void msm_thermal_ioctl_cleanup()",),
-            }
-            data.update(extra_non_414)
+        # drop the fingerprint first, so that an interrupted patching is never reused
+        cm.remove(self._fingerprint_file)
 
-        # PA needs this, LineageOS does not
-        if self.base == "pa":
-            extra_pa = {
-                self.rmanager.paths[self.codename] /\
-                "drivers" /\
-                "staging" /\
-                "qca-wifi-host-cmn" /\
-                "target_if" /\
-                "core" /\
-                "src" /\
-                "target_if_main.c":
-                ("struct target_if_ctx *target_if_get_ctx()",),
+        # in incremental mode build output is kept, only the sources are reset
+        keep = ("/out",) if self.incremental else ()
+        if not self.incremental:
+            cm.remove(self.rmanager.paths[self.codename] / "out")
 
-                self.rmanager.paths[self.codename] /\
-                "drivers" /\
-                "staging" /\
-                "qca-wifi-host-cmn" /\
-                "wlan_cfg" /\
-                "wlan_cfg.c":
-                ("struct wlan_cfg_dp_soc_ctxt *wlan_cfg_soc_attach()",),
-            }
-            data.update(extra_pa)
-
-        # start the patching process
-        contents = ""
-        for fname, funcnames in data.items():
-            with open(fname, "r", encoding="utf-8") as f:
-                contents = f.read()
-            for func in funcnames:
-                contents = contents.replace(func, func.replace("()", "(void)"))
-            with open(fname, "w") as f:
-                f.write(contents)
+        # only journaled paths are restored, in all repositories at once
+        with ThreadPoolExecutor(max_workers=max(len(self.jmanager.repos), 1)) as pool:
+            list(pool.map(lambda repo: self.jmanager.reset(repo, keep), self.jmanager.repos))
+
+        for fn in os.listdir():
+            if fn == "localversion" or fn.endswith(".zip"):
+                cm.remove(fn)
 
         log.info("Done!")
 
+    def patch_strict_prototypes(self) -> None:
+        log.warning("Patching sources for Clang 15+ compatibility..")
+
+        kdir = self.rmanager.paths[self.codename]
+        commit = str(ccmd.launch(f"git -C {kdir} rev-parse HEAD", get_output=True))
+
+        # definitions without prototypes are found across the whole tree
+        found = prototypes.scan(kdir, commit, self.jmanager.paths(kdir))
+        self.jmanager.record(*(kdir / rel for rel in found))
+        changed = prototypes.fix(kdir, found)
+
+        log.info(f"Done! Fixed {len(changed)} files")
+
     def patch_anykernel3(self) -> None:
+        self.jmanager.record(
+            self.rmanager.paths["AnyKernel3"] / "ramdisk",
+            self.rmanager.paths["AnyKernel3"] / "models",
+            self.rmanager.paths["AnyKernel3"] / "anykernel.sh"
+        )
+
         cm.remove(self.rmanager.paths["AnyKernel3"] / "ramdisk")
         cm.remove(self.rmanager.paths["AnyKernel3"] / "models")
 
@@ -345,27 +340,21 @@ class KernelBuilder(BaseModel, IKernelBuilder):
                 "CONFIG_RTLWIFI=y",
             ]
 
-        # KernelSU changes
-        if self.ksu:
-            extra_configs.extend([
-                "CONFIG_KSU=y",
-                "CONFIG_MODULES=y",
-                "CONFIG_MODULE_UNLOAD=y",
-                "CONFIG_MODVERSIONS=y",
-                "CONFIG_DIAG_CHAR=y",
-                "CONFIG_KPROBES=y",
-                "CONFIG_HAVE_KPROBES=y",
-                "CONFIG_KPROBE_EVENTS=y",
-            ])
+        # KernelSU changes, for variants they are made in the configuration of each variant
+        if self.ksu and not self.variants:
+            extra_configs.extend(self._ksu_configs)
 
         # apply changes
-        with open(defconfig, "a", encoding="utf-8") as f:
-            f.write("\n".join(extra_configs))
-            f.write("\n")
+        self.jmanager.record(defconfig)
+        fo.append(defconfig, "\n".join(extra_configs) + "\n")
 
     def patch_rtl8812au(self) -> None:
         # copy RTL8812AU sources into kernel sources
         log.warning("Adding RTL8812AU drivers into the kernel..")
+        self.jmanager.record(
+            self.rmanager.paths[self.codename] / "drivers" / "net" / "wireless" / "realtek",
+            self.rmanager.paths[self.codename] / "drivers" / "net" / "wireless" / "Kconfig"
+        )
         fo.ucopy(
             self.rmanager.paths["rtl8812au"],
             self.rmanager.paths[self.codename] /\
@@ -401,8 +390,7 @@ class KernelBuilder(BaseModel, IKernelBuilder):
                   "net" /\
                   "wireless" /\
                   "Kconfig"
-        with open(makefile, "a", encoding="utf-8") as f:
-            f.write("obj-$(CONFIG_88XXAU)		+= rtl8812au/")
+        fo.append(makefile, "obj-$(CONFIG_88XXAU)		+= rtl8812au/")
         fo.insert_before_line(
             kconfig,
             "endif",
@@ -416,12 +404,10 @@ class KernelBuilder(BaseModel, IKernelBuilder):
 
         # extract KSU version manually and include it via symlink
         goback = Path.cwd()
-        os.chdir(self.rmanager.paths["KernelSU"])
         os.environ["KSU_GIT_VERSION"] = str(
             # official formula documented in KernelSU's Makefile
-            10000 + int(ccmd.launch("git rev-list --count HEAD", get_output=True)) + 200 # type: ignore
+            10000 + vcs.commit_count(self.rmanager.paths["KernelSU"]) + 200
         )
-        os.chdir(goback)
 
         makefile = self.rmanager.paths[self.codename] /\
                    "drivers" /\
@@ -430,6 +416,7 @@ class KernelBuilder(BaseModel, IKernelBuilder):
                   "drivers" /\
                   "Kconfig"
 
+        self.jmanager.record(self.rmanager.paths[self.codename] / "drivers" / "kernelsu", makefile, kconfig)
         os.symlink(
             self.rmanager.paths["KernelSU"] / "kernel",
             self.rmanager.paths[self.codename] /\
@@ -437,8 +424,7 @@ class KernelBuilder(BaseModel, IKernelBuilder):
             "kernelsu"
         )
 
-        with open(makefile, "a", encoding="utf-8") as f:
-            f.write("obj-$(CONFIG_KSU)		+= kernelsu/\n")
+        fo.append(makefile, "obj-$(CONFIG_KSU)		+= kernelsu/\n")
         fo.insert_before_line(
             kconfig,
             "endmenu",
@@ -447,27 +433,32 @@ class KernelBuilder(BaseModel, IKernelBuilder):
 
         # either patch kernel or KernelSU sources, depending on Linux kernel version
         target_d = dcfg.root / "KernelSU" if self.lkv_src == "4.14" else self.rmanager.paths[self.codename]
-        fo.ucopy(
-            dcfg.root / "zkb" / "modifications" / self._ucodename / self.lkv_src / patch_name,
+        self._apply_patches(
+            [dcfg.root / "zkb" / "modifications" / self._ucodename / self.lkv_src / patch_name],
             target_d
         )
-        os.chdir(target_d)
-        fo.apply_patch(patch_name)
         os.chdir(goback)
 
     def patch_qcacld(self) -> None:
         patch_name = "qcacld_pa.patch"
 
-        goback = Path.cwd()
-
-        fo.ucopy(
-            dcfg.root / "zkb" / "modifications" / self._ucodename / self.lkv_src / patch_name,
+        self._apply_patches(
+            [dcfg.root / "zkb" / "modifications" / self._ucodename / self.lkv_src / patch_name],
             self.rmanager.paths[self.codename]
         )
-        os.chdir(self.rmanager.paths[self.codename])
 
-        fo.apply_patch(patch_name)
-        os.chdir(goback)
+    def _apply_patches(self, patches: list[Path], root: Path) -> None:
+        """Apply .patch files to a repository, journaling the files they touch.
+
+        :param list[Path] patches: Paths to the .patch files.
+        :param Path root: Path to the repository.
+        :return: None
+        """
+        for pf in patches:
+            self.jmanager.record_patch(pf, root)
+
+        commit = str(ccmd.launch(f"git -C {root} rev-parse HEAD", get_output=True))
+        patcher.apply(patches, root, commit)
 
     def patch_ioctl(self) -> None:
         ioctl = self.rmanager.paths[self.codename] /\
@@ -478,6 +469,7 @@ class KernelBuilder(BaseModel, IKernelBuilder):
                 "ipa_v3" /\
                 "ipa.c"
 
+        self.jmanager.record(ioctl)
         fo.replace_lines(
             ioctl.absolute(),
             ("	u8 header[128] = { 0 };",),
@@ -485,26 +477,15 @@ class KernelBuilder(BaseModel, IKernelBuilder):
         )
 
     def patch_kernel(self) -> None:
-        # -Wstrict-prototypes patch to build with Clang 15+
-        clang_cmd = f'{self.rmanager.paths["clang"] / "bin" / "clang"} --version'
-        clang_ver = str(ccmd.launch(clang_cmd, get_output=True)).split("clang version ")[1].split(".")[0]
-
-        if int(clang_ver) >= 15:
-            self.patch_strict_prototypes()
-
-        # apply .patch files
-        fo.ucopy(
-            dcfg.root / "zkb" / "modifications" / self._ucodename / self.lkv_src,
-            self.rmanager.paths[self.codename],
-            ("kernelsu-compat.patch", "qcacld_pa.patch")
+        # apply .patch files, all at once
+        mods = dcfg.root / "zkb" / "modifications" / self._ucodename / self.lkv_src
+        exceptions = ("kernelsu-compat.patch", "qcacld_pa.patch")
+        self._apply_patches(
+            sorted(pf for pf in mods.glob("*.patch") if pf.name not in exceptions),
+            self.rmanager.paths[self.codename]
         )
-        os.chdir(self.rmanager.paths[self.codename])
-
-        for pf in Path.cwd().glob("*.patch"):
-            fo.apply_patch(pf)
 
         # add support for CONFIG_MAC80211 kernel option
-        data = ""
         files = ("tx.c", "mlme.c")
 
         os.chdir(self.rmanager.paths[self.codename])
@@ -512,10 +493,8 @@ class KernelBuilder(BaseModel, IKernelBuilder):
         for fn in files:
             f_path = self.rmanager.paths[self.codename] / "net" / "mac80211" / fn
             if f_path.is_file():
-                with open(f_path, "r", encoding="utf-8") as f:
-                    data = f.read().replace("case IEEE80211_BAND_60GHZ:", "case NL80211_BAND_60GHZ:")
-                with open(f_path, "w", encoding="utf-8") as f:
-                    f.write(data)
+                self.jmanager.record(f_path)
+                fo.mutate(f_path, lambda text: text.replace("case IEEE80211_BAND_60GHZ:", "case NL80211_BAND_60GHZ:"))
             else:
                 log.warning(f"Modification of {str(f_path)} is skipped")
 
@@ -532,21 +511,29 @@ class KernelBuilder(BaseModel, IKernelBuilder):
         self.patch_kernel()
 
         # optionally include KernelSU support
-        if self.ksu:
+        if self.ksu or self.variants:
             self.patch_ksu()
 
+        # -Wstrict-prototypes patch to build with Clang 15+, after all .patch files which expect original sources
+        clang_cmd = f'{self.rmanager.paths["clang"] / "bin" / "clang"} --version'
+        clang_ver = str(ccmd.launch(clang_cmd, get_output=True)).split("clang version ")[1].split(".")[0]
+
+        if int(clang_ver) >= 15:
+            self.patch_strict_prototypes()
+
         # NOTE: Disabled in favour of new drivers from rtw88
         #self.patch_rtl8812au()
 
         if self.defconfig:
             log.warning("Custom defconfig provided, copying..")
-            fo.ucopy(
-                self.defconfig,
+            self.jmanager.record(self.rmanager.paths[self.codename] / "arch" / "arm64" / "configs" / self._defconfig)
+            fo.write_if_changed(
                 self.rmanager.paths[self.codename] /\
                 "arch" /\
                 "arm64" /\
                 "configs" /\
-                self._defconfig
+                self._defconfig,
+                self.defconfig.read_bytes()
             )
         else:
             self.update_defconfig()
@@ -560,33 +547,41 @@ class KernelBuilder(BaseModel, IKernelBuilder):
         os.chdir(self.rmanager.paths[self.codename])
 
         # launch "make"
-        punits = ccmd.launch("nproc --all", get_output=True)
-        cmd1 = "make -j{} O=out {} "\
-               "ARCH=arm64 "\
-               "SUBARCH=arm64 "\
-               "LLVM=1 "\
-               "LLVM_IAS=1"\
-                .format(punits, self._defconfig)
-        cmd2 = "make -j{} O=out "\
-               "ARCH=arm64 "\
-               "SUBARCH=arm64 "\
-               "CROSS_COMPILE=llvm- "\
-               "CROSS_COMPILE_ARM32=arm-linux-androideabi- "\
-               "CLANG_TRIPLE=aarch64-linux-gnu- "\
-               "LLVM=1 "\
-               "LLVM_IAS=1 "\
-               "CXX=clang++ "\
-               "AS=llvm-as"\
-                .format(punits)
+        punits = str(os.getenv("ZKB_BUILD_JOBS") or ccmd.launch("nproc --all", get_output=True))
+        args1 = "ARCH=arm64 "\
+                "SUBARCH=arm64 "\
+                "LLVM=1 "\
+                "LLVM_IAS=1"
+        args2 = "ARCH=arm64 "\
+                "SUBARCH=arm64 "\
+                "CROSS_COMPILE=llvm- "\
+                "CROSS_COMPILE_ARM32=arm-linux-androideabi- "\
+                "CLANG_TRIPLE=aarch64-linux-gnu- "\
+                "LLVM=1 "\
+                "LLVM_IAS=1 "\
+                "CXX=clang++ "\
+                "AS=llvm-as"
 
         # for PA's 4.14, extend the "make" command with additional variables
         if (self.base, self.lkv_src) == ("pa", "4.14"):
-            cmd2 = f"{cmd2} LEX=flex YACC=bison"
+            args2 = f"{args2} LEX=flex YACC=bison"
+
+        # route compilation through the compiler cache; CC has to be the same in both
+        # commands, otherwise the configuration is regenerated and nothing is reused
+        ccache = None
+        if self.compiler_cache:
+            ccache = CompilerCacheManager(tool=self.compiler_cache, basedir=self.rmanager.paths[self.codename])
+            ccache.setup()
+            args1 = f'{args1} CC="{ccache.launcher}"'
+            args2 = f'{args2} CC="{ccache.launcher}"'
 
         # launch and time the build process
         time_start = time.time()
-        ccmd.launch(cmd1)
-        ccmd.launch(cmd2)
+        if self.variants:
+            self._build_variants(punits, args1, args2)
+        else:
+            ccmd.launch(f"make -j{punits} O=out {self._defconfig} {args1}")
+            ccmd.launch(f"make -j{punits} O=out {args2}")
         time_stop = time.time()
         time_elapsed = time_stop - time_start
 
@@ -599,6 +594,37 @@ class KernelBuilder(BaseModel, IKernelBuilder):
 
         log.info("Done! Time spent for the build: %02d:%02d:%02d" % (hours, mins, secs))
 
+        if ccache:
+            hits, misses = ccache.stats()
+            rate = 100 * hits / (hits + misses) if hits + misses else 0
+            log.info(f"Compiler cache ({ccache.tool}): {hits} hits, {misses} misses ({rate:.1f}% hit rate)")
+
+    def _build_variants(self, punits: str, args1: str, args2: str) -> None:
+        """Build all variants concurrently, each in its own output directory.
+
+        :param str punits: Number of parallel jobs.
+        :param str args1: Arguments of "make" for the configuration.
+        :param str args2: Arguments of "make" for the build.
+        :return: None
+        """
+        # configuration of a variant is the same defconfig, with KernelSU switched on or off
+        for variant, ksu in self._variants.items():
+            out = self._out(variant)
+            ccmd.launch(f"make -j{punits} O={out} {self._defconfig} {args1}")
+            fo.append(out / ".config", "\n".join(self._ksu_configs if ksu else ["# CONFIG_KSU is not set"]) + "\n")
+            ccmd.launch(f"make -j{punits} O={out} olddefconfig {args1}")
+
+        # sub-makes of a wrapper makefile share its jobserver, so the variants
+        # are built concurrently without running more jobs than there are CPUs
+        wrapper = self._out() / "variants.mk"
+        kdir = self.rmanager.paths[self.codename]
+        rules = [f".PHONY: all {' '.join(self._variants)}", f"all: {' '.join(self._variants)}"]
+        for variant in self._variants:
+            rules.extend(["", f"{variant}:", f"\t+$(MAKE) -C {kdir} O={self._out(variant)} {args2}"])
+        fo.write_if_changed(wrapper, ("\n".join(rules) + "\n").encode("utf-8"))
+
+        ccmd.launch(f"make -j{punits} -f {wrapper}")
+
     @property
     def lkv_src(self) -> str:
         """Linux kernel version in kernel source.
@@ -629,37 +655,31 @@ class KernelBuilder(BaseModel, IKernelBuilder):
         print("\n", end="")
         log.warning("Forming final ZIP file..")
 
-        fo.ucopy(
-            self.rmanager.paths[self.codename] /\
-            "out" /\
-            "arch" /\
-            "arm64" /\
-            "boot" /\
-            "Image.gz-dtb",
-            self.rmanager.paths["AnyKernel3"] / "Image.gz-dtb"
-        )
-
-        # define kernel versions: Linux and internal
-        verbase = self.lkv_src
-        ver_int = os.getenv("KVERSION")
+        self.jmanager.record(self.rmanager.paths["AnyKernel3"] / "Image.gz-dtb")
 
-        # create the final ZIP file
-        name_suffix = "-ksu" if self.ksu else ""
-        name_full = f'{os.getenv("KNAME", "zero")}-{ver_int}-{self._ucodename}-{self.base}-{verbase}{name_suffix}'
-        kdir = dcfg.root / dcfg.kernel
+        # the same AnyKernel3 sources are packed with the kernel image of each variant
+        for variant, ksu in self._variants.items():
+            fo.ucopy(self._image(variant), self.rmanager.paths["AnyKernel3"] / "Image.gz-dtb")
 
-        if not kdir.is_dir():
-            os.makedirs(kdir)
+            # create the final ZIP file
+            if not self._zip(ksu).parent.is_dir():
+                os.makedirs(self._zip(ksu).parent)
 
-        os.chdir(self.rmanager.paths["AnyKernel3"])
+            os.chdir(self.rmanager.paths["AnyKernel3"])
 
-        # this is not the best solution, but is the easiest
-        cmd = f"zip -r9 {kdir / name_full}.zip . -x *.git* *README* *LICENSE* *placeholder"
-        ccmd.launch(cmd)
-        os.chdir(dcfg.root)
+            # this is not the best solution, but is the easiest
+            cmd = f"zip -r9 {self._zip(ksu)} . -x *.git* *README* *LICENSE* *placeholder"
+            ccmd.launch(cmd)
+            os.chdir(dcfg.root)
 
         log.info("Done!")
 
+    def packaged_zip(self) -> Optional[Path]:
+        # exact name, so that a ZIP file left by a build with other versions is never picked up
+        kzip = self._zip(bool(self.ksu))
+
+        return kzip if kzip.is_file() else None
+
     def run(self) -> None:
         os.chdir(dcfg.root)
         banner.print_banner("zero kernel builder")
@@ -669,7 +689,28 @@ class KernelBuilder(BaseModel, IKernelBuilder):
         self.rmanager.generate_paths()
         self.rmanager.download()
         self.rmanager.export_path()
-        self.clean_build()
+        self.jmanager.repos = [
+            self.rmanager.paths[self.codename],
+            self.rmanager.paths["AnyKernel3"],
+            self.rmanager.paths["KernelSU"],
+        ]
+
+        # unchanged inputs mean that sources are already patched and the build output is up-to-date
+        fingerprint = self._fingerprint if (self.incremental or self.amanager.enabled) and not self.clean_kernel else {}
+        stored = self._stored_fingerprint() if self.incremental and fingerprint else {}
+        reuse = bool(stored) and stored == fingerprint
+
+        # artifacts of a build with the same inputs make patching and building unnecessary
+        inputs = {**fingerprint, "codename": self._ucodename, "base": self.base, "lkv": self.lkv}
+        key = self.amanager.key(inputs)
+        artifacts = self.amanager.lookup(key) if self.amanager.enabled and fingerprint else None
+
+        if not reuse:
+            self.clean_build()
+
+            # objects built by another toolchain cannot be reused
+            if self.incremental and stored.get("toolchain") != fingerprint.get("toolchain"):
+                cm.remove(self.rmanager.paths[self.codename] / "out")
 
         if self.clean_kernel:
             sys.exit(0)
@@ -681,6 +722,33 @@ class KernelBuilder(BaseModel, IKernelBuilder):
             log.error("Linux kernel version in sources is different what was specified in arguments")
             sys.exit(1)
 
-        self.patch_all()
+        if artifacts:
+            log.warning(f"Found build artifacts for the same inputs ({key[:12]}), skipping patching and build..")
+            self.patch_anykernel3()
+            for variant in self._variants:
+                os.makedirs(self._image(variant).parent, exist_ok=True)
+                fo.ucopy(artifacts / self._artifact(variant), self._image(variant))
+            self.create_zip()
+            return
+
+        if reuse:
+            log.warning("Build inputs are unchanged, reusing patched sources and build output..")
+        else:
+            self.patch_all()
+
+            if self.incremental:
+                # reset and re-patched files with unchanged contents do not trigger recompilation
+                restamped = sum(self.jmanager.restamp(repo) for repo in self.jmanager.repos)
+                log.info(f"Kept modification times of {restamped} unchanged patched files")
+
+                os.makedirs(self._fingerprint_file.parent, exist_ok=True)
+                with open(self._fingerprint_file, "w", encoding="utf-8") as f:
+                    json.dump(fingerprint, f, indent=4)
+
         self.build()
         self.create_zip()
+
+        if self.amanager.enabled:
+            files = {self._artifact(variant): self._image(variant) for variant in self._variants}
+            files.update({self._zip(ksu).name: self._zip(ksu) for ksu in self._variants.values()})
+            self.amanager.store(key, files, inputs)
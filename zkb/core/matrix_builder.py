@@ -0,0 +1,444 @@
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import logging
+import itertools
+import contextlib
+from pathlib import Path
+from typing import Any, Literal, Optional
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from pydantic import BaseModel, ValidationError
+
+from zkb.tools import cleaning as cm, commands as ccmd
+from zkb.configs import ArgumentConfig, DirectoryConfig as dcfg
+from zkb.engines import GenericContainerEngine
+from zkb.interfaces import IMatrixBuilder
+from .kernel_builder import KernelBuilder
+
+
+log = logging.getLogger("ZeroKernelLogger")
+
+# estimated peak RAM and disk usage of a single job, in GiB
+_REQUIREMENTS = {
+    "kernel": (4.0, 8.0),
+    "assets": (1.0, 6.0),
+    "bundle": (4.0, 14.0),
+}
+
+# log records that tell how a job made use of the caches
+_MARKERS = {
+    "artifacts": re.compile(r"Found build artifacts for the same inputs"),
+    "incremental": re.compile(r"Build inputs are unchanged"),
+    "compiler": re.compile(r"Compiler cache \(\w+\): (\d+) hits, (\d+) misses"),
+    "downloads": re.compile(r"in download cache|Using cached file for"),
+}
+
+
+class MatrixBuilder(BaseModel, IMatrixBuilder):
+    """Orchestrator of a build matrix.
+
+    Jobs of the matrix are deduplicated and launched concurrently,
+    each with its own output directory and log file. Jobs that would
+    compile the same kernel wait for the first one of them, so that the
+    rest reuse its artifacts.
+
+    :param Path matrix: Path to the build matrix file.
+    :param Literal["docker","podman","local"] benv: Build environment.
+    :param int jobs: Maximum number of jobs running at the same time.
+    :param Optional[float]=None memory: RAM available to the jobs, in GiB.
+    :param Optional[float]=None disk: Disk space available to the jobs, in GiB.
+    :param Path output: Path to the directory with collected artifacts, job logs and the summary.
+    :param bool clean_image: Flag to clean a Docker/Podman image from local cache.
+    """
+
+    matrix: Path
+    benv: Literal["docker", "podman", "local"]
+    jobs: int = max((os.cpu_count() or 1) // 4, 1)
+    memory: Optional[float] = None
+    disk: Optional[float] = None
+    output: Path = dcfg.root / "multi-build"
+    clean_image: bool = False
+
+    @property
+    def _memory(self) -> float:
+        """Determine RAM available to the jobs.
+
+        :return: Amount of RAM in GiB.
+        :rtype: float
+        """
+        if self.memory is not None:
+            return self.memory
+
+        with contextlib.suppress(OSError):
+            with open("/proc/meminfo", encoding="utf-8") as f:
+                for line in f:
+                    if line.startswith("MemAvailable:"):
+                        return int(line.split()[1]) / 1024 ** 2
+        return float("inf")
+
+    @property
+    def _disk(self) -> float:
+        """Determine disk space available to the jobs.
+
+        :return: Amount of disk space in GiB.
+        :rtype: float
+        """
+        if self.disk is not None:
+            return self.disk
+
+        return shutil.disk_usage(dcfg.root).free / 1024 ** 3
+
+    @property
+    def _limit(self) -> int:
+        """Determine the number of jobs running at the same time.
+
+        :return: Number of jobs.
+        :rtype: int
+        """
+        # local jobs share the kernel, assets and bundle directories of the root
+        if self.benv == "local" and self.jobs > 1:
+            log.warning("Local jobs share the root directory, running them one at a time..")
+            return 1
+
+        return max(self.jobs, 1)
+
+    @staticmethod
+    def _name(index: int, job: ArgumentConfig) -> str:
+        """Form a unique name of the job.
+
+        :param int index: Index of the job in the plan.
+        :param ArgumentConfig job: Job configuration.
+        :return: Name of the job.
+        :rtype: str
+        """
+        parts = [f"{index + 1:02d}", job.command, job.base, "+".join(job.codename)]
+        if job.command != "assets":
+            parts.append(str(job.lkv))
+        if job.package_type:
+            parts.append(job.package_type)
+        if job.variants:
+            parts.append("variants")
+        elif job.ksu:
+            parts.append("ksu")
+
+        return "-".join(parts)
+
+    @staticmethod
+    def _kernels(job: ArgumentConfig) -> set[tuple]:
+        """Define the kernels compiled by the job.
+
+        Kernel of a device family is the same for each of its devices,
+        and reused from the artifact store once it is built.
+
+        :param ArgumentConfig job: Job configuration.
+        :return: Keys of the kernels.
+        :rtype: set[tuple]
+        """
+        if job.command == "assets" or job.package_type == "conan":
+            return set()
+
+        ksu = "variants" if job.variants else str(job.ksu)
+        return {(KernelBuilder.family(c), job.base, job.lkv, ksu, str(job.defconfig)) for c in job.codename}
+
+    @staticmethod
+    def _requirements(job: ArgumentConfig) -> tuple[float, float]:
+        """Estimate RAM and disk space used by the job.
+
+        :param ArgumentConfig job: Job configuration.
+        :return: Amounts of RAM and disk space in GiB.
+        :rtype: tuple[float, float]
+        """
+        memory, disk = _REQUIREMENTS[job.command]
+        # both variants are compiled at once, in separate build outputs
+        if job.variants:
+            memory, disk = memory + 2, disk + 4
+
+        return memory, disk
+
+    def read(self) -> list[ArgumentConfig]:
+        with open(self.matrix, encoding="utf-8") as f:
+            entries = json.load(f)["jobs"]
+
+        jobs = []
+        for number, entry in enumerate(entries, 1):
+            # lists of values multiply the entry, except for the codenames built together
+            axes: dict[str, list[Any]] = {
+                k: v if isinstance(v, list) and k != "codename" else [v] for k, v in entry.items()
+            }
+            for values in itertools.product(*axes.values()):
+                job: dict[str, Any] = dict(zip(axes, values))
+                if isinstance(job.get("codename"), str):
+                    job["codename"] = [job["codename"]]
+                if job.get("defconfig") and not Path(job["defconfig"]).is_absolute():
+                    job["defconfig"] = self.matrix.absolute().parent / job["defconfig"]
+
+                try:
+                    acfg = ArgumentConfig.model_validate({"benv": self.benv, **job})
+                except ValidationError as e:
+                    log.error(f"Invalid job #{number} in the build matrix: {e}")
+                    sys.exit(1)
+                acfg.check_settings()
+                jobs.append(acfg)
+
+        return jobs
+
+    def plan(self, jobs: list[ArgumentConfig]) -> list[tuple[ArgumentConfig, set[int]]]:
+        # drop the exact duplicates
+        unique: dict[str, ArgumentConfig] = {}
+        for job in jobs:
+            unique.setdefault(job.model_dump_json(), job)
+
+        # KernelSU and non-KernelSU kernels are built concurrently from one patched tree
+        merged: dict[str, ArgumentConfig] = {}
+        for job in unique.values():
+            if job.command != "kernel" or job.variants:
+                merged[job.model_dump_json()] = job
+                continue
+
+            key = job.model_dump_json(exclude={"ksu"})
+            pair = merged.get(key)
+            if pair and pair.ksu != job.ksu:
+                merged[key] = pair.model_copy(update={"ksu": False, "variants": True})
+            else:
+                merged.setdefault(key, job)
+
+        # devices of the same family share a kernel, which is built once per family
+        families: dict[str, ArgumentConfig] = {}
+        for job in merged.values():
+            codenames = {KernelBuilder.family(c) for c in job.codename}
+            if job.command != "kernel" or len(codenames) != 1:
+                families[job.model_dump_json()] = job
+                continue
+
+            key = f"{codenames.pop()}:{job.model_dump_json(exclude={'codename'})}"
+            if key in families:
+                codename = families[key].codename + [c for c in job.codename if c not in families[key].codename]
+                families[key] = families[key].model_copy(update={"codename": codename})
+            else:
+                families[key] = job
+
+        # jobs compiling an already planned kernel wait for it
+        plan: list[tuple[ArgumentConfig, set[int]]] = []
+        producers: dict[tuple, int] = {}
+        for index, job in enumerate(families.values()):
+            kernels = self._kernels(job)
+            plan.append((job, {producers[k] for k in kernels if k in producers}))
+            for k in kernels:
+                producers.setdefault(k, index)
+
+        return plan
+
+    def _command(self, job: ArgumentConfig, output: Path) -> str:
+        """Form the command of the job.
+
+        :param ArgumentConfig job: Job configuration.
+        :param Path output: Path to the output directory of the job.
+        :return: Command to launch.
+        :rtype: str
+        """
+        if self.benv != "local":
+            engine = GenericContainerEngine(**json.loads(job.model_dump_json()), output=output)
+            engine.create_dirs()
+            return engine.get_container_cmd
+
+        cmd = f"cd {dcfg.root} && {sys.executable} -m zkb.utils.bridge"
+        arguments = {
+            "--command": job.command,
+            "--codename": job.codename,
+            "--base": job.base,
+            "--lkv": job.lkv,
+            "--chroot": job.chroot,
+            "--package-type": job.package_type,
+            "--rom-only": job.rom_only,
+            "--ksu": job.ksu,
+            "--clean-kernel": job.clean_kernel,
+            "--clean-assets": job.clean_assets,
+            "--defconfig": job.defconfig,
+            "--compiler-cache": job.compiler_cache,
+            "--incremental": job.incremental,
+            "--variants": job.variants,
+        }
+        for arg, value in arguments.items():
+            if isinstance(value, list):
+                cmd += f" {arg} {' '.join(value)}"
+            elif value not in (None, False, True):
+                cmd += f" {arg}={value}"
+            elif value:
+                cmd += f" {arg}"
+
+        return cmd
+
+    def _collect(self, job: ArgumentConfig, name: str, output: Path) -> list[Path]:
+        """Collect artifacts of the finished job into a directory named after the job.
+
+        Jobs may produce files with the same names (e.g., assets), so that
+        each of them gets its own directory.
+
+        :param ArgumentConfig job: Job configuration.
+        :param str name: Name of the job.
+        :param Path output: Path to the output directory of the job.
+        :return: Paths to the artifacts.
+        :rtype: list[Path]
+        """
+        # local jobs leave their artifacts in the root directory
+        src = output
+        if self.benv == "local":
+            src = {"kernel": dcfg.kernel, "assets": dcfg.assets, "bundle": dcfg.bundle}[job.command]
+
+        artifacts = []
+        if src.is_dir():
+            for e in sorted(src.iterdir()):
+                os.makedirs(self.output / name, exist_ok=True)
+                shutil.move(e, self.output / name / e.name)
+                artifacts.append(self.output / name / e.name)
+        cm.remove(output)
+
+        return artifacts
+
+    @staticmethod
+    def _cache_usage(logfile: Path) -> dict[str, str]:
+        """Summarize the cache usage from the log of the job.
+
+        :param Path logfile: Path to the log file.
+        :return: Cache usage by the cache type.
+        :rtype: dict[str, str]
+        """
+        text = logfile.read_text(encoding="utf-8", errors="replace") if logfile.is_file() else ""
+
+        usage = {}
+        if _MARKERS["artifacts"].search(text):
+            usage["artifacts"] = "hit"
+        elif _MARKERS["incremental"].search(text):
+            usage["artifacts"] = "incremental"
+        compiler = _MARKERS["compiler"].findall(text)
+        if compiler:
+            hits, misses = (sum(int(c[i]) for c in compiler) for i in (0, 1))
+            usage["compiler"] = f"{hits}/{hits + misses}"
+        downloads = len(_MARKERS["downloads"].findall(text))
+        if downloads:
+            usage["downloads"] = str(downloads)
+
+        return usage
+
+    def _execute(self, job: ArgumentConfig, name: str) -> dict:
+        """Run a single job of the matrix.
+
+        :param ArgumentConfig job: Job configuration.
+        :param str name: Name of the job.
+        :return: Result of the job.
+        :rtype: dict
+        """
+        output = self.output / "jobs" / name
+        logfile = self.output / "logs" / f"{name}.log"
+        log.warning(f"Starting job {name}..")
+
+        # a failure of a job, whatever it is, must not stop the rest of the matrix
+        start = time.time()
+        try:
+            ccmd.launch(f"({self._command(job, output)}) > {logfile} 2>&1")
+            status = "done"
+        except SystemExit:
+            status = "failed"
+        except Exception as e:
+            log.error(f"Job {name} could not be launched: {e}")
+            status = "failed"
+        duration = time.time() - start
+
+        artifacts = []
+        try:
+            artifacts = self._collect(job, name, output)
+        except Exception as e:
+            log.error(f"Could not collect artifacts of job {name}: {e}")
+            status = "failed"
+
+        if status == "done":
+            log.info(f"Job {name} is done, collected {len(artifacts)} artifacts")
+        else:
+            log.error(f"Job {name} has failed, see {logfile}")
+
+        return {
+            "job": name,
+            "status": status,
+            "duration": round(duration, 1),
+            "cache": self._cache_usage(logfile),
+            "artifacts": [str(p.relative_to(self.output)) for p in artifacts],
+        }
+
+    def _summary(self, results: list[dict]) -> None:
+        """Print out and save the summary of the matrix build.
+
+        :param list[dict] results: Results of the jobs.
+        :return: None
+        """
+        with open(self.output / "summary.json", "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+        width = max(len(r["job"]) for r in results)
+        print(f"\n{'JOB':<{width}}  {'STATUS':<7} {'TIME':>8}  CACHE")
+        for r in results:
+            mins, secs = divmod(int(r["duration"]), 60)
+            hours, mins = divmod(mins, 60)
+            cache = ", ".join(f"{k}: {v}" for k, v in r["cache"].items()) or "-"
+            print(f"{r['job']:<{width}}  {r['status']:<7} {hours:02d}:{mins:02d}:{secs:02d}  {cache}")
+        print("\n", end="")
+
+    def run(self) -> None:
+        plan = self.plan(self.read())
+        if not plan:
+            log.error("Build matrix has no jobs.")
+            sys.exit(1)
+
+        names = [self._name(i, job) for i, (job, _) in enumerate(plan)]
+        log.warning(f"Build matrix is reduced to {len(plan)} jobs")
+
+        cm.remove(self.output)
+        os.makedirs(self.output / "logs")
+
+        # split the CPU between concurrent jobs, unless set explicitly
+        limit = self._limit
+        os.environ.setdefault("ZKB_BUILD_JOBS", str(max((os.cpu_count() or 1) // limit, 1)))
+        memory, disk = self._memory, self._disk
+
+        # container image is built once for all of the jobs
+        engine = contextlib.nullcontext() if self.benv == "local" else GenericContainerEngine(
+            **{
+                **json.loads(plan[0][0].model_dump_json()),
+                "clean_image": self.clean_image,
+                "output": self.output / "jobs" / names[0],
+            }
+        )
+
+        results: dict[int, dict] = {}
+        with engine, ThreadPoolExecutor(max_workers=limit) as pool:
+            pending = list(range(len(plan)))
+            running: dict[Future, int] = {}
+
+            while pending or running:
+                for i in list(pending):
+                    job, deps = plan[i]
+                    if not deps.issubset(results):
+                        continue
+
+                    # a job is always admitted into an idle pool, even if it does not fit the limits
+                    need = self._requirements(job)
+                    used = [sum(self._requirements(plan[r][0])[n] for r in running.values()) for n in (0, 1)]
+                    if running and (
+                        len(running) >= limit or used[0] + need[0] > memory or used[1] + need[1] > disk
+                    ):
+                        continue
+
+                    pending.remove(i)
+                    running[pool.submit(self._execute, job, names[i])] = i
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[running.pop(future)] = future.result()
+
+        cm.remove(self.output / "jobs")
+
+        self._summary([results[i] for i in range(len(plan))])
+        if any(r["status"] != "done" for r in results.values()):
+            sys.exit(1)
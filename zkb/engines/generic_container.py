@@ -1,5 +1,6 @@
 import os
 import sys
+import shlex
 import shutil
 import logging
 from pathlib import Path
@@ -26,7 +27,7 @@ class GenericContainerEngine(BaseModel, IGenericContainerEngine):
 
     :param Literal["docker","podman"] benv: Build environment.
     :param Literal["kernel","assets","bundle"] command: Builder command to be launched.
-    :param str codename: Device codename.
+    :param list[str] codename: Device codenames.
     :param str base: Kernel source base.
     :param str lkv: Linux kernel version.
     :param Optional[Literal["full","minimal"]]=None chroot: Chroot type.
@@ -38,6 +39,10 @@ class GenericContainerEngine(BaseModel, IGenericContainerEngine):
     :param Optional[bool]=False conan_upload: Flag to enable Conan upload.
     :param Optional[bool]=False ksu: Flag to add KernelSU support into the kernel.
     :param Optional[Path]=None defconfig: Path to custom defconfig.
+    :param Optional[Literal["ccache","sccache"]]=None compiler_cache: Compiler cache to be used in the build.
+    :param Optional[bool]=False incremental: Flag to keep build output between the builds.
+    :param Optional[bool]=False variants: Flag to build both KernelSU and non-KernelSU variants.
+    :param Optional[Path]=None output: Host directory for the results, instead of the default one of the command.
     """
 
     _name_image: str = "zero-kernel-image"
@@ -47,7 +52,7 @@ class GenericContainerEngine(BaseModel, IGenericContainerEngine):
 
     benv: Literal["docker", "podman"]
     command: Literal["kernel", "assets", "bundle"]
-    codename: str
+    codename: list[str]
     base: str
     lkv: Optional[str] = None
     chroot: Optional[Literal["full", "minimal"]] = None
@@ -59,6 +64,10 @@ class GenericContainerEngine(BaseModel, IGenericContainerEngine):
     conan_upload: Optional[bool] = False
     ksu: Optional[bool] = False
     defconfig: Optional[Path] = None
+    compiler_cache: Optional[Literal["ccache", "sccache"]] = None
+    incremental: Optional[bool] = False
+    variants: Optional[bool] = False
+    output: Optional[Path] = None
 
     @staticmethod
     def _force_buildkit() -> None:
@@ -78,6 +87,24 @@ class GenericContainerEngine(BaseModel, IGenericContainerEngine):
 
         return True if self._name_image in img_cache else False
 
+    @property
+    def _output(self) -> Path:
+        """Determine host directory for the results of the command.
+
+        :return: Path to the directory.
+        :rtype: Path
+        """
+        if self.output:
+            return self.output
+
+        match self.command:
+            case "kernel":
+                return dcfg.kernel
+            case "assets":
+                return dcfg.assets
+            case _:
+                return dcfg.bundle
+
     @property
     def builder_cmd(self) -> str:
         # prepare launch command
@@ -94,12 +121,18 @@ class GenericContainerEngine(BaseModel, IGenericContainerEngine):
             "--clean-kernel": self.clean_kernel,
             "--clean-assets": self.clean_assets,
             "--defconfig": self.defconfig,
+            "--compiler-cache": self.compiler_cache,
+            "--incremental": self.incremental,
+            "--variants": self.variants,
         }
 
         # extend the command with given arguments
         for arg, value in arguments.items():
+            # arguments that have multiple values
+            if isinstance(value, list):
+                cmd += f" {arg} {' '.join(value)}"
             # arguments that have a string value
-            if value not in (None, False, True):
+            elif value not in (None, False, True):
                 cmd += f" {arg}={value}"
             # arguments that act like boolean switches
             elif value:
@@ -125,19 +158,42 @@ class GenericContainerEngine(BaseModel, IGenericContainerEngine):
             "-w {}".format(self._wdir_container),
         ]
 
+        # pass builder's tuning variables (ZKB_*) from host into the container, quoted for the shell
+        options.extend(f"-e {shlex.quote(f'{k}={v}')}" for k, v in os.environ.items() if k.startswith("ZKB_"))
+        # API tokens are passed by name only, so that their values do not appear in the command line
+        options.extend(f"-e {k}" for k in ("GITHUB_TOKEN", "GITHUB_TOKENS") if k in os.environ)
+
+        # share host's persistent cache with the container, under the very same path
+        options.extend([
+            "-e ZKB_CACHE_DIR={}".format(dcfg.cache),
+            "-v {0}:{0}".format(dcfg.cache),
+        ])
+
+        # compiler cache can be kept outside of the common cache, also under the very same path
+        if os.getenv("ZKB_CCACHE_DIR"):
+            os.makedirs(os.environ["ZKB_CCACHE_DIR"], exist_ok=True)
+            options.append("-v {0}:{0}".format(os.environ["ZKB_CCACHE_DIR"]))
+
+        # a directory used as the remote artifact store, the same way
+        remote = os.getenv("ZKB_ARTIFACT_REMOTE", "")
+        if remote and not remote.startswith(("http://", "https://")):
+            remote = remote.removeprefix("file://")
+            os.makedirs(remote, exist_ok=True)
+            options.append("-v {0}:{0}".format(remote))
+
         # define volume mounting template
         v_template = "-v {}:{}/{}"
 
         # mount directories
         match self.command:
             case "kernel":
-                options.append(v_template.format(dcfg.kernel, self._wdir_container, dcfg.kernel.name))
+                options.append(v_template.format(self._output, self._wdir_container, dcfg.kernel.name))
             case "assets":
-                options.append(v_template.format(dcfg.assets, self._wdir_container, dcfg.assets.name))
+                options.append(v_template.format(self._output, self._wdir_container, dcfg.assets.name))
             case "bundle":
                 match self.package_type:
                     case "slim" | "full":
-                        options.append(v_template.format(dcfg.bundle, self._wdir_container, dcfg.bundle.name))
+                        options.append(v_template.format(self._output, self._wdir_container, dcfg.bundle.name))
                     case "conan":
                         if self.conan_upload:
                             options.append("-e CONAN_UPLOAD_CUSTOM=1")
@@ -151,18 +207,17 @@ class GenericContainerEngine(BaseModel, IGenericContainerEngine):
         return options
 
     def create_dirs(self) -> None:
+        os.makedirs(dcfg.cache, exist_ok=True)
+
         match self.command:
-            case "kernel":
-                if not dcfg.kernel.is_dir():
-                    os.makedirs(dcfg.kernel)
-            case "assets":
-                if not dcfg.assets.is_dir():
-                    os.makedirs(dcfg.assets)
+            case "kernel" | "assets":
+                if not self._output.is_dir():
+                    os.makedirs(self._output)
             case "bundle":
                 if self.package_type in ("slim", "full"):
                     # mount directory with release artifacts
-                    shutil.rmtree(dcfg.bundle, ignore_errors=True)
-                    os.makedirs(dcfg.bundle)
+                    shutil.rmtree(self._output, ignore_errors=True)
+                    os.makedirs(self._output)
 
     def build_image(self) -> str | None | CompletedProcess:
         print("\n")
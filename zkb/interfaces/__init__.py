@@ -1,5 +1,12 @@
 from .clients import IRomApiClient
-from .modules import IKernelBuilder, IAssetsCollector
+from .modules import IKernelBuilder, IAssetsCollector, IMatrixBuilder
 from .engines import IGenericContainerEngine
 from .commands import ICommand
-from .managers import IResourceManager
+from .managers import (
+    IResourceManager,
+    ICacheManager,
+    IMirrorManager,
+    ICompilerCacheManager,
+    IJournalManager,
+    IArtifactManager,
+)
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from pathlib import Path
 
 
 class IRomApiClient(ABC):
@@ -13,6 +14,15 @@ class IRomApiClient(ABC):
         """
         raise NotImplementedError()
 
+    @abstractmethod
+    def latest(self) -> dict:
+        """Get metadata of the latest ROM build, via a cached API response.
+
+        :return: ROM build metadata (URL, id, datetime and other fields provided by the API).
+        :rtype: dict
+        """
+        raise NotImplementedError()
+
     @abstractmethod
     def run(self) -> str:
         """Execute the API interaction logic.
@@ -21,3 +31,15 @@ class IRomApiClient(ABC):
         :rtype: str
         """
         raise NotImplementedError()
+
+    @abstractmethod
+    def sync(self) -> Path:
+        """Synchronize the latest ROM build into the local ROM store.
+
+        The download is skipped if build's id, datetime and checksum match the stored build.
+        Only a limited number of the most recent builds is kept.
+
+        :return: Path to the ROM build.
+        :rtype: Path
+        """
+        raise NotImplementedError()
@@ -1,3 +1,6 @@
+from pathlib import Path
+from typing import Optional, BinaryIO
+from contextlib import AbstractContextManager
 from abc import ABC, abstractmethod
 
 
@@ -35,3 +38,238 @@ class IResourceManager(ABC):
         :return: None
         """
         raise NotImplementedError()
+
+
+class ICacheManager(ABC):
+    """Interface for the download cache manager."""
+
+    @abstractmethod
+    def key(self, url: str, sha256: Optional[str] = None) -> str:
+        """Form the cache key for a download.
+
+        :param str url: URL to the file.
+        :param Optional[str]=None sha256: Expected SHA-256 checksum of the file.
+        :return: Cache key.
+        :rtype: str
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def lock(self, url: str, sha256: Optional[str] = None) -> AbstractContextManager[None]:
+        """Lock a cache entry, so that only one of concurrent builds downloads the file.
+
+        :param str url: URL to the file.
+        :param Optional[str]=None sha256: Expected SHA-256 checksum of the file.
+        :return: Context manager holding the lock.
+        :rtype: AbstractContextManager[None]
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def lookup(self, url: str, sha256: Optional[str] = None) -> Optional[Path]:
+        """Find a file in the cache.
+
+        :param str url: URL to the file.
+        :param Optional[str]=None sha256: Expected SHA-256 checksum of the file.
+        :return: Path to the cached file if present.
+        :rtype: Optional[Path]
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def fetch(self, url: str, sha256: Optional[str] = None, revalidate: bool = False) -> Path:
+        """Get a file from the cache, downloading it on a miss.
+
+        :param str url: URL to the file.
+        :param Optional[str]=None sha256: Expected SHA-256 checksum of the file.
+        :param bool=False revalidate: Flag indicating that a cached file has to be checked for upstream changes.
+        :return: Path to the cached file.
+        :rtype: Path
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def writer(self, url: str, sha256: Optional[str] = None) -> AbstractContextManager[BinaryIO]:
+        """Open a file to be filled with downloaded data and committed into the cache on exit.
+
+        :param str url: URL to the file.
+        :param Optional[str]=None sha256: Expected SHA-256 checksum of the file.
+        :return: Context manager with a writable file object.
+        :rtype: AbstractContextManager[BinaryIO]
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def evict(self) -> None:
+        """Evict least recently used files until the cache fits its size budget.
+
+        :return: None
+        """
+        raise NotImplementedError()
+
+
+class IMirrorManager(ABC):
+    """Interface for the git mirror manager."""
+
+    @abstractmethod
+    def path(self, url: str) -> Path:
+        """Determine path to the local mirror of a repository.
+
+        :param str url: URL to the repository.
+        :return: Path to the bare mirror repository.
+        :rtype: Path
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def update(self, url: str, branch: str) -> Path:
+        """Fetch the branch of a repository into the local mirror.
+
+        :param str url: URL to the repository.
+        :param str branch: Branch (or tag) to fetch.
+        :return: Path to the bare mirror repository.
+        :rtype: Path
+        """
+        raise NotImplementedError()
+
+
+class ICompilerCacheManager(ABC):
+    """Interface for the compiler cache manager."""
+
+    @property
+    @abstractmethod
+    def launcher(self) -> str:
+        """Form the compiler launched through the compiler cache.
+
+        :return: Value for the CC variable of "make".
+        :rtype: str
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def setup(self) -> None:
+        """Configure the compiler cache via environment and start counting statistics of the build.
+
+        :return: None
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def stats(self) -> tuple[int, int]:
+        """Get compiler cache statistics since the setup.
+
+        :return: Number of cache hits and misses.
+        :rtype: tuple[int, int]
+        """
+        raise NotImplementedError()
+
+
+class IJournalManager(ABC):
+    """Interface for the journal manager."""
+
+    @staticmethod
+    @abstractmethod
+    def journal(repo: Path) -> Path:
+        """Determine path to the journal of a repository.
+
+        :param Path repo: Path to the repository.
+        :return: Path to the journal file.
+        :rtype: Path
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def paths(self, repo: Path) -> list[str]:
+        """List paths recorded in the journal of a repository.
+
+        :param Path repo: Path to the repository.
+        :return: Paths relative to the repository.
+        :rtype: list[str]
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def record(self, *paths: Path | str) -> None:
+        """Record paths in the journals of their repositories, before they are modified.
+
+        :param Path|str paths: Paths to be modified.
+        :return: None
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def record_patch(self, patch: Path | str, root: Path) -> None:
+        """Record a .patch file and all of the files it modifies.
+
+        :param Path|str patch: Path to the .patch file.
+        :param Path root: Path to the directory the patch is applied in.
+        :return: None
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def reset(self, repo: Path, keep: tuple[str, ...] = ()) -> None:
+        """Restore journaled paths of a repository, or the whole tree if there is no journal.
+
+        :param Path repo: Path to the repository.
+        :param tuple[str,...]=() keep: Untracked paths to be kept by a full reset.
+        :return: None
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def restamp(self, repo: Path) -> int:
+        """Give modification times from before the reset back to files patched into the same contents.
+
+        :param Path repo: Path to the repository.
+        :return: Number of files with restored modification times.
+        :rtype: int
+        """
+        raise NotImplementedError()
+
+
+class IArtifactManager(ABC):
+    """Interface for the artifact manager."""
+
+    @staticmethod
+    @abstractmethod
+    def key(inputs: dict[str, str]) -> str:
+        """Form the key of build artifacts from the build inputs.
+
+        :param dict[str,str] inputs: Inputs of the build.
+        :return: Key of the artifacts.
+        :rtype: str
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def lookup(self, key: str) -> Optional[Path]:
+        """Find stored artifacts, locally or in the remote store.
+
+        :param str key: Key of the artifacts.
+        :return: Path to the directory with the artifacts, if they are stored.
+        :rtype: Optional[Path]
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def store(self, key: str, files: dict[str, Path], inputs: dict[str, str]) -> Optional[Path]:
+        """Store artifacts locally and upload them to the remote store.
+
+        Failures are only reported, so that they never fail a finished build.
+
+        :param str key: Key of the artifacts.
+        :param dict[str,Path] files: Names of the artifacts mapped to their paths.
+        :param dict[str,str] inputs: Inputs of the build, saved for reference.
+        :return: Path to the directory with the stored artifacts, if they were stored.
+        :rtype: Optional[Path]
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def evict(self) -> None:
+        """Remove the least recently used artifacts beyond the limit of kept entries.
+
+        :return: None
+        """
+        raise NotImplementedError()
@@ -1,6 +1,9 @@
 from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Optional
 
 from zkb.clients import LineageOsApiClient, ParanoidAndroidApiClient
+from zkb.configs import ArgumentConfig
 
 
 class IKernelBuilder(ABC):
@@ -15,6 +18,17 @@ class IKernelBuilder(ABC):
         """
         raise NotImplementedError()
 
+    @staticmethod
+    @abstractmethod
+    def family(codename: str) -> str:
+        """Define unified codename of the device family, all devices of which share the same kernel.
+
+        :param str codename: Device codename.
+        :return: Unified codename.
+        :rtype: str
+        """
+        raise NotImplementedError()
+
     @abstractmethod
     def clean_build(self) -> None:
         """Clean environment from potential artifacts.
@@ -131,6 +145,15 @@ class IKernelBuilder(ABC):
         """
         raise NotImplementedError()
 
+    @abstractmethod
+    def packaged_zip(self) -> Optional[Path]:
+        """Find the .zip archive packed for the current settings.
+
+        :return: Path to the .zip archive, if the kernel is packed.
+        :rtype: Optional[Path]
+        """
+        raise NotImplementedError()
+
     @abstractmethod
     def run(self) -> None:
          """Execute the kernel builder logic.
@@ -170,3 +193,34 @@ class IAssetsCollector(ABC):
         :return: None
         """
         raise NotImplementedError()
+
+
+class IMatrixBuilder(ABC):
+    """Interface for the build matrix orchestrator."""
+
+    @abstractmethod
+    def read(self) -> list[ArgumentConfig]:
+        """Read the build matrix and expand it into jobs.
+
+        :return: Configurations of the jobs.
+        :rtype: list[ArgumentConfig]
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def plan(self, jobs: list[ArgumentConfig]) -> list[tuple[ArgumentConfig, set[int]]]:
+        """Deduplicate the jobs and define their dependencies.
+
+        :param list[ArgumentConfig] jobs: Configurations of the jobs.
+        :return: Jobs paired with indices of the jobs they wait for.
+        :rtype: list[tuple[ArgumentConfig, set[int]]]
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def run(self) -> None:
+        """Execute matrix builder logic.
+
+        :return: None
+        """
+        raise NotImplementedError()
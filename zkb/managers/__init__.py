@@ -1 +1,6 @@
+from .artifact import ArtifactManager
+from .cache import CacheManager
+from .compiler_cache import CompilerCacheManager
+from .journal import JournalManager
+from .mirror import MirrorManager
 from .resource import ResourceManager
@@ -0,0 +1,207 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse
+from pydantic import BaseModel
+
+from zkb.tools import cleaning as cm, network as net
+from zkb.configs import DirectoryConfig as dcfg
+from zkb.interfaces import IArtifactManager
+
+
+log = logging.getLogger("ZeroKernelLogger")
+
+
+def _tmp(path: Path) -> Path:
+    """Form a unique temporary path next to the given one, so that concurrent writers do not collide.
+
+    :param Path path: Path to be written.
+    :return: Path to the temporary file or directory.
+    :rtype: Path
+    """
+    return path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 ** 2), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class _FileRemote:
+    """Remote artifact store in a directory, e.g. on a network share."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def get(self, name: str, dst: Path) -> bool:
+        if not (self.root / name).is_file():
+            return False
+        shutil.copyfile(self.root / name, dst)
+        return True
+
+    def put(self, src: Path, name: str) -> None:
+        os.makedirs((self.root / name).parent, exist_ok=True)
+        tmp = _tmp(self.root / name)
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, self.root / name)
+
+
+class _HttpRemote:
+    """Remote artifact store on a plain HTTP server, read via GET and written via PUT."""
+
+    def __init__(self, url: str) -> None:
+        self.url = url.rstrip("/")
+
+    def get(self, name: str, dst: Path) -> bool:
+        with net.session().get(f"{self.url}/{name}", stream=True, timeout=60) as r:
+            if r.status_code == 404:
+                return False
+            r.raise_for_status()
+            with open(dst, "wb") as f:
+                for chunk in r.iter_content(chunk_size=1024 ** 2):
+                    f.write(chunk)
+        return True
+
+    def put(self, src: Path, name: str) -> None:
+        with open(src, "rb") as f:
+            net.session().put(f"{self.url}/{name}", data=f, timeout=300).raise_for_status()
+
+
+class ArtifactManager(BaseModel, IArtifactManager):
+    """Store of build artifacts, keyed by the inputs of the build.
+
+    Artifacts are kept locally and, optionally, in a remote store shared
+    between hosts: a directory ("file://" URL or a path) or a plain HTTP
+    server accepting PUT requests.
+
+    :param Path directory: Path to the local artifact store.
+    :param Optional[str] remote: URL of the remote artifact store.
+    :param bool enabled: Flag indicating that artifacts are stored and reused.
+    :param int keep: Number of most recently used entries kept locally.
+    """
+
+    directory: Path = dcfg.cache / "artifacts"
+    remote: Optional[str] = os.getenv("ZKB_ARTIFACT_REMOTE")
+    enabled: bool = os.getenv("ZKB_ARTIFACT_CACHE", "1") == "1"
+    keep: int = int(os.getenv("ZKB_ARTIFACT_KEEP", "20"))
+
+    @property
+    def _remote(self) -> Optional[_FileRemote | _HttpRemote]:
+        """Instantiate the backend of the remote store.
+
+        :return: Remote store backend, if the remote store is configured.
+        :rtype: Optional[_FileRemote | _HttpRemote]
+        """
+        if not self.remote:
+            return None
+
+        url = urlparse(self.remote)
+        if url.scheme in ("http", "https"):
+            return _HttpRemote(self.remote)
+        return _FileRemote(Path(url.path if url.scheme == "file" else self.remote))
+
+    @staticmethod
+    def key(inputs: dict[str, str]) -> str:
+        return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _fetch(self, key: str) -> Optional[Path]:
+        """Download an entry from the remote store into the local one.
+
+        :param str key: Key of the entry.
+        :return: Path to the local entry, if the remote store has it.
+        :rtype: Optional[Path]
+        """
+        remote = self._remote
+        if not remote:
+            return None
+
+        tmp = _tmp(self.directory / key)
+        os.makedirs(tmp)
+
+        try:
+            # the manifest is uploaded last, so an entry with it is complete
+            if not remote.get(f"{key}/manifest.json", tmp / "manifest.json"):
+                return None
+
+            with open(tmp / "manifest.json", encoding="utf-8") as f:
+                files = json.load(f)["files"]
+            for name, sha256 in files.items():
+                if not remote.get(f"{key}/{name}", tmp / name) or _sha256(tmp / name) != sha256:
+                    log.warning(f"Remote artifact {name} is missing or corrupted, ignoring it")
+                    return None
+
+            cm.remove(self.directory / key)
+            os.replace(tmp, self.directory / key)
+            log.info(f"Fetched build artifacts from the remote store: {', '.join(files)}")
+            return self.directory / key
+        except Exception as e:
+            log.warning(f"Could not fetch build artifacts from the remote store: {e}")
+            return None
+        finally:
+            cm.remove(tmp)
+
+    def lookup(self, key: str) -> Optional[Path]:
+        entry = self.directory / key
+        if (entry / "manifest.json").is_file():
+            # mark the entry as recently used
+            os.utime(entry)
+            return entry
+
+        return self._fetch(key)
+
+    def store(self, key: str, files: dict[str, Path], inputs: dict[str, str]) -> Optional[Path]:
+        entry = self.directory / key
+        tmp = _tmp(entry)
+
+        # the build is already done, a failure to store its artifacts must not fail it
+        try:
+            os.makedirs(tmp)
+            for name, fn in files.items():
+                shutil.copyfile(fn, tmp / name)
+            with open(tmp / "manifest.json", "w", encoding="utf-8") as f:
+                json.dump(
+                    {"files": {name: _sha256(tmp / name) for name in files}, "inputs": inputs, "time": time.time()},
+                    f,
+                    indent=4
+                )
+
+            cm.remove(entry)
+            os.replace(tmp, entry)
+            self.evict()
+        except OSError as e:
+            log.warning(f"Could not store build artifacts: {e}")
+            return None
+        finally:
+            cm.remove(tmp)
+
+        remote = self._remote
+        if remote:
+            try:
+                for name in files:
+                    remote.put(entry / name, f"{key}/{name}")
+                remote.put(entry / "manifest.json", f"{key}/manifest.json")
+            except Exception as e:
+                log.warning(f"Could not upload build artifacts to the remote store: {e}")
+
+        return entry
+
+    def evict(self) -> None:
+        if not self.directory.is_dir():
+            return
+
+        entries = sorted(
+            (e for e in self.directory.iterdir() if e.is_dir() and not e.name.startswith(".")),
+            key=lambda e: e.stat().st_mtime,
+            reverse=True
+        )
+        for e in entries[max(self.keep, 1):]:
+            cm.remove(e)
@@ -0,0 +1,298 @@
+import os
+import sys
+import json
+import time
+import fcntl
+import hashlib
+import logging
+import requests
+import threading
+from pathlib import Path
+from typing import Optional, Iterator, BinaryIO
+from contextlib import contextmanager
+from pydantic import BaseModel
+
+from zkb.tools import cleaning as cm, fileoperations as fo, network as net
+from zkb.configs import DirectoryConfig as dcfg
+from zkb.interfaces import ICacheManager
+
+
+log = logging.getLogger("ZeroKernelLogger")
+
+
+class _HashingWriter:
+    """Writable file wrapper, which hashes the data written through it."""
+
+    def __init__(self, f: BinaryIO, digest: "hashlib._Hash") -> None:
+        self._f = f
+        self._digest = digest
+
+    def write(self, data: bytes) -> int:
+        self._digest.update(data)
+        return self._f.write(data)
+
+
+class CacheManager(BaseModel, ICacheManager):
+    """Content-addressed cache for downloaded files.
+
+    Files are stored under their SHA-256 checksum when it is known in advance,
+    otherwise under the hash of their URL. The cache can be shared by any number
+    of roots and containers, access to it's index is guarded by a file lock.
+
+    :param Path directory: Path to the cache directory.
+    :param int budget: Size budget of the cache, in bytes.
+    :param int ttl: Time (in seconds) for which a file without HTTP validators is considered unchanged upstream.
+    """
+
+    directory: Path = dcfg.cache / "downloads"
+    budget: int = int(float(os.getenv("ZKB_CACHE_SIZE", "20")) * 1024 ** 3)
+    ttl: int = int(os.getenv("ZKB_CACHE_TTL", "86400"))
+
+    @property
+    def _objects(self) -> Path:
+        """Directory with cached files.
+
+        :return: Path to directory with cached files.
+        :rtype: Path
+        """
+        return self.directory / "objects"
+
+    @contextmanager
+    def _index(self) -> Iterator[dict[str, dict]]:
+        """Open the cache index under an exclusive lock.
+
+        Changes made to the index are saved on exit.
+
+        :return: Cache index.
+        :rtype: Iterator[dict[str, dict]]
+        """
+        os.makedirs(self._objects, exist_ok=True)
+        index_path = self.directory / "index.json"
+
+        with open(self.directory / ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+            try:
+                with open(index_path, encoding="utf-8") as f:
+                    index = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                index = {}
+
+            yield index
+
+            tmp = index_path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(index, f, indent=4)
+            os.replace(tmp, index_path)
+
+    def key(self, url: str, sha256: Optional[str] = None) -> str:
+        return sha256.lower() if sha256 else hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    @contextmanager
+    def lock(self, url: str, sha256: Optional[str] = None) -> Iterator[None]:
+        os.makedirs(self.directory / "locks", exist_ok=True)
+
+        # lock files are never removed, otherwise a waiting build could hold a lock of an unlinked file
+        with open(self.directory / "locks" / self.key(url, sha256), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def lookup(self, url: str, sha256: Optional[str] = None) -> Optional[Path]:
+        key = self.key(url, sha256)
+        path = self._objects / key
+
+        with self._index() as index:
+            if not path.is_file():
+                index.pop(key, None)
+                return None
+
+            # update access time for LRU eviction
+            entry = index.setdefault(key, {"url": url, "sha256": sha256 or "", "size": path.stat().st_size})
+            entry["atime"] = time.time()
+
+        return path
+
+    def _tmp(self, key: str) -> Path:
+        """Form a unique temporary path, so that concurrent downloads do not collide.
+
+        :param str key: Cache key.
+        :return: Path to the temporary file.
+        :rtype: Path
+        """
+        os.makedirs(self.directory / "tmp", exist_ok=True)
+        return self.directory / "tmp" / f"{key}.{os.getpid()}.{threading.get_ident()}"
+
+    def _commit(
+            self,
+            tmp: Path,
+            url: str,
+            sha256: Optional[str] = None,
+            validators: Optional[dict[str, str]] = None,
+            digest: Optional[str] = None
+        ) -> Path:
+        """Verify a downloaded file and move it into the cache.
+
+        Verified checksum is recorded in the index, so that cached files are trusted without rehashing.
+
+        :param Path tmp: Path to the downloaded file.
+        :param str url: URL to the file.
+        :param Optional[str]=None sha256: Expected SHA-256 checksum of the file.
+        :param Optional[dict[str,str]]=None validators: HTTP validators (ETag, Last-Modified) of the file.
+        :param Optional[str]=None digest: SHA-256 checksum computed while the file was downloaded.
+        :return: Path to the cached file.
+        :rtype: Path
+        """
+        key = self.key(url, sha256)
+        path = self._objects / key
+
+        if not digest:
+            with open(tmp, "rb") as f:
+                digest = hashlib.file_digest(f, "sha256").hexdigest()
+
+        if sha256 and digest != sha256.lower():
+            cm.remove(tmp)
+            log.error(f"Checksum mismatch for {url}: expected {sha256}, got {digest}")
+            sys.exit(1)
+
+        os.replace(tmp, path)
+
+        with self._index() as index:
+            index[key] = {
+                "url": url,
+                "sha256": digest,
+                "size": path.stat().st_size,
+                "atime": time.time(),
+                "stored": time.time(),
+                **(validators or {})
+            }
+
+        self.evict()
+        return path
+
+    @staticmethod
+    def _validators(url: str) -> dict[str, str]:
+        """Get HTTP validators of a remote file, used to detect it's upstream changes later on.
+
+        :param str url: URL to the file.
+        :return: ETag and/or Last-Modified values of the file.
+        :rtype: dict[str, str]
+        """
+        # Sourceforge serves files through mirror redirects, it's URLs are versioned anyway
+        if "sourceforge" in url:
+            return {}
+
+        try:
+            r = net.session().head(url, allow_redirects=True, headers={"referer": url}, timeout=60)
+        except requests.RequestException:
+            return {}
+
+        if not r.ok:
+            return {}
+
+        return {k: r.headers[h] for k, h in (("etag", "ETag"), ("modified", "Last-Modified")) if h in r.headers}
+
+    def _changed(self, url: str, sha256: Optional[str] = None) -> bool:
+        """Check whether a cached file has changed upstream, via a conditional request.
+
+        Files without recorded validators, as well as files whose validators are
+        not returned by the server, are downloaded again once they are older than TTL.
+
+        :param str url: URL to the file.
+        :param Optional[str]=None sha256: Expected SHA-256 checksum of the file.
+        :return: Flag indicating that the file has to be downloaded again.
+        :rtype: bool
+        """
+        with self._index() as index:
+            entry = dict(index.get(self.key(url, sha256), {}))
+
+        # entries recorded before the download time was tracked are considered expired
+        expired = time.time() - entry.get("stored", 0) >= self.ttl
+
+        headers = {"referer": url}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("modified"):
+            headers["If-Modified-Since"] = entry["modified"]
+
+        if len(headers) == 1:
+            return expired
+
+        try:
+            r = net.session().head(url, allow_redirects=True, headers=headers, timeout=60)
+        except requests.RequestException as e:
+            log.warning(f"Could not revalidate {url}, using cached file: {e}")
+            return False
+
+        if r.status_code == 304 or not r.ok:
+            return False
+
+        # servers and CDNs may ignore conditional requests, so the validators themselves are compared
+        pairs = [(k, h) for k, h in (("etag", "ETag"), ("modified", "Last-Modified")) if entry.get(k) and h in r.headers]
+        if not pairs:
+            return expired
+
+        return any(r.headers[h] != entry[k] for k, h in pairs)
+
+    def fetch(self, url: str, sha256: Optional[str] = None, revalidate: bool = False) -> Path:
+        # concurrent builds wait for the first download of the file, and take it from the cache
+        with self.lock(url, sha256):
+            return self._fetch(url, sha256, revalidate)
+
+    def _fetch(self, url: str, sha256: Optional[str] = None, revalidate: bool = False) -> Path:
+        """Get a file from the cache, downloading it on a miss, with the cache entry locked.
+
+        :param str url: URL to the file.
+        :param Optional[str]=None sha256: Expected SHA-256 checksum of the file.
+        :param bool=False revalidate: Flag indicating that a cached file has to be checked for upstream changes.
+        :return: Path to the cached file.
+        :rtype: Path
+        """
+        cached = self.lookup(url, sha256)
+
+        # a checksum pins the contents, so only files without one can change upstream
+        if cached and revalidate and not sha256 and self._changed(url):
+            log.warning(f"{url} has changed upstream, downloading it again..")
+            cached = None
+
+        if cached:
+            log.info(f"Using cached file for {url}")
+            return cached
+
+        validators = self._validators(url) if revalidate else {}
+
+        tmp = self._tmp(self.key(url, sha256))
+        digest = fo.download(url, tmp, sha256)
+
+        return self._commit(tmp, url, sha256, validators, digest)
+
+    @contextmanager
+    def writer(self, url: str, sha256: Optional[str] = None) -> Iterator[BinaryIO]:
+        tmp = self._tmp(self.key(url, sha256))
+        digest = hashlib.sha256()
+
+        try:
+            with open(tmp, "wb") as f:
+                yield _HashingWriter(f, digest) # type: ignore
+        except BaseException:
+            cm.remove(tmp)
+            raise
+
+        self._commit(tmp, url, sha256, digest=digest.hexdigest())
+
+    def evict(self) -> None:
+        with self._index() as index:
+            # forget files that were removed from the cache externally
+            for key in [k for k in index if not (self._objects / k).is_file()]:
+                del index[key]
+
+            total = sum(e["size"] for e in index.values())
+
+            # the most recently used file is always kept, even if it alone exceeds the budget
+            for key in sorted(index, key=lambda k: index[k]["atime"])[:-1]:
+                if total <= self.budget:
+                    break
+
+                log.warning(f"Evicting {index[key]['url']} from download cache..")
+                cm.remove(self._objects / key)
+                total -= index[key]["size"]
+                del index[key]
@@ -0,0 +1,105 @@
+import os
+import sys
+import json
+import shutil
+import logging
+import tempfile
+from pathlib import Path
+from collections import Counter
+from typing import Literal, Optional
+from pydantic import BaseModel
+
+from zkb.tools import cleaning as cm, commands as ccmd
+from zkb.configs import DirectoryConfig as dcfg
+from zkb.interfaces import ICompilerCacheManager
+
+
+log = logging.getLogger("ZeroKernelLogger")
+
+
+class CompilerCacheManager(BaseModel, ICompilerCacheManager):
+    """Compiler cache (ccache or sccache) manager.
+
+    Cache directory is persistent and shared by all roots and containers on the host.
+    Paths under the base directory are normalized by both tools to relative ones,
+    so that the same sources built from different locations share cache hits.
+    Shared statistics are never reset, the statistics of a build are counted separately.
+
+    :param Literal["ccache","sccache"] tool: Compiler cache tool.
+    :param Path directory: Path to the root directory of compiler caches.
+    :param Optional[Path]=None basedir: Path to the base directory of the sources.
+    """
+
+    _statslog: Optional[Path] = None
+    _baseline: tuple[int, int] = (0, 0)
+
+    tool: Literal["ccache", "sccache"]
+    directory: Path = Path(os.getenv("ZKB_CCACHE_DIR", dcfg.cache / "compiler"))
+    basedir: Optional[Path] = None
+
+    @property
+    def launcher(self) -> str:
+        return f"{self.tool} clang"
+
+    @staticmethod
+    def _server_stats() -> tuple[int, int]:
+        """Get statistics of the running sccache server.
+
+        :return: Number of cache hits and misses.
+        :rtype: tuple[int, int]
+        """
+        out = json.loads(str(ccmd.launch("sccache --show-stats --stats-format=json", get_output=True)))
+        hits = sum(out["stats"]["cache_hits"]["counts"].values())
+        misses = sum(out["stats"]["cache_misses"]["counts"].values())
+
+        return hits, misses
+
+    def setup(self) -> None:
+        if not shutil.which(self.tool):
+            log.error(f"Compiler cache '{self.tool}' is not installed.")
+            sys.exit(1)
+
+        cdir = self.directory.absolute() / self.tool
+        os.makedirs(cdir, exist_ok=True)
+
+        match self.tool:
+            case "ccache":
+                os.environ["CCACHE_DIR"] = str(cdir)
+                # kernel embeds file paths (__FILE__) and timestamps, which must not break the hits
+                os.environ["CCACHE_SLOPPINESS"] = "file_macro,locale,time_macros"
+                os.environ["CCACHE_NOHASHDIR"] = "1"
+                # toolchains are extracted anew for each root, so their mtimes can't be trusted
+                os.environ["CCACHE_COMPILERCHECK"] = "content"
+                if self.basedir:
+                    os.environ["CCACHE_BASEDIR"] = str(self.basedir.absolute())
+                # results of each compilation are also logged into a file of this build only
+                fd, statslog = tempfile.mkstemp(prefix="ccache-", suffix=".log")
+                os.close(fd)
+                self._statslog = Path(statslog)
+                os.environ["CCACHE_STATSLOG"] = statslog
+            case "sccache":
+                os.environ["SCCACHE_DIR"] = str(cdir)
+                if self.basedir:
+                    os.environ["SCCACHE_BASEDIRS"] = str(self.basedir.absolute())
+                # a running server has to be restarted to pick up the configuration
+                ccmd.launch("sccache --stop-server || true", loglvl="quiet")
+                ccmd.launch("sccache --start-server", loglvl="quiet")
+                self._baseline = self._server_stats()
+
+        log.info(f"Using {self.tool} compiler cache in {cdir}")
+
+    def stats(self) -> tuple[int, int]:
+        match self.tool:
+            case "ccache":
+                counters: Counter[str] = Counter()
+                if self._statslog and self._statslog.is_file():
+                    with open(self._statslog, encoding="utf-8") as f:
+                        counters.update(line.strip() for line in f if not line.startswith("#"))
+                    cm.remove(self._statslog)
+                hits = counters["direct_cache_hit"] + counters["preprocessed_cache_hit"]
+                misses = counters["cache_miss"]
+            case "sccache":
+                hits, misses = self._server_stats()
+                hits, misses = hits - self._baseline[0], misses - self._baseline[1]
+
+        return hits, misses
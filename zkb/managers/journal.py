@@ -0,0 +1,130 @@
+import os
+import shlex
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from pydantic import BaseModel
+
+from zkb.tools import cleaning as cm, commands as ccmd
+from zkb.interfaces import IJournalManager
+
+
+log = logging.getLogger("ZeroKernelLogger")
+
+_lock = threading.Lock()
+
+
+class JournalManager(BaseModel, IJournalManager):
+    """Write-ahead journal of paths modified in git repositories.
+
+    Every path is recorded before it is modified, so that a reset only has to
+    restore the journaled paths instead of walking the whole tree. A journal
+    is kept in the repository's git directory and exists only for a tree that
+    was reset before, i.e., no journal means the tree state is unknown.
+
+    Modification times of the journaled files are noted before a reset, and
+    given back to the files that are patched into the very same contents,
+    so that build output depending on them is not considered outdated.
+
+    :param list[Path] repos: Paths to the journaled repositories.
+    """
+
+    repos: list[Path] = []
+    _stamps: dict[Path, dict[str, tuple[str, int]]] = {}
+
+    @staticmethod
+    def journal(repo: Path) -> Path:
+        return repo / ".git" / "zkb-journal"
+
+    def _repo(self, path: Path) -> Path | None:
+        """Find the journaled repository containing the path.
+
+        :param Path path: Absolute path.
+        :return: Path to the repository, if any contains the path.
+        :rtype: Path | None
+        """
+        for repo in sorted(self.repos, key=lambda r: len(r.parts), reverse=True):
+            if path.is_relative_to(repo.absolute()) and path != repo.absolute():
+                return repo
+
+        return None
+
+    def paths(self, repo: Path) -> list[str]:
+        if not self.journal(repo).is_file():
+            return []
+
+        with open(self.journal(repo), encoding="utf-8") as f:
+            return sorted({line.rstrip("\n") for line in f if line.strip()})
+
+    def record(self, *paths: Path | str) -> None:
+        entries: dict[Path, list[str]] = {}
+        for p in paths:
+            # symlinks are recorded as such, not as their targets
+            path = Path(os.path.abspath(p))
+            repo = self._repo(path)
+            if repo:
+                entries.setdefault(repo, []).append(str(path.relative_to(repo.absolute())))
+
+        with _lock:
+            for repo, rel in entries.items():
+                with open(self.journal(repo), "a", encoding="utf-8") as f:
+                    f.write("".join(f"{r}\n" for r in rel))
+                    f.flush()
+                    os.fsync(f.fileno())
+
+    def record_patch(self, patch: Path | str, root: Path) -> None:
+        files = []
+        with open(patch, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                # both sides are recorded, so that renames are restored completely
+                if line.startswith(("--- ", "+++ ")):
+                    name = line[4:].split("\t")[0].strip()
+                    if name != "/dev/null" and "/" in name:
+                        files.append(root / name.split("/", 1)[1])
+
+        self.record(patch, *files)
+
+    def reset(self, repo: Path, keep: tuple[str, ...] = ()) -> None:
+        journal = self.journal(repo)
+
+        if not journal.is_file():
+            log.warning(f"No journal found for {repo.name}, resetting the whole tree..")
+            cm.git(repo, keep)
+        else:
+            paths = self.paths(repo)
+            stamps = {}
+            for p in paths:
+                path = repo / p
+                if path.is_file() and not path.is_symlink():
+                    stamps[p] = (hashlib.sha256(path.read_bytes()).hexdigest(), path.stat().st_mtime_ns)
+            with _lock:
+                self._stamps[repo] = stamps
+
+            if paths:
+                log.warning(f"Restoring {len(paths)} journaled paths in {repo.name}..")
+                pathspec = " ".join(shlex.quote(f":(literal){p}") for p in paths)
+
+                # tracked paths are restored from HEAD, the rest of them is removed
+                tracked = str(ccmd.launch(f"git -C {repo} ls-files -z -- {pathspec}", get_output=True))
+                if tracked.strip("\0"):
+                    quoted = " ".join(shlex.quote(f":(literal){p}") for p in tracked.split("\0") if p)
+                    ccmd.launch(f"git -C {repo} checkout -q HEAD -- {quoted}")
+                ccmd.launch(f"git -C {repo} clean -q -fdx -- {pathspec}")
+
+        # an empty journal marks a tree which is known to be clean
+        with _lock:
+            open(journal, "w").close()
+
+    def restamp(self, repo: Path) -> int:
+        with _lock:
+            stamps = self._stamps.pop(repo, {})
+
+        restored = 0
+        for p, (digest, mtime) in stamps.items():
+            path = repo / p
+            if path.is_file() and not path.is_symlink() and hashlib.sha256(path.read_bytes()).hexdigest() == digest:
+                os.utime(path, ns=(path.stat().st_atime_ns, mtime))
+                restored += 1
+
+        return restored
@@ -0,0 +1,61 @@
+import os
+import re
+import fcntl
+import logging
+from pathlib import Path
+from pydantic import BaseModel
+
+from zkb.tools import commands as ccmd
+from zkb.configs import DirectoryConfig as dcfg
+from zkb.interfaces import IMirrorManager
+
+
+log = logging.getLogger("ZeroKernelLogger")
+
+
+class MirrorManager(BaseModel, IMirrorManager):
+    """Manager of local bare git mirrors.
+
+    Repositories with the same name (e.g., forks of the same kernel source)
+    share one object store, so switching between them only fetches the deltas.
+    Checkouts reference the mirror's objects instead of downloading them.
+
+    :param Path directory: Path to the directory with mirrors.
+    :param bool enabled: Flag indicating that mirrors are used for git resources.
+    """
+
+    directory: Path = dcfg.cache / "git"
+    enabled: bool = os.getenv("ZKB_GIT_MIRROR", "0") == "1"
+
+    def path(self, url: str) -> Path:
+        name = url.rstrip("/").split("/")[-1].removesuffix(".git")
+        return self.directory / f"{name}.git"
+
+    @staticmethod
+    def _refname(url: str, branch: str) -> str:
+        """Form a ref name to store the fetched branch under.
+
+        :param str url: URL to the repository.
+        :param str branch: Branch (or tag) name.
+        :return: Full ref name inside of the mirror.
+        :rtype: str
+        """
+        remote = re.sub(r"[^A-Za-z0-9._-]+", "-", url.split("://")[-1]).strip("-")
+        return f"refs/mirrors/{remote}/{branch}"
+
+    def update(self, url: str, branch: str) -> Path:
+        mirror = self.path(url)
+        os.makedirs(self.directory, exist_ok=True)
+
+        # mirrors can be shared by parallel fetches and concurrent builds
+        with open(mirror.with_suffix(".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+            if not mirror.is_dir():
+                log.warning(f"Creating local mirror {mirror.name}..")
+                ccmd.launch(f"git init -q --bare {mirror}")
+
+            log.warning(f"Updating local mirror {mirror.name} from {url} ({branch})..")
+            ccmd.launch(f"git -C {mirror} fetch --no-tags {url} +{branch}:{self._refname(url, branch)}")
+
+        return mirror
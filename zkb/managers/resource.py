@@ -1,15 +1,17 @@
 import os
 import sys
 import json
-import tarfile
 import logging
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Optional
 from pydantic import BaseModel
 
-from zkb.tools import cleaning as cm, commands as ccmd, fileoperations as fo
+from zkb.tools import cleaning as cm, commands as ccmd, fileoperations as fo, vcs
 from zkb.configs import DirectoryConfig as dcfg
 from zkb.interfaces import IResourceManager
+from zkb.managers.cache import CacheManager
+from zkb.managers.mirror import MirrorManager
 
 
 log = logging.getLogger("ZeroKernelLogger")
@@ -21,15 +23,36 @@ class ResourceManager(BaseModel, IResourceManager):
     :param Optional[str]=None codename: Device codename.
     :param Optional[str]=None base: Kernel source base.
     :param Optional[str]=None lkv: Linux kernel version.
+    :param int jobs: Number of resources fetched in parallel.
+    :param bool sparse: Flag indicating sparse checkouts for resources with excluded paths.
+    :param CacheManager cmanager: Download cache manager.
+    :param MirrorManager mmanager: Git mirror manager.
     """
 
     _data: dict[str, dict[str, str]] = {}
+    # paths of kernel sources that an arm64 build does not need, left out of sparse checkouts;
+    # a device entry in the manifest can define its own "exclude" list instead
+    _exclude: list[str] = [
+        *(f"arch/{a}" for a in (
+            "alpha", "arc", "avr32", "blackfin", "c6x", "cris", "csky", "frv", "h8300", "hexagon",
+            "ia64", "m32r", "m68k", "metag", "microblaze", "mips", "mn10300", "nds32", "nios2",
+            "openrisc", "parisc", "powerpc", "riscv", "s390", "score", "sh", "sparc", "tile",
+            "unicore32", "x86", "xtensa", "um",
+        )),
+        "Documentation",
+        "tools/testing",
+        "tools/perf",
+    ]
 
     paths: dict[str, Path] = {}
 
     codename: Optional[str] = None
     lkv: Optional[str] = None
     base: Optional[str] = None
+    jobs: int = int(os.getenv("ZKB_FETCH_JOBS", "1"))
+    sparse: bool = os.getenv("ZKB_SPARSE_CHECKOUT", "0") == "1"
+    cmanager: CacheManager = CacheManager()
+    mmanager: MirrorManager = MirrorManager()
 
     def read_data(self) -> None:
         os.chdir(dcfg.root)
@@ -53,7 +76,8 @@ class ResourceManager(BaseModel, IResourceManager):
                 except Exception:
                     log.error("Arguments were specified for an unsupported build, exiting..")
                     sys.exit(1)
-                device = {self.codename: data[self.codename][self.lkv][self.base]}
+                # kernel source inherits the shared list of excluded paths, unless it defines its own
+                device = {self.codename: {"exclude": self._exclude, **data[self.codename][self.lkv][self.base]}}
 
             # join tools and devices manifests
             self._data = {**tools, **device}
@@ -67,64 +91,138 @@ class ResourceManager(BaseModel, IResourceManager):
             # convert path into it's absolute form
             self.paths[e] = dcfg.root / self._data[e]["path"]
 
+    def _fetch(self, name: str) -> str:
+        """Fetch a single resource from the manifest data.
+
+        :param str name: Resource name from the manifests.
+        :return: Status of the resource fetch.
+        :rtype: str
+        """
+        # break data into individual required vars
+        path = dcfg.root / self._data[name]["path"] # type: ignore
+        url = self._data[name]["url"]               # type: ignore
+
+        # break further processing into "generic" and "git" groups
+        ftype = self._data[name]["type"]            # type: ignore
+        match ftype:
+            case "generic":
+                # download and unpack
+                # NOTE: this is specific, for .tar.gz files
+                if path.is_dir():
+                    log.warning(f"Found an existing path: {path}")
+                    return "found"
+
+                sha256 = self._data[name].get("sha256")               # type: ignore
+                include = tuple(self._data[name].get("include", ())) # type: ignore
+
+                # concurrent builds wait for the first download of the archive, and take it from the cache
+                with self.cmanager.lock(url, sha256):
+                    archive = self.cmanager.lookup(url, sha256)
+
+                    # otherwise the archive is extracted while it is being downloaded into the cache,
+                    # its checksum is verified either way
+                    if not archive:
+                        try:
+                            if self.cmanager.budget > 0:
+                                with self.cmanager.writer(url, sha256) as tee:
+                                    fo.extract(url, path, include, tee, sha256)
+                            else:
+                                fo.extract(url, path, include, sha256=sha256)
+                        except SystemExit:
+                            cm.remove(path)
+                            raise
+
+                        return "downloaded"
+
+                # archives are taken from the download cache shared between builds
+                log.warning(f"Found {name} in download cache")
+                fo.extract(archive, path, include)
+                return "cached"
+
+            case "git":
+                # break data into individual vars
+                branch = self._data[name]["branch"] # type: ignore
+                commit = self._data[name]["commit"] # type: ignore
+                cmd = \
+                    "git clone -b {} --depth 1 --remote-submodules --recurse-submodules --shallow-submodules {} {}"\
+                    .format(branch, url, path)
+
+                # KernelSU defines it's version based on *full* commit history, so a treeless clone is used:
+                # it contains all of the commits, but only the trees and blobs of the checked out one
+                if name.lower() == "kernelsu":
+                    cmd = cmd.replace(" --depth 1", " --filter=tree:0")
+
+                # optionally, paths that are not needed for the build are left out of the checkout
+                exclude = self._data[name].get("exclude", []) if self.sparse else [] # type: ignore
+                if exclude:
+                    cmd = cmd.replace("git clone", "git clone --filter=blob:none --no-checkout")
+
+                if path.is_dir():
+                    log.warning(f"Found an existing path: {path}")
+                    return "found"
+
+                # with a local mirror, history is borrowed from it and only the deltas are fetched
+                if self.mmanager.enabled:
+                    mirror = self.mmanager.update(url, branch)
+                    cmd = cmd.replace(" --depth 1", "").replace(" --filter=tree:0", "")
+                    cmd = cmd.replace("git clone", f"git clone --reference-if-able {mirror}")
+
+                # a pinned commit is fetched alone, instead of cloning the full history to check it out
+                elif commit:
+                    vcs.fetch_commit(url, branch, commit, path, exclude) # type: ignore
+                    return "cloned"
+
+                ccmd.launch(cmd)
+
+                if exclude:
+                    vcs.sparse(path, exclude) # type: ignore
+                    ccmd.launch(f"git -C {path} checkout {commit or branch}")
+                    if (path / ".gitmodules").is_file():
+                        ccmd.launch(f"git -C {path} submodule update --init --recursive --depth 1")
+
+                # checkout a specific commit if it is specified
+                elif commit:
+                    ccmd.launch(f"git -C {path} checkout {commit}")
+
+                return "cloned"
+
+            case _:
+                log.error("Invalid resource type detected. Use only: generic, git.")
+                sys.exit(1)
+
     def download(self) -> None:
-        for e in self._data:
-            # break data into individual required vars
-            path = Path(self._data[e]["path"])    # type: ignore
-            url = self._data[e]["url"]            # type: ignore
-
-            # break further processing into "generic" and "git" groups
-            ftype = self._data[e]["type"]         # type: ignore
-            match ftype:
-                case "generic":
-                    # download and unpack
-                    # NOTE: this is specific, for .tar.gz files
-                    if path.name not in os.listdir():
-                        fn = url.split("/")[-1]
-                        dn = fn.split(".")[0]
-
-                        if fn not in os.listdir() and dn not in os.listdir():
-                            fo.download(url)
-
-                        log.warning(f"Unpacking {fn}..")
-
-                        with tarfile.open(fn) as f:
-                            f.extractall(path)
-
-                        cm.remove(fn)
-
-                        log.info("Done!")
-
-                    else:
-                        log.warning(f"Found an existing path: {path}")
-
-                case "git":
-                    # break data into individual vars
-                    branch = self._data[e]["branch"] # type: ignore
-                    commit = self._data[e]["commit"] # type: ignore
-                    cmd = \
-                        "git clone -b {} --depth 1 --remote-submodules --recurse-submodules --shallow-submodules {} {}"\
-                        .format(branch, url, path)
-
-                    # full commit history is required in two instances:
-                    # - for KernelSU -- to define it's version based on *full* commit history;
-                    # - for commit checkout -- to checkout a specific commit in the history.
-                    if e.lower() == "kernelsu" or commit:
-                        cmd = cmd.replace(" --depth 1", "")
-                    if not path.is_dir():
-                        ccmd.launch(cmd)
-                        # checkout a specific commit if it is specified
-                        if commit:
-                            cmd = f"git checkout {commit}"
-                            os.chdir(path)
-                            ccmd.launch(cmd)
-                            os.chdir(dcfg.root)
-                    else:
-                        log.warning(f"Found an existing path: {path}")
-
-                case _:
-                    log.error("Invalid resource type detected. Use only: generic, git.")
-                    sys.exit(1)
+        # resources are independent of each other, so they can be fetched concurrently
+        jobs = max(1, min(self.jobs, len(self._data)))
+        if jobs > 1:
+            log.warning(f"Fetching {len(self._data)} resources with {jobs} parallel jobs..")
+
+        statuses: dict[str, str] = {}
+        failed = False
+
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(self._fetch, e): e for e in self._data}
+
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    statuses[name] = future.result()
+                # failed commands exit via sys.exit(), which has to be caught here as well
+                except (Exception, SystemExit) as e:
+                    statuses[name] = "failed" if isinstance(e, SystemExit) else f"failed ({e})"
+                    failed = True
+
+        # report per-resource status, in the order of the manifests
+        if jobs > 1 or failed:
+            print("\n", end="")
+            for name in self._data:
+                if statuses[name].startswith("failed"):
+                    log.error(f"{name}: {statuses[name]}")
+                else:
+                    log.info(f"{name}: {statuses[name]}")
+
+        if failed:
+            log.error("Could not fetch all of the required resources, exiting..")
+            sys.exit(1)
 
     def export_path(self) -> None:
         for elem in self.paths:
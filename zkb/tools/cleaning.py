@@ -50,17 +50,14 @@ def on_rm_error(func, path: str, exc_info):
     os.unlink(path)
 
 
-def git(directory: Path | str) -> None:
+def git(directory: Path | str, keep: Optional[tuple[str, ...]] = ()) -> None:
     """Clean up a git directory.
 
     :param Path/str directory: Path to the directory.
+    :param Optional[tuple[str,...]]=() keep: Untracked paths (git exclude patterns) to be kept.
     """
-    goback = Path.cwd()
-
-    os.chdir(directory)
-    ccmd.launch("git clean -fdx")
-    ccmd.launch("git reset --hard HEAD")
-    os.chdir(goback)
+    ccmd.launch(" ".join([f"git -C {directory} clean -fdx", *(f"-e {k}" for k in keep or ())]))
+    ccmd.launch(f"git -C {directory} reset --hard HEAD")
 
 
 def root(extra: Optional[list[str]] = []) -> None:
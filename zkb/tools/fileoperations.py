@@ -1,12 +1,21 @@
+import io
 import os
 import sys
+import json
+import time
+import hashlib
 import shutil
+import tarfile
 import logging
 import requests
+import itertools
+import threading
+import subprocess
 from pathlib import Path
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Iterator, BinaryIO, Callable
 
-from zkb.tools import commands as ccmd
+from zkb.tools import commands as ccmd, network as net
 
 
 log = logging.getLogger("ZeroKernelLogger")
@@ -42,117 +51,695 @@ def ucopy(src: Path, dst: Path, exceptions: Optional[tuple[str | Path, ...]] = (
         shutil.copy(src, dst)
 
 
-def download(url: str) -> None:
-    """Download file from URL.
+def url_name(url: str) -> str:
+    """Determine name of the file behind URL.
 
     :param str url: URL to the file.
+    :return: Name of the file.
+    :rtype: str
+    """
+    if "sourceforge" in url:
+        return url.split("/download")[0].split("/")[-1]
+
+    return url.split("/")[-1]
+
+
+def link(src: Path, dst: Path) -> None:
+    """Place a file into desired destination as a hard link, falling back to a copy.
+
+    :param Path src: Source path.
+    :param Path dst: Destination path.
     :return: None
     """
-    fn = url.split("/")[-1]
+    dst.unlink(missing_ok=True)
 
-    log.info(f"Downloading {fn} ..\n      URL: {url}")
+    try:
+        os.link(src, dst)
+    except OSError:
+        # e.g., source and destination are on different filesystems
+        shutil.copy(src, dst)
+
+
+_CHUNK_SIZE = 1024 * 1024
+_SEGMENT_MIN_SIZE = 64 * 1024 * 1024
+_HEADERS = {"Accept-Encoding": "identity"}
+
+
+class _Progress:
+    """Thread-safe byte counter, periodically reporting download progress and throughput."""
+
+    def __init__(self, name: str, total: Optional[int] = None, interval: float = 10) -> None:
+        self.name = name
+        self.total = total
+        self.done = 0
+        self._resumed = 0
+        self._interval = interval
+        self._start = time.monotonic()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._report, daemon=True)
+
+    def __enter__(self) -> "_Progress":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def add(self, n: int) -> None:
+        with self._lock:
+            self.done += n
+
+    def resume(self, n: int) -> None:
+        """Account for bytes downloaded previously, they do not count towards the throughput."""
+        with self._lock:
+            self.done += n
+            self._resumed += n
+
+    @property
+    def summary(self) -> str:
+        elapsed = max(time.monotonic() - self._start, 1e-3)
+        mib = self.done / 1024 ** 2
+        total = f" / {self.total / 1024 ** 2:.1f}" if self.total else ""
+
+        rate = (self.done - self._resumed) / 1024 ** 2 / elapsed
+
+        return f"{mib:.1f}{total} MiB, {rate:.1f} MiB/s"
+
+    def _report(self) -> None:
+        while not self._stop.wait(self._interval):
+            log.info(f"{self.name}: {self.summary}")
+
+
+class _Digest:
+    """Incremental SHA-256 checksum of a file, fed with it's bytes in order as they are written."""
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self._hash = hashlib.sha256()
+        self.size = 0
+
+    def update(self, data: bytes) -> None:
+        self._hash.update(data)
+        self.size += len(data)
+
+    def catch_up(self, path: Path, offset: int) -> None:
+        """Hash the bytes of the file up to offset, which were not seen while being written.
+
+        :param Path path: Path to the file.
+        :param int offset: Offset to hash the file up to.
+        :return: None
+        """
+        if self.size > offset:
+            self.reset()
+
+        with open(path, "rb") as f:
+            f.seek(self.size)
+            while self.size < offset:
+                chunk = f.read(min(_CHUNK_SIZE, offset - self.size))
+                if not chunk:
+                    break
+                self.update(chunk)
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+
+def _probe(url: str) -> tuple[Optional[int], bool]:
+    """Find out the size of a remote file and whether the server supports range requests.
+
+    :param str url: URL to the file.
+    :return: File size (if known) and a flag indicating support of range requests.
+    :rtype: tuple[Optional[int], bool]
+    """
+    headers = {**_HEADERS, "referer": url, "Range": "bytes=0-0"}
+
+    with net.session().get(url, stream=True, headers=headers, timeout=60) as r:
+        r.raise_for_status()
+
+        if r.status_code == 206 and r.headers.get("Content-Range", "").split("/")[-1].isdigit():
+            return int(r.headers["Content-Range"].split("/")[-1]), True
+
+        length = r.headers.get("Content-Length")
+        return (int(length) if length else None), False
+
+
+def _fetch_stream(url: str, part: Path, progress: _Progress, digest: _Digest) -> None:
+    """Download a file over a single connection, resuming from a partial file if there is one.
+
+    :param str url: URL to the file.
+    :param Path part: Path to the partial file.
+    :param _Progress progress: Progress counter.
+    :param _Digest digest: Checksum of the file, updated as it's bytes are written.
+    :return: None
+    """
+    # a preallocated file of an unfinished segmented download can't be resumed sequentially
+    state = part.with_name(f"{part.name}.json")
+    if state.is_file():
+        os.remove(state)
+        part.unlink(missing_ok=True)
+
+    offset = part.stat().st_size if part.is_file() else 0
+    headers = {**_HEADERS, "referer": url}
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+
+    with net.session().get(url, stream=True, headers=headers, timeout=60) as r:
+        # the partial file is already complete
+        if r.status_code == 416 and r.headers.get("Content-Range", "").split("/")[-1] == str(offset):
+            digest.catch_up(part, offset)
+            return
+
+        r.raise_for_status()
+
+        # the server ignored the range request, so the download starts over
+        if offset and r.status_code != 206:
+            log.warning(f"Server does not support resuming, restarting download of {part.name}..")
+            offset = 0
+        elif offset:
+            log.info(f"Resuming download of {part.name} from {offset / 1024 ** 2:.1f} MiB..")
+            progress.resume(offset)
+
+        # only the bytes from a previous run have to be read back, within the same run the checksum is kept
+        if offset:
+            digest.catch_up(part, offset)
+        else:
+            digest.reset()
+
+        with open(part, "r+b" if offset else "wb", buffering=_CHUNK_SIZE) as f:
+            f.seek(offset)
+            f.truncate()
+            for chunk in r.iter_content(chunk_size=_CHUNK_SIZE):
+                f.write(chunk)
+                digest.update(chunk)
+                progress.add(len(chunk))
+
+
+def _fetch_segments(
+        url: str,
+        part: Path,
+        total: int,
+        connections: int,
+        progress: _Progress,
+        digest: _Digest
+    ) -> None:
+    """Download a file over several connections, with each one fetching a byte range of the file.
+
+    The file is preallocated and segments are written into it at their offsets.
+    Progress of each segment is saved next to the partial file, so that the download can be resumed.
+    Checksum follows the download, hashing the contiguous downloaded part while it is still in page cache.
+
+    :param str url: URL to the file.
+    :param Path part: Path to the partial file.
+    :param int total: Size of the file.
+    :param int connections: Number of connections.
+    :param _Progress progress: Progress counter.
+    :param _Digest digest: Checksum of the file.
+    :return: None
+    """
+    state = part.with_name(f"{part.name}.json")
+    segments = []
+
+    # segments are stored as [start, end, downloaded bytes]
+    if part.is_file() and state.is_file():
+        with open(state, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("size") == total:
+            segments = data["segments"]
+            log.info(f"Resuming segmented download of {part.name}..")
+
+    if not segments:
+        size = -(-total // connections)
+        segments = [[s, min(s + size, total) - 1, 0] for s in range(0, total, size)]
+
+        with open(part, "wb") as f:
+            try:
+                os.posix_fallocate(f.fileno(), 0, total)
+            except OSError:
+                f.truncate(total)
+
+        digest.reset()
+
+    progress.resume(sum(s[2] for s in segments))
+    fd = os.open(part, os.O_WRONLY)
+
+    def fetch(segment: list[int]) -> None:
+        start, end, done = segment
+        if start + done > end:
+            return
+
+        headers = {**_HEADERS, "referer": url, "Range": f"bytes={start + done}-{end}"}
+        with net.session().get(url, stream=True, headers=headers, timeout=60) as r:
+            r.raise_for_status()
+            if r.status_code != 206:
+                raise requests.RequestException(f"range request not honored: {r.status_code}")
+
+            for chunk in r.iter_content(chunk_size=_CHUNK_SIZE):
+                data = chunk[:end + 1 - start - segment[2]]
+                os.pwrite(fd, data, start + segment[2])
+                segment[2] += len(data)
+                progress.add(len(data))
+
+        if start + segment[2] <= end:
+            raise requests.RequestException(f"connection closed at byte {start + segment[2]}")
+
+    def frontier() -> int:
+        for start, end, done in segments:
+            if start + done <= end:
+                return start + done
+        return total
+
+    stop = threading.Event()
+
+    def follow() -> None:
+        while not stop.is_set():
+            if frontier() > digest.size:
+                digest.catch_up(part, frontier())
+            else:
+                stop.wait(0.1)
+
+    follower = threading.Thread(target=follow, daemon=True)
+    follower.start()
 
     try:
-        if "sourceforge" in url:
-            log.warning("Sorceforge URL detected, using wget..")
+        with ThreadPoolExecutor(max_workers=connections) as executor:
+            for future in [executor.submit(fetch, s) for s in segments]:
+                future.result()
+    finally:
+        stop.set()
+        follower.join()
+        os.close(fd)
+        with open(state, "w", encoding="utf-8") as f:
+            json.dump({"size": total, "segments": segments}, f)
+
+    os.remove(state)
+    digest.catch_up(part, total)
+
+
+def download(url: str, dst: Optional[Path] = None, sha256: Optional[str] = None) -> str:
+    """Download file from URL.
+
+    Download goes into a partial file, which is resumed on retries and in subsequent runs.
+    Large files are fetched over several connections if the server supports range requests.
+    SHA-256 checksum is computed along the way and verified if the expected one is known.
+
+    :param str url: URL to the file.
+    :param Optional[Path]=None dst: Path to save the file to, defaults to its name in current directory.
+    :param Optional[str]=None sha256: Expected SHA-256 checksum of the file.
+    :return: SHA-256 checksum of the downloaded file.
+    :rtype: str
+    """
+    fn = str(dst) if dst else url_name(url)
+    retries = max(1, int(os.getenv("ZKB_DOWNLOAD_RETRIES", "5")))
+    connections = max(1, int(os.getenv("ZKB_DOWNLOAD_CONNECTIONS", "1")))
+
+    log.info(f"Downloading {fn} ..\n      URL: {url}")
+
+    if "sourceforge" in url:
+        log.warning("Sorceforge URL detected, using wget..")
+        ccmd.launch(f"wget -c --tries={retries} -O {fn} {url}")
 
-            fn = url.split("/download")[0].split("/")[-1]
-            ccmd.launch(f"wget -O {fn} {url}")
+        # wget output is not seen by the builder, so the file is hashed once it is complete
+        digest = _Digest()
+        digest.catch_up(Path(fn), Path(fn).stat().st_size)
+        if sha256 and digest.hexdigest() != sha256.lower():
+            os.remove(fn)
+            log.error(f"Checksum mismatch for {fn}: expected {sha256}, got {digest.hexdigest()}")
+            sys.exit(1)
+
+        log.info("Done!")
+        return digest.hexdigest()
+
+    part = Path(f"{fn}.part")
+    digest = _Digest()
+    summary = ""
+
+    for attempt in range(1, retries + 1):
+        try:
+            with net.host_slot(url):
+                total, ranges = _probe(url)
+
+                with _Progress(Path(fn).name, total) as progress:
+                    if ranges and total and connections > 1 and total >= _SEGMENT_MIN_SIZE:
+                        _fetch_segments(url, part, total, connections, progress, digest)
+                    else:
+                        _fetch_stream(url, part, progress, digest)
+                summary = progress.summary
+
+            if total and part.stat().st_size != total:
+                raise requests.RequestException(f"size mismatch: expected {total}, got {part.stat().st_size}")
+
+            # a corrupted partial file can't be fixed by resuming, so the next attempt starts over
+            if sha256 and digest.hexdigest() != sha256.lower():
+                part.unlink()
+                raise ValueError(f"checksum mismatch: expected {sha256}, got {digest.hexdigest()}")
+
+            break
+
+        except (requests.RequestException, OSError, ValueError) as e:
+            # client errors other than timeouts and rate limits won't go away on retry
+            status = e.response.status_code if isinstance(e, requests.HTTPError) and e.response is not None else 0
+            if attempt == retries or (400 <= status < 500 and status not in (408, 429)):
+                log.error(f"Download failed: {e}")
+                sys.exit(1)
+
+            delay = min(2 ** attempt, 30)
+            log.warning(f"Download interrupted ({e}), retrying in {delay}s ({attempt}/{retries})..")
+            time.sleep(delay)
+
+    os.replace(part, fn)
+
+    log.info(f"Done! ({summary})")
+    return digest.hexdigest()
+
+
+class _ChunkReader(io.RawIOBase):
+    """Read-only file object on top of an iterator of byte chunks."""
+
+    def __init__(self, chunks: Iterator[bytes]) -> None:
+        self._chunks = chunks
+        self._buffer = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._buffer:
+            self._buffer = next(self._chunks, b"")
+            if not self._buffer:
+                return 0
+
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+
+        return n
+
+
+def _read_chunks(
+        src: str | Path,
+        tee: Optional[BinaryIO] = None,
+        digest: Optional["hashlib._Hash"] = None
+    ) -> Iterator[bytes]:
+    """Read an archive in chunks, either from URL or from a local file.
+
+    :param str/Path src: URL or path to the archive.
+    :param Optional[BinaryIO]=None tee: File object to also write the chunks into.
+    :param Optional[hashlib._Hash]=None digest: Hash object to be updated with the chunks.
+    :return: Iterator of byte chunks.
+    :rtype: Iterator[bytes]
+    """
+    chunk_size = 1024 * 1024
+
+    if str(src).startswith(("http://", "https://")):
+        with net.session().get(str(src), stream=True, headers={"referer": str(src)}) as r:
+            r.raise_for_status()
+            for chunk in r.iter_content(chunk_size=chunk_size):
+                if tee:
+                    tee.write(chunk)
+                if digest:
+                    digest.update(chunk)
+                yield chunk
+    else:
+        with open(src, "rb") as f:
+            while chunk := f.read(chunk_size):
+                if tee:
+                    tee.write(chunk)
+                if digest:
+                    digest.update(chunk)
+                yield chunk
+
+
+def _decompressor(head: bytes) -> Optional[list[str]]:
+    """Find an external, preferably multi-threaded, decompressor for the archive.
+
+    :param bytes head: First bytes of the archive, used to detect the compression format.
+    :return: Decompressor command if available.
+    :rtype: Optional[list[str]]
+    """
+    candidates = {
+        b"\x1f\x8b": (["pigz", "-dc"], ["gzip", "-dc"]),
+        b"\xfd7zXZ\x00": (["xz", "-dc", "-T0"],),
+        b"BZh": (["lbzip2", "-dc"], ["pbzip2", "-dc"]),
+        b"\x28\xb5\x2f\xfd": (["zstd", "-dc", "-T0"],),
+    }
+
+    for magic, commands in candidates.items():
+        if head.startswith(magic):
+            for cmd in commands:
+                if shutil.which(cmd[0]):
+                    return cmd
+
+    return None
+
+
+def _included(member: tarfile.TarInfo, include: tuple[str, ...]) -> bool:
+    """Check whether the archive member passes the include filter.
+
+    :param tarfile.TarInfo member: Archive member.
+    :param tuple[str,...] include: Paths (prefixes) to extract from the archive.
+    :return: Flag indicating that the member has to be extracted.
+    :rtype: bool
+    """
+    if not include:
+        return True
+
+    def matches(name: str) -> bool:
+        name = name.removeprefix("./")
+        return any(name == p.rstrip("/") or name.startswith(p.rstrip("/") + "/") for p in include)
+
+    if not matches(member.name):
+        return False
+
+    # a hard link can't be created in a stream if it's target is skipped
+    if member.islnk() and not matches(member.linkname):
+        log.warning(f"Skipping hard link {member.name}, it's target is filtered out")
+        return False
+
+    return True
+
+
+def extract(
+        src: str | Path,
+        dst: Path,
+        include: Optional[tuple[str, ...]] = None,
+        tee: Optional[BinaryIO] = None,
+        sha256: Optional[str] = None
+    ) -> None:
+    """Extract a tar archive in a streaming manner, while it's bytes arrive.
+
+    Archive is decompressed by an external multi-threaded tool if one is available,
+    and only the members passing the include filter are written to disk.
+    Extraction goes into a temporary directory that is moved into place only on success,
+    which also requires the archive to match the expected checksum.
+
+    :param str/Path src: URL or path to the archive.
+    :param Path dst: Directory to extract the archive into.
+    :param Optional[tuple[str,...]]=None include: Paths (prefixes) to extract from the archive.
+    :param Optional[BinaryIO]=None tee: File object to also write the raw archive into.
+    :param Optional[str]=None sha256: Expected SHA-256 checksum of the archive.
+    :return: None
+    """
+    include = include or ()
+    tmp = dst.with_name(f"{dst.name}.partial")
+    digest = hashlib.sha256()
+    proc = None
+
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    log.info(f"Extracting archive into {dst} ..\n      Source: {src}")
+
+    try:
+        # peek into the first chunk to detect the compression format
+        chunks = _read_chunks(src, tee, digest)
+        head = next(chunks, b"")
+        chunks = itertools.chain((head,), chunks)
+        decompressor = _decompressor(head)
+
+        if decompressor:
+            log.info(f"Using {decompressor[0]} for decompression")
+            proc = subprocess.Popen(decompressor, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+            errors = []
+
+            def feed() -> None:
+                try:
+                    for chunk in chunks:
+                        proc.stdin.write(chunk) # type: ignore
+                except Exception as e:
+                    errors.append(e)
+                finally:
+                    proc.stdin.close()          # type: ignore
+
+            feeder = threading.Thread(target=feed, daemon=True)
+            feeder.start()
+
+            with tarfile.open(fileobj=proc.stdout, mode="r|") as tf:
+                tf.extractall(tmp, members=(m for m in tf if _included(m, include)), filter="tar")
+
+            # drain the remaining (padding) data, so that the feeder is not blocked
+            proc.stdout.read()                  # type: ignore
+            feeder.join()
+
+            if proc.wait() != 0 or errors:
+                raise RuntimeError(errors[0] if errors else f"{decompressor[0]} exited with code {proc.returncode}")
 
         else:
-            with requests.get(url, stream=True, headers={"referer": url}) as r:
-                r.raise_for_status()
+            reader = io.BufferedReader(_ChunkReader(chunks), buffer_size=1024 * 1024)
+            with tarfile.open(fileobj=reader, mode="r|*") as tf:
+                tf.extractall(tmp, members=(m for m in tf if _included(m, include)), filter="tar")
 
-                with open(fn, "wb") as f:
-                    for chunk in r.iter_content(chunk_size=8192):
-                        f.write(chunk)
+            # read out the trailing data, so that the "tee" receives the complete archive
+            for _ in chunks:
+                pass
 
     except Exception as e:
-        log.error(f"Download failed: {e}")
+        if proc:
+            proc.kill()
+        shutil.rmtree(tmp, ignore_errors=True)
+        log.error(f"Extraction failed: {e}")
         sys.exit(1)
 
+    if sha256 and digest.hexdigest() != sha256.lower():
+        shutil.rmtree(tmp, ignore_errors=True)
+        log.error(f"Checksum mismatch for {src}: expected {sha256}, got {digest.hexdigest()}")
+        sys.exit(1)
+
+    shutil.rmtree(dst, ignore_errors=True)
+    os.replace(tmp, dst)
+
     log.info("Done!")
 
 
-def replace_lines(filename: Path, og_lines: tuple[str, ...], nw_lines: tuple[str, ...]) -> None:
+def write_if_changed(filename: str | Path, data: Optional[bytes]) -> bool:
+    """Atomically replace contents of a file, but only if they differ.
+
+    Unchanged files are not touched at all, so their modification time
+    stays the same and build systems do not consider them changed.
+    Files restored by a journal reset are rewritten, though, their
+    modification times are given back by the journal manager.
+
+    :param str/Path filename: Path to the file.
+    :param Optional[bytes] data: New contents of the file, None to remove it.
+    :return: Flag indicating that the file was changed.
+    :rtype: bool
+    """
+    path = Path(filename)
+
+    if data is None:
+        if not path.exists() and not path.is_symlink():
+            return False
+        path.unlink()
+        return True
+
+    if path.is_file() and path.stat().st_size == len(data) and path.read_bytes() == data:
+        return False
+
+    os.makedirs(path.parent, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.zkb-tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+    if path.is_file():
+        shutil.copymode(path, tmp)
+    os.replace(tmp, path)
+
+    return True
+
+
+def mutate(filename: str | Path, transform: Callable[[str], str]) -> bool:
+    """Transform text of a file in memory and write it only if it changed.
+
+    Bytes that are not valid UTF-8 are kept as is.
+
+    :param str/Path filename: Path to the file.
+    :param Callable[[str],str] transform: Function transforming the text.
+    :return: Flag indicating that the file was changed.
+    :rtype: bool
+    """
+    with open(filename, encoding="utf-8", errors="surrogateescape", newline="") as f:
+        text = f.read()
+
+    return write_if_changed(filename, transform(text).encode("utf-8", errors="surrogateescape"))
+
+
+def replace_lines(filename: Path, og_lines: tuple[str, ...], nw_lines: tuple[str, ...]) -> bool:
     """Replace lines in the specified file.
 
     :param Path filename: Path to the filename.
     :param tuple[str,...] og_lines: Original lines to be replaced.
     :param tuple[str,...] nw_lines: New lines in place of original lines.
-    :return: None
+    :return: Flag indicating that the file was changed.
+    :rtype: bool
     """
-    filename_new = Path(str(filename) + "_new")
-
-    with open(filename, encoding="utf-8") as data:
-        with open(filename_new, "w", encoding="utf-8") as new_data:
-            for line in data:
-                for indx, key in enumerate(og_lines):
-                    if key in line:
-                        log.warning(f"Replacing {key} with {nw_lines[indx]}")
-                        line = line.replace(key, nw_lines[indx])
-                new_data.write(line)
+    def transform(text: str) -> str:
+        lines = text.splitlines(keepends=True)
+        for i, line in enumerate(lines):
+            for indx, key in enumerate(og_lines):
+                if key in line:
+                    log.warning(f"Replacing {key} with {nw_lines[indx]}")
+                    line = line.replace(key, nw_lines[indx])
+            lines[i] = line
+        return "".join(lines)
 
-    os.replace(filename_new, filename)
+    return mutate(filename, transform)
 
 
-def replace_nth(filename: Path, og_string: str, nw_string: str, occurence: int) -> None:
+def replace_nth(filename: Path, og_string: str, nw_string: str, occurence: int) -> bool:
     """Replace the n-th occurence of subtring in specified file.
 
     :param Path filename: Path to the filename.
     :param str og_string: Original string to be replaced.
     :param str nw_string: New string used to replace the original one.
     :param int occurence: The index of occurence to replace.
-    :return: None
+    :return: Flag indicating that the file was changed.
+    :rtype: bool
     """
-    filename_new = Path(str(filename) + "_new")
-
-    with open(filename, encoding="utf-8") as data:
-        with open(filename_new, "w", encoding="utf-8") as new_data:
-            counter = 0
-            for line in data:
-                if og_string in line:
-                    counter += 1
-                    if counter == occurence:
-                        log.warning(f"Replacing {og_string} with {nw_string}")
-                        line = line.replace(og_string, nw_string)
-                new_data.write(line)
+    def transform(text: str) -> str:
+        lines = text.splitlines(keepends=True)
+        counter = 0
+        for i, line in enumerate(lines):
+            if og_string in line:
+                counter += 1
+                if counter == occurence:
+                    log.warning(f"Replacing {og_string} with {nw_string}")
+                    lines[i] = line.replace(og_string, nw_string)
+        return "".join(lines)
 
-    os.replace(filename_new, filename)
+    return mutate(filename, transform)
 
 
-def insert_before_line(filename: str | Path, pointer_line: str, new_line: str) -> None:
+def insert_before_line(filename: str | Path, pointer_line: str, new_line: str) -> bool:
     """Insert new line before the specified one.
 
     :param str/Path filename: Name of the file.
     :param str pointer_line: The line before which new line will be inserted.
     :param str new_line: The line being inserted.
-    :return: None
+    :return: Flag indicating that the file was changed.
+    :rtype: bool
     """
-    with open(filename, "r+", encoding="utf-8") as f:
-        a = [x.rstrip() for x in f]
-        index = 0
-
-        for item in a:
-            if item.startswith(pointer_line):
-                a.insert(index, new_line)
+    def transform(text: str) -> str:
+        lines = text.splitlines(keepends=True)
+        for i, line in enumerate(lines):
+            if line.startswith(pointer_line):
+                lines.insert(i, new_line + "\n")
                 break
-            index += 1
+        return "".join(lines)
 
-        f.seek(0)
-        f.truncate()
+    return mutate(filename, transform)
 
-        for line in a:
-            f.write(line + "\n")
 
+def append(filename: str | Path, data: str) -> bool:
+    """Append text to the specified file.
 
-def apply_patch(filename: str | Path) -> None:
-    """Apply .patch file.
+    Unlike the other modifications, appending is not idempotent,
+    so the file is expected to be reset before it.
 
-    :param str/Path filename: Name of the .patch file.
-    :return: None
+    :param str/Path filename: Name of the file.
+    :param str data: Text to append.
+    :return: Flag indicating that the file was changed.
+    :rtype: bool
     """
-    log.warning(f"Applying patch: {filename}")
-
-    ccmd.launch(f"patch -p1 -s --no-backup-if-mismatch -i {filename}")
-    os.remove(filename)
+    return mutate(filename, lambda text: text + data)
@@ -0,0 +1,314 @@
+import os
+import json
+import time
+import fcntl
+import hashlib
+import logging
+import threading
+import requests
+from typing import Any, Callable, Iterator
+from contextlib import contextmanager
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+
+from zkb.configs import DirectoryConfig as dcfg
+
+
+log = logging.getLogger("ZeroKernelLogger")
+
+_lock = threading.Lock()
+_session: requests.Session | None = None
+_slots: dict[str, threading.BoundedSemaphore] = {}
+# API tokens, mapped to the time their rate limit resets
+_tokens: dict[str, float] = {}
+
+
+def session() -> requests.Session:
+    """Get the HTTP session shared by all network operations of the process.
+
+    Connections are pooled and kept alive, so that repeated requests
+    to the same host do not pay for new TCP and TLS handshakes.
+
+    :return: Shared HTTP session.
+    :rtype: requests.Session
+    """
+    global _session
+
+    with _lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+
+        return _session
+
+
+@contextmanager
+def host_slot(url: str) -> Iterator[None]:
+    """Limit the number of concurrent transfers from a single host.
+
+    :param str url: URL of the transfer.
+    :return: None
+    """
+    host = urlparse(url).netloc
+    limit = max(1, int(os.getenv("ZKB_HOST_JOBS", "4")))
+
+    with _lock:
+        slot = _slots.setdefault(host, threading.BoundedSemaphore(limit))
+
+    with slot:
+        yield
+
+
+def _tokens_pool() -> dict[str, float]:
+    """Get the pool of GitHub API tokens, read from environment once.
+
+    :return: Tokens mapped to the time their rate limit resets.
+    :rtype: dict[str, float]
+    """
+    with _lock:
+        if not _tokens:
+            values = os.getenv("GITHUB_TOKENS", "").split(",") + [os.getenv("GITHUB_TOKEN", "")]
+            _tokens.update({t.strip(): 0.0 for t in values if t.strip()})
+
+        return _tokens
+
+
+def _pick_token() -> tuple[str | None, float]:
+    """Pick a GitHub API token which is not rate limited.
+
+    :return: Token (None for anonymous access) and the earliest time any token becomes available.
+    :rtype: tuple[str | None, float]
+    """
+    pool = _tokens_pool()
+
+    with _lock:
+        now = time.time()
+        for token, reset in pool.items():
+            if reset <= now:
+                return token, now
+
+        return (None, min(pool.values())) if pool else (None, now)
+
+
+def _rate_limited(r: requests.Response) -> bool:
+    """Check whether the response was rejected because of exceeded rate limit.
+
+    :param requests.Response r: API response.
+    :return: Flag indicating exceeded rate limit.
+    :rtype: bool
+    """
+    return r.status_code in (403, 429) and (
+        r.headers.get("X-RateLimit-Remaining") == "0" or "Retry-After" in r.headers or "rate limit" in r.text
+    )
+
+
+def _reset_time(r: requests.Response) -> float:
+    """Determine when a rate limited request can be retried.
+
+    :param requests.Response r: Rate limited API response.
+    :return: Time at which the rate limit resets.
+    :rtype: float
+    """
+    if "Retry-After" in r.headers:
+        return time.time() + float(r.headers["Retry-After"])
+    if "X-RateLimit-Reset" in r.headers:
+        return float(r.headers["X-RateLimit-Reset"])
+
+    return time.time() + 60
+
+
+def _api_request(
+        url: str,
+        headers: dict[str, str],
+        max_wait: float,
+        payload: dict | None = None
+    ) -> requests.Response | None:
+    """Send a GitHub API request, spreading requests over the token pool and waiting out rate limits.
+
+    :param str url: API endpoint.
+    :param dict[str,str] headers: Request headers.
+    :param float max_wait: Maximum time (in seconds) to wait for a rate limit reset.
+    :param dict|None=None payload: JSON payload, which turns the request into POST.
+    :return: API response, unless the rate limit does not reset in time.
+    :rtype: requests.Response | None
+    """
+    while True:
+        token, available = _pick_token()
+
+        # every token of the pool is rate limited
+        if available > time.time():
+            wait = available - time.time()
+            if wait > max_wait:
+                return None
+            log.warning(f"GitHub API tokens are rate limited, waiting {wait:.0f}s..")
+            time.sleep(wait)
+            continue
+
+        auth = {"Authorization": f"Bearer {token}"} if token else {}
+        if payload is None:
+            r = session().get(url, headers={**headers, **auth}, timeout=60)
+        else:
+            r = session().post(url, headers={**headers, **auth}, json=payload, timeout=60)
+
+        if not _rate_limited(r):
+            return r
+
+        reset = _reset_time(r)
+
+        if token:
+            log.warning("GitHub API rate limit exceeded for a token, switching to the next one..")
+            with _lock:
+                _tokens[token] = reset
+            continue
+
+        wait = max(reset - time.time(), 0)
+        if wait > max_wait:
+            return None
+        log.warning(f"GitHub API rate limit exceeded, waiting {wait:.0f}s..")
+        time.sleep(wait)
+
+
+@contextmanager
+def _api_cache(key: str) -> Iterator[dict]:
+    """Open an entry of the persistent API response cache, under an exclusive lock.
+
+    Changes made to the entry are saved on exit.
+
+    :param str key: Request identifier (URL or query).
+    :return: Cached entry, empty if there is none.
+    :rtype: Iterator[dict]
+    """
+    os.makedirs(dcfg.cache / "api", exist_ok=True)
+    path = dcfg.cache / "api" / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.json"
+
+    # the same request can be made by concurrent jobs, lock it per entry
+    with open(path.with_suffix(".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+
+        entry: dict = {}
+        if path.is_file():
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        initial = dict(entry)
+
+        yield entry
+
+        if entry and entry != initial:
+            tmp = path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp, path)
+
+
+def _revalidated(
+        url: str,
+        ttl: int | None,
+        request: Callable[[dict[str, str]], requests.Response | None]
+    ) -> Any:
+    """Get JSON data through the persistent response cache, revalidating stale responses via ETag.
+
+    :param str url: Endpoint.
+    :param int|None ttl: Time (in seconds) for which a cached response is considered fresh.
+    :param Callable request: Function sending the request with given headers, None means a rate limited request.
+    :return: Decoded JSON response.
+    :rtype: Any
+    """
+    ttl = int(os.getenv("ZKB_API_TTL", "600")) if ttl is None else ttl
+
+    with _api_cache(url) as cached:
+        if cached and time.time() - cached["time"] < ttl:
+            return cached["data"]
+
+        headers = {"Accept": "application/json"}
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+
+        r = request(headers)
+
+        # rate limit did not reset in time, so stale data is better than none
+        if r is None:
+            if cached:
+                log.warning(f"API is rate limited, using stale response for {url}")
+                return cached["data"]
+            return {"message": "API rate limit exceeded"}
+
+        # errors are not cached, so that they can be retried later on
+        if not r.ok and r.status_code != 304:
+            try:
+                return r.json()
+            except ValueError:
+                return {"message": f"HTTP status code: {r.status_code}"}
+
+        if r.status_code != 304:
+            cached.update({"etag": r.headers.get("ETag", ""), "data": r.json()})
+        cached["time"] = time.time()
+
+        return cached["data"]
+
+
+def api_get(url: str, ttl: int | None = None) -> Any:
+    """Get JSON data from GitHub API, with a persistent response cache.
+
+    Fresh responses (within TTL) are served from disk, stale ones are revalidated
+    via ETag, so that unchanged data does not count against the rate limit.
+
+    :param str url: API endpoint.
+    :param int|None=None ttl: Time (in seconds) for which a cached response is considered fresh.
+    :return: Decoded JSON response.
+    :rtype: Any
+    """
+    max_wait = float(os.getenv("ZKB_API_MAX_WAIT", "300"))
+
+    return _revalidated(
+        url,
+        ttl,
+        lambda headers: _api_request(url, {**headers, "Accept": "application/vnd.github+json"}, max_wait)
+    )
+
+
+def get_json(url: str, ttl: int | None = None) -> Any:
+    """Get JSON data from a (non-GitHub) API, with a persistent response cache.
+
+    :param str url: API endpoint.
+    :param int|None=None ttl: Time (in seconds) for which a cached response is considered fresh.
+    :return: Decoded JSON response.
+    :rtype: Any
+    """
+    return _revalidated(url, ttl, lambda headers: session().get(url, headers=headers, timeout=60))
+
+
+def api_query(query: str, ttl: int | None = None) -> Any:
+    """Run a GitHub GraphQL API query, with a persistent response cache.
+
+    GraphQL API is available only to authenticated requests,
+    so nothing is requested if there are no tokens.
+
+    :param str query: GraphQL query.
+    :param int|None=None ttl: Time (in seconds) for which a cached response is considered fresh.
+    :return: Data of the query response, with failed fields set to null.
+    :rtype: Any
+    """
+    if not _tokens_pool():
+        return None
+
+    ttl = int(os.getenv("ZKB_API_TTL", "600")) if ttl is None else ttl
+    max_wait = float(os.getenv("ZKB_API_MAX_WAIT", "300"))
+
+    with _api_cache(query) as cached:
+        if cached and time.time() - cached["time"] < ttl:
+            return cached["data"]
+
+        r = _api_request("https://api.github.com/graphql", {}, max_wait, {"query": query})
+
+        if r is None or not r.ok or not r.json().get("data"):
+            return cached.get("data")
+
+        # fields that failed (e.g., a renamed repository) are null, the rest of the data is used as is
+        if r.json().get("errors"):
+            return r.json()["data"]
+
+        cached.update({"time": time.time(), "data": r.json()["data"]})
+
+        return cached["data"]
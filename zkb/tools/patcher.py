@@ -0,0 +1,370 @@
+import os
+import re
+import sys
+import json
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Optional
+
+from zkb.tools import cleaning as cm, fileoperations as fo
+from zkb.configs import DirectoryConfig as dcfg
+
+
+log = logging.getLogger("ZeroKernelLogger")
+
+_HUNK_HEADER = re.compile(rb"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+# same as in GNU patch: up to 2 lines of context can be ignored on each side of a hunk
+_MAX_FUZZ = 2
+
+
+class Hunk:
+    """Single hunk of a unified diff."""
+
+    def __init__(self, start: int) -> None:
+        self.start = start
+        self.old: list[bytes] = []
+        self.new: list[bytes] = []
+        # number of leading and trailing context lines, the ones allowed to be fuzzed
+        self.lead = 0
+        self.trail = 0
+
+    def fuzzed(self, fuzz: int) -> tuple[list[bytes], list[bytes], int]:
+        """Drop context lines from both sides of the hunk.
+
+        :param int fuzz: Number of context lines to drop on each side.
+        :return: Old lines, new lines and the number of dropped leading lines.
+        :rtype: tuple[list[bytes], list[bytes], int]
+        """
+        head = min(fuzz, self.lead)
+        tail = min(fuzz, self.trail)
+
+        return self.old[head:len(self.old) - tail], self.new[head:len(self.new) - tail], head
+
+
+class FilePatch:
+    """Changes of a single file."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.hunks: list[Hunk] = []
+        self.created = False
+        self.deleted = False
+
+
+def _strip(name: bytes) -> Optional[str]:
+    """Strip a file name from the diff header as 'patch -p1' does.
+
+    :param bytes name: File name with an optional timestamp.
+    :return: Path relative to the tree, None for /dev/null.
+    :rtype: Optional[str]
+    """
+    name = name.split(b"\t")[0].strip()
+    if name == b"/dev/null":
+        return None
+
+    return name.decode("utf-8").split("/", 1)[1]
+
+
+def parse(patch: Path) -> list[FilePatch]:
+    """Parse a unified diff, with or without git extended headers.
+
+    :param Path patch: Path to the .patch file.
+    :return: File changes in the order of their appearance.
+    :rtype: list[FilePatch]
+    """
+    with open(patch, "rb") as f:
+        lines = f.read().splitlines(keepends=True)
+
+    files: list[FilePatch] = []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+
+        if line.startswith(b"--- ") and i + 1 < len(lines) and lines[i + 1].startswith(b"+++ "):
+            old = _strip(line[4:])
+            new = _strip(lines[i + 1][4:])
+            fp = FilePatch(new or old) # type: ignore
+            fp.created = old is None
+            fp.deleted = new is None
+            files.append(fp)
+            i += 2
+            continue
+
+        m = _HUNK_HEADER.match(line)
+        if m and files:
+            old_len = int(m.group(2) or 1)
+            new_len = int(m.group(4) or 1)
+            # lines are inserted after the given one if nothing is removed
+            hunk = Hunk(int(m.group(1)) if old_len == 0 else int(m.group(1)) - 1)
+            context = True
+            i += 1
+
+            while (old_len or new_len) and i < len(lines):
+                body = lines[i]
+                tag, text = body[:1], body[1:]
+                # some editors strip the trailing space of empty context lines
+                if body in (b"\n", b"\r\n"):
+                    tag, text = b" ", body
+
+                if tag == b" ":
+                    hunk.old.append(text)
+                    hunk.new.append(text)
+                    old_len -= 1
+                    new_len -= 1
+                    if context:
+                        hunk.lead += 1
+                    hunk.trail += 1
+                elif tag == b"-":
+                    hunk.old.append(text)
+                    old_len -= 1
+                    context = False
+                    hunk.trail = 0
+                elif tag == b"+":
+                    hunk.new.append(text)
+                    new_len -= 1
+                    context = False
+                    hunk.trail = 0
+                elif tag != b"\\":
+                    break
+                i += 1
+
+                # a marker of a missing newline refers to the line right above it
+                if i < len(lines) and lines[i].startswith(b"\\"):
+                    side = hunk.new if tag == b"+" else hunk.old
+                    side[-1] = side[-1].rstrip(b"\r\n")
+                    if tag == b" ":
+                        hunk.new[-1] = hunk.new[-1].rstrip(b"\r\n")
+                    i += 1
+
+            # a hunk without any changes can't be told applied from not applied
+            if hunk.lead == len(hunk.old) == len(hunk.new):
+                hunk.trail = 0
+            files[-1].hunks.append(hunk)
+            continue
+
+        i += 1
+
+    return files
+
+
+def _locate(lines: list[bytes], seq: list[bytes], hint: int) -> Optional[int]:
+    """Find the position of a sequence of lines closest to the expected one.
+
+    :param list[bytes] lines: Lines of the file.
+    :param list[bytes] seq: Sequence of lines to find.
+    :param int hint: Expected position of the sequence.
+    :return: Position of the sequence, if it is found.
+    :rtype: Optional[int]
+    """
+    last = len(lines) - len(seq)
+    if last < 0:
+        return None
+    if not seq:
+        return min(max(hint, 0), len(lines))
+
+    hint = min(max(hint, 0), last)
+    for delta in range(0, max(hint, last - hint) + 1):
+        for pos in (hint - delta, hint + delta) if delta else (hint,):
+            if 0 <= pos <= last and lines[pos] == seq[0] and lines[pos:pos + len(seq)] == seq:
+                return pos
+
+    return None
+
+
+def _apply_hunk(lines: list[bytes], hunk: Hunk, offset: int) -> tuple[str, int]:
+    """Apply a hunk to the lines of a file in place.
+
+    :param list[bytes] lines: Lines of the file.
+    :param Hunk hunk: Hunk to apply.
+    :param int offset: Shift of the file's lines caused by previous hunks.
+    :return: Hunk state ("applied", "reversed" or "failed") and the new offset.
+    :rtype: tuple[str, int]
+    """
+    for fuzz in range(0, _MAX_FUZZ + 1):
+        old, new, head = hunk.fuzzed(fuzz)
+        hint = hunk.start + offset + head
+
+        forward = _locate(lines, old, hint)
+        backward = _locate(lines, new, hint)
+
+        # the closest match wins, and the longer one of equally close matches
+        # (e.g., context of a pure addition is still there after it is applied)
+        if forward is not None and backward is not None:
+            if (abs(forward - hint), -len(old)) > (abs(backward - hint), -len(new)):
+                forward = None
+
+        if forward is not None:
+            lines[forward:forward + len(old)] = new
+            return "applied", forward - hunk.start - head + len(new) - len(old)
+        if backward is not None:
+            return "reversed", backward - hunk.start - head + len(new) - len(old)
+
+    return "failed", offset
+
+
+def _digest(data: Optional[bytes]) -> Optional[str]:
+    return hashlib.sha256(data).hexdigest() if data is not None else None
+
+
+def _cache_dir(patches: list[Path], commit: str) -> Path:
+    """Determine the directory with cached results of applying a patch set at a commit.
+
+    :param list[Path] patches: Paths to the .patch files.
+    :param str commit: Commit of the source tree.
+    :return: Path to the cache directory.
+    :rtype: Path
+    """
+    key = hashlib.sha256(commit.encode("utf-8"))
+    for p in patches:
+        key.update(p.read_bytes())
+
+    return dcfg.cache / "patches" / key.hexdigest()
+
+
+def _from_cache(cdir: Path, root: Path) -> Optional[list[str]]:
+    """Apply a patch set from cached results.
+
+    :param Path cdir: Path to the cache directory.
+    :param Path root: Path to the source tree.
+    :return: Changed files, None if the tree does not match the cached state.
+    :rtype: Optional[list[str]]
+    """
+    if not (cdir / "index.json").is_file():
+        return None
+
+    with open(cdir / "index.json", encoding="utf-8") as f:
+        index = json.load(f)
+
+    changed = []
+    for rel, state in index.items():
+        path = root / rel
+        current = _digest(path.read_bytes()) if path.is_file() else None
+        if current == state["after"]:
+            continue
+        if current != state["before"]:
+            return None
+        changed.append(rel)
+
+    for rel in changed:
+        after = index[rel]["after"]
+        fo.write_if_changed(root / rel, (cdir / after).read_bytes() if after else None)
+
+    return changed
+
+
+def _to_cache(cdir: Path, results: dict[str, tuple[Optional[bytes], Optional[bytes]]]) -> None:
+    """Cache the results of applying a patch set.
+
+    The entry is built in a unique temporary directory and published with a rename,
+    so that concurrent jobs never see (or trust) a partially written entry.
+
+    :param Path cdir: Path to the cache directory.
+    :param dict[str,tuple[Optional[bytes],Optional[bytes]]] results: Contents of the files before and after patching.
+    :return: None
+    """
+    tmp = cdir.with_name(f".{cdir.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    os.makedirs(tmp)
+
+    index = {}
+    for rel, (before, after) in results.items():
+        index[rel] = {"before": _digest(before), "after": _digest(after)}
+        if after is not None:
+            (tmp / index[rel]["after"]).write_bytes(after) # type: ignore
+    (tmp / "index.json").write_text(json.dumps(index, indent=4), encoding="utf-8")
+
+    try:
+        os.rename(tmp, cdir)
+    except OSError:
+        # the same entry has been published by another job meanwhile
+        cm.remove(tmp)
+
+
+def apply(patches: list[Path], root: Path, commit: Optional[str] = None) -> list[str]:
+    """Apply .patch files to a source tree in one pass over the touched files.
+
+    Hunks that are already applied are detected and skipped, so applying
+    the same patches twice is a no-op. Hunks are searched for around their
+    expected position, with up to 2 lines of fuzz in context, like 'patch -p1' does.
+    If the source commit is given, the patched files are cached for it, so the same
+    patch set is not applied hunk by hunk at the same commit again.
+
+    :param list[Path] patches: Paths to the .patch files, in order of application.
+    :param Path root: Path to the source tree.
+    :param Optional[str]=None commit: Commit of the source tree.
+    :return: Paths (relative to the source tree) of the changed files.
+    :rtype: list[str]
+    """
+    cdir = _cache_dir(patches, commit) if commit else None
+    if cdir:
+        changed = _from_cache(cdir, root)
+        if changed is not None:
+            log.info(f"Patch set applies cleanly at {commit[:12]}, using cached results") # type: ignore
+            return changed
+
+    # all changes are grouped by file, so that every file is read and written once
+    per_file: dict[str, list[tuple[Path, FilePatch]]] = {}
+    for p in patches:
+        for fp in parse(p):
+            per_file.setdefault(fp.path, []).append((p, fp))
+
+    results: dict[str, tuple[Optional[bytes], Optional[bytes]]] = {}
+    failed = []
+    states: dict[Path, set[str]] = {p: set() for p in patches}
+
+    for rel, changes in per_file.items():
+        path = root / rel
+        before = path.read_bytes() if path.is_file() else None
+        lines = before.splitlines(keepends=True) if before is not None else []
+        exists = before is not None
+
+        for patch, fp in changes:
+            if fp.created and not exists:
+                lines, exists = [], True
+            elif fp.created:
+                if b"".join(lines) == b"".join(b"".join(h.new) for h in fp.hunks):
+                    states[patch].add("reversed")
+                else:
+                    failed.append(f"{patch.name}: {rel} already exists")
+                continue
+            elif fp.deleted and not exists:
+                states[patch].add("reversed")
+                continue
+            elif not exists:
+                failed.append(f"{patch.name}: {rel} does not exist")
+                continue
+
+            offset = 0
+            for n, hunk in enumerate(fp.hunks, 1):
+                state, offset = _apply_hunk(lines, hunk, offset)
+                states[patch].add(state)
+                if state == "failed":
+                    failed.append(f"{patch.name}: hunk #{n} of {rel} at line {hunk.start + 1}")
+
+            if fp.deleted and not b"".join(lines):
+                exists = False
+
+        results[rel] = (before, b"".join(lines) if exists else None)
+
+    if failed:
+        log.error("Could not apply patches:\n      " + "\n      ".join(failed))
+        sys.exit(1)
+
+    for patch, s in states.items():
+        if s == {"reversed"}:
+            log.warning(f"Patch is already applied: {patch.name}")
+        elif "reversed" in s:
+            log.warning(f"Patch is partially applied, applying the rest of it: {patch.name}")
+        else:
+            log.warning(f"Applying patch: {patch.name}")
+
+    changed = [rel for rel, (before, after) in results.items() if before != after]
+    for rel in changed:
+        fo.write_if_changed(root / rel, results[rel][1])
+
+    # results are cached only for a pristine tree, so that the cache can be used for the same tree only
+    if cdir and not any("reversed" in s for s in states.values()):
+        _to_cache(cdir, results)
+
+    return changed
@@ -0,0 +1,190 @@
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Optional, Iterator, Iterable
+from concurrent.futures import ProcessPoolExecutor
+
+from zkb.tools import fileoperations as fo
+from zkb.configs import DirectoryConfig as dcfg
+
+
+log = logging.getLogger("ZeroKernelLogger")
+
+# function definitions and declarations without parameters, starting a line:
+# a return type (possibly with qualifiers and pointers), a name and empty parentheses
+_EMPTY_PARAMS = re.compile(
+    rb"^(?!(?:return|else|do|goto|case|sizeof)\b)(?:[A-Za-z_]\w*[ \t\*]+)+([A-Za-z_]\w*)\(\)[ \t]*(\{|;|$)",
+    re.MULTILINE
+)
+# paths that are not built for an arm64 kernel
+_SKIPPED = ("out", "Documentation", "tools", "scripts", "samples", "usr")
+_SUFFIXES = (".c", ".h")
+
+
+def _files(root: Path) -> Iterator[str]:
+    """List C sources of the tree that are built for arm64.
+
+    :param Path root: Path to the kernel sources.
+    :return: Paths relative to the kernel sources.
+    :rtype: Iterator[str]
+    """
+    for dirpath, dirnames, filenames in os.walk(root):
+        rel = os.path.relpath(dirpath, root)
+
+        if rel == ".":
+            dirnames[:] = [d for d in dirnames if d not in _SKIPPED and not d.startswith(".")]
+        elif rel == "arch":
+            dirnames[:] = [d for d in dirnames if d == "arm64"]
+
+        for fn in filenames:
+            if fn.endswith(_SUFFIXES):
+                yield os.path.normpath(os.path.join(rel, fn))
+
+
+def _scan_file(path: str) -> list[tuple[int, str, bool]]:
+    """Find lines with empty-parameter function definitions and declarations in a file.
+
+    :param str path: Path to the file.
+    :return: Numbers of the lines (0-based), function names and flags indicating definitions.
+    :rtype: list[tuple[int, str, bool]]
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return []
+
+    # the cheap check rules out most of the files
+    if b"()" not in data:
+        return []
+
+    found = []
+    for m in _EMPTY_PARAMS.finditer(data):
+        # a definition with the opening brace on the next line
+        if not m.group(2) and not data[m.end():].lstrip().startswith(b"{"):
+            continue
+        found.append((data.count(b"\n", 0, m.start()), m.group(1).decode("utf-8"), m.group(2) != b";"))
+
+    return found
+
+
+def _select(found: dict[str, list]) -> dict[str, list[int]]:
+    """Select the lines to fix.
+
+    An old-style declaration can be used for a function with parameters,
+    so declarations are fixed only for functions defined without parameters.
+
+    :param dict[str,list] found: Paths mapped to the lines found by the scan.
+    :return: Paths mapped to the numbers of lines to fix.
+    :rtype: dict[str, list[int]]
+    """
+    defined = {name for lines in found.values() for _, name, definition in lines if definition}
+    selected = {f: [n for n, name, definition in lines if definition or name in defined] for f, lines in found.items()}
+
+    return {f: lines for f, lines in selected.items() if lines}
+
+
+def _cache_file(root: Path, commit: str) -> Path:
+    """Determine the path to cached scan results of a tree at a commit.
+
+    Layout of "arch" and the sparse checkout patterns are a part of the key, because
+    a sparse checkout of the same commit contains only a subset of the files.
+    Files created by the build at the top of the tree (out, localversion) do not matter.
+
+    :param Path root: Path to the kernel sources.
+    :param str commit: Commit of the kernel sources.
+    :return: Path to the cache file.
+    :rtype: Path
+    """
+    key = hashlib.sha256(commit.encode("utf-8"))
+    key.update(_EMPTY_PARAMS.pattern)
+    if (root / "arch").is_dir():
+        key.update("\n".join(sorted(os.listdir(root / "arch"))).encode("utf-8"))
+    if (root / ".git" / "info" / "sparse-checkout").is_file():
+        key.update((root / ".git" / "info" / "sparse-checkout").read_bytes())
+
+    return dcfg.cache / "prototypes" / f"{key.hexdigest()}.json"
+
+
+def scan(root: Path, commit: Optional[str] = None, modified: Iterable[str] = ()) -> dict[str, list[int]]:
+    """Scan kernel sources for function definitions and declarations without a prototype, e.g. "void foo()".
+
+    Clang 15+ rejects them with -Wstrict-prototypes, which is turned into an error by
+    some of the drivers. Files are scanned in parallel processes. If the source commit
+    is given, results are cached for it: then only the files modified since the commit
+    are scanned again.
+
+    :param Path root: Path to the kernel sources.
+    :param Optional[str]=None commit: Commit of the kernel sources.
+    :param Iterable[str]=() modified: Paths (relative to the kernel sources) of files modified since the commit.
+    :return: Paths (relative to the kernel sources) mapped to the numbers of lines to fix.
+    :rtype: dict[str, list[int]]
+    """
+    modified = set(modified)
+    cache = _cache_file(root, commit) if commit else None
+
+    if cache and cache.is_file():
+        with open(cache, encoding="utf-8") as f:
+            cached = json.load(f)
+
+        rescan = modified | set(cached["rescan"])
+        found = {f: lines for f, lines in cached["found"].items() if f not in rescan}
+        for f in sorted(rescan):
+            lines = _scan_file(str(root / f)) if f.endswith(_SUFFIXES) else []
+            if lines:
+                found[f] = lines
+
+        return _select(found)
+
+    files = list(_files(root))
+    with ProcessPoolExecutor() as pool:
+        results = pool.map(_scan_file, (str(root / f) for f in files), chunksize=256)
+        found = {f: lines for f, lines in zip(files, results) if lines}
+
+    # results for modified files are not the ones of the commit, they are never reused
+    if cache:
+        os.makedirs(cache.parent, exist_ok=True)
+        # concurrent jobs at the same commit write the same entry, each through its own file
+        tmp = cache.with_name(f"{cache.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {"found": {f: lines for f, lines in found.items() if f not in modified}, "rescan": sorted(modified)},
+                f,
+                indent=4
+            )
+        os.replace(tmp, cache)
+
+    return _select(found)
+
+
+def fix(root: Path, found: dict[str, list[int]]) -> list[str]:
+    """Turn empty parameter lists into "(void)" in the given lines.
+
+    Files without any changes (e.g., already fixed) are not rewritten.
+
+    :param Path root: Path to the kernel sources.
+    :param dict[str,list[int]] found: Paths (relative to the kernel sources) mapped to the numbers of lines to fix.
+    :return: Paths of the changed files.
+    :rtype: list[str]
+    """
+    changed = []
+
+    for rel, numbers in found.items():
+        path = root / rel
+        with open(path, "rb") as f:
+            lines = f.read().splitlines(keepends=True)
+
+        for n in numbers:
+            if n < len(lines):
+                m = _EMPTY_PARAMS.match(lines[n])
+                if m:
+                    lines[n] = lines[n][:m.end(1)] + b"(void)" + lines[n][m.end(1) + 2:]
+
+        if fo.write_if_changed(path, b"".join(lines)):
+            changed.append(rel)
+
+    return changed
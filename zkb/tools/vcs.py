@@ -0,0 +1,285 @@
+import os
+import re
+import json
+import time
+import fcntl
+import logging
+import zipfile
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import Optional, Iterator
+from urllib.parse import urljoin
+
+from zkb.tools import commands as ccmd
+from zkb.configs import DirectoryConfig as dcfg
+
+
+log = logging.getLogger("ZeroKernelLogger")
+
+
+def probe(cmd: str) -> bool:
+    """Launch a git command that is allowed to fail, without any output.
+
+    :param str cmd: Command to launch.
+    :return: Flag indicating that the command succeeded.
+    :rtype: bool
+    """
+    return subprocess.run(cmd, shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).returncode == 0
+
+
+def resolve_commit(url: str, commit: str) -> Optional[str]:
+    """Resolve a (possibly abbreviated) commit into a full SHA.
+
+    Abbreviated commits can only be resolved remotely if they are
+    pointed at by one of the remote's refs (branch or tag tips).
+
+    :param str url: URL to the repository.
+    :param str commit: Full or abbreviated commit SHA.
+    :return: Full commit SHA if it can be resolved.
+    :rtype: Optional[str]
+    """
+    if re.fullmatch(r"[0-9a-f]{40}", commit.lower()):
+        return commit.lower()
+
+    refs = str(ccmd.launch(f"git ls-remote {url}", get_output=True))
+    shas = {line.split()[0] for line in refs.splitlines() if line.split()[0].startswith(commit.lower())}
+
+    return shas.pop() if len(shas) == 1 else None
+
+
+def sparse(path: Path, exclude: list[str]) -> None:
+    """Configure a sparse checkout that leaves out the excluded paths.
+
+    :param Path path: Path to the repository.
+    :param list[str] exclude: Paths (relative to repository root) to leave out of the checkout.
+    :return: None
+    """
+    patterns = " ".join(["'/*'", *(f"'!/{p.strip('/')}/'" for p in exclude)])
+
+    log.warning(f"Excluding {len(exclude)} paths from checkout of {path.name}..")
+    ccmd.launch(f"git -C {path} sparse-checkout set --no-cone {patterns}")
+
+
+def fetch_commit(url: str, branch: str, commit: str, path: Path, exclude: Optional[list[str]] = None) -> None:
+    """Fetch a pinned commit into a new repository, without cloning the full history.
+
+    The commit is fetched directly at depth 1 if it's full SHA is known and the server
+    allows to request it. Otherwise the branch is fetched with increasing depth until
+    it contains the commit.
+
+    :param str url: URL to the repository.
+    :param str branch: Branch that contains the commit.
+    :param str commit: Full or abbreviated commit SHA.
+    :param Path path: Path to clone the repository into.
+    :param Optional[list[str]]=None exclude: Paths to leave out of a sparse, blobless checkout.
+    :return: None
+    """
+    log.warning(f"Fetching {url} at commit {commit}..")
+
+    ccmd.launch(f"git init -q {path}")
+    ccmd.launch(f"git -C {path} remote add origin {url}")
+
+    # with a sparse checkout, blobs are only fetched for the paths that are checked out
+    if exclude:
+        ccmd.launch(f"git -C {path} config remote.origin.promisor true")
+        ccmd.launch(f"git -C {path} config remote.origin.partialclonefilter blob:none")
+        sparse(path, exclude)
+
+    sha = resolve_commit(url, commit)
+    fetched = bool(sha) and probe(f"git -C {path} fetch -q --depth 1 origin {sha}")
+
+    if not fetched:
+        log.warning(f"Could not fetch {commit} directly, deepening {branch} until it is found..")
+
+        for depth in (10, 100, 1000):
+            ccmd.launch(f"git -C {path} fetch -q --depth {depth} origin {branch}")
+            if probe(f"git -C {path} cat-file -e {commit}^{{commit}}"):
+                break
+        else:
+            ccmd.launch(f"git -C {path} fetch -q --unshallow origin {branch}")
+
+    ccmd.launch(f"git -C {path} -c advice.detachedHead=false checkout -q {sha or commit}")
+
+    # submodules are taken at their recorded commits
+    if (path / ".gitmodules").is_file():
+        ccmd.launch(f"git -C {path} submodule update -q --init --recursive --depth 1")
+
+
+def commit_count(path: Path) -> int:
+    """Count commits in the history of repository's HEAD.
+
+    For a shallow repository the count is taken from a treeless (commits-only)
+    clone of it's remote, and cached persistently per remote and commit.
+
+    :param Path path: Path to the repository.
+    :return: Number of commits reachable from HEAD.
+    :rtype: int
+    """
+    if ccmd.launch(f"git -C {path} rev-parse --is-shallow-repository", get_output=True) == "false":
+        return int(str(ccmd.launch(f"git -C {path} rev-list --count HEAD", get_output=True)))
+
+    url = str(ccmd.launch(f"git -C {path} remote get-url origin", get_output=True))
+    sha = str(ccmd.launch(f"git -C {path} rev-parse HEAD", get_output=True))
+    key = f"{url}@{sha}"
+
+    cache = dcfg.cache / "commit_counts.json"
+    counts = {}
+    if cache.is_file():
+        with open(cache, encoding="utf-8") as f:
+            counts = json.load(f)
+
+    if key not in counts:
+        log.warning(f"Counting commits of {url} via a treeless clone..")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            ccmd.launch(f"git clone -q --bare --filter=tree:0 {url} {tmp}")
+            count = int(str(ccmd.launch(f"git -C {tmp} rev-list --count {sha}", get_output=True)))
+
+        # concurrent jobs share the cache, so entries added meanwhile are merged under a lock
+        os.makedirs(cache.parent, exist_ok=True)
+        with open(cache.with_suffix(".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+            counts = {}
+            if cache.is_file():
+                with open(cache, encoding="utf-8") as f:
+                    counts = json.load(f)
+            counts[key] = count
+
+            tmp = cache.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(counts, f, indent=4)
+            os.replace(tmp, cache)
+
+    return counts[key]
+
+
+def _tree(repo: Path, commit: str) -> Iterator[tuple[str, str, str]]:
+    """List all entries of commit's tree recursively.
+
+    :param Path repo: Path to the repository.
+    :param str commit: Commit to list the tree of.
+    :return: Iterator of (mode, object SHA, path) entries.
+    :rtype: Iterator[tuple[str, str, str]]
+    """
+    out = subprocess.run(
+        ["git", "-C", str(repo), "ls-tree", "-r", "-z", "--full-tree", commit],
+        capture_output=True,
+        check=True
+    ).stdout
+
+    for entry in filter(None, out.split(b"\0")):
+        meta, path = entry.split(b"\t", 1)
+        mode, _, sha = meta.decode().split()
+        yield mode, sha, path.decode("utf-8", "surrogateescape")
+
+
+def _submodules(repo: Path, commit: str, url: str) -> dict[str, str]:
+    """Read submodule URLs from commit's .gitmodules.
+
+    :param Path repo: Path to the repository.
+    :param str commit: Commit to read .gitmodules from.
+    :param str url: URL to the repository, relative submodule URLs are resolved against it.
+    :return: Submodule paths mapped to their URLs.
+    :rtype: dict[str, str]
+    """
+    if not probe(f"git -C {repo} cat-file -e {commit}:.gitmodules"):
+        return {}
+
+    out = str(ccmd.launch(
+        f"git -C {repo} config --blob {commit}:.gitmodules --get-regexp '^submodule\\..*\\.(path|url)$'",
+        get_output=True
+    ))
+
+    paths, urls = {}, {}
+    for line in out.splitlines():
+        key, value = line.split(" ", 1)
+        name, field = key.removeprefix("submodule.").rsplit(".", 1)
+        (paths if field == "path" else urls)[name] = value
+
+    return {
+        paths[name]: urljoin(url.rstrip("/") + "/", u) if u.startswith(("./", "../")) else u
+        for name, u in urls.items() if name in paths
+    }
+
+
+def _export_tree(zf: zipfile.ZipFile, repo: Path, url: str, commit: str, prefix: str = "") -> None:
+    """Write the tree of a commit into an open zip archive, recursing into submodules.
+
+    :param zipfile.ZipFile zf: Zip archive opened for writing.
+    :param Path repo: Path to the (bare) repository.
+    :param str url: URL to the repository.
+    :param str commit: Commit to export.
+    :param str="" prefix: Path prefix of the entries inside the archive.
+    :return: None
+    """
+    submodules = _submodules(repo, commit, url)
+    mtime = int(str(ccmd.launch(f"git -C {repo} log -1 --format=%ct {commit}", get_output=True)))
+    date_time = time.localtime(max(mtime, 315532800))[:6]
+
+    with subprocess.Popen(
+        ["git", "-C", str(repo), "cat-file", "--batch"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE
+    ) as cat:
+        for mode, sha, path in _tree(repo, commit):
+            # git metadata of the top-level repository is not a part of the snapshot
+            if not prefix and path.split("/")[0].startswith(".git"):
+                continue
+
+            if mode == "160000":
+                if path not in submodules:
+                    log.warning(f"Skipping submodule {prefix}{path}, it has no URL")
+                    continue
+
+                with tempfile.TemporaryDirectory() as subrepo:
+                    ccmd.launch(f"git init -q --bare {subrepo}")
+                    if not probe(f"git -C {subrepo} fetch -q --depth 1 {submodules[path]} {sha}"):
+                        ccmd.launch(f"git -C {subrepo} fetch -q {submodules[path]} '+refs/heads/*:refs/heads/*'")
+                    _export_tree(zf, Path(subrepo), submodules[path], sha, f"{prefix}{path}/")
+                continue
+
+            cat.stdin.write(f"{sha}\n".encode())   # type: ignore
+            cat.stdin.flush()                       # type: ignore
+            size = int(cat.stdout.readline().split()[2]) # type: ignore
+
+            info = zipfile.ZipInfo(f"{prefix}{path}", date_time=date_time)
+            info.external_attr = int(mode, 8) << 16
+            info.compress_type = zipfile.ZIP_DEFLATED
+
+            # blob is streamed into the archive, without being written to disk
+            with zf.open(info, "w", force_zip64=size > 2 ** 31) as f:
+                remaining = size
+                while remaining:
+                    chunk = cat.stdout.read(min(remaining, 1024 * 1024)) # type: ignore
+                    f.write(chunk)
+                    remaining -= len(chunk)
+
+            cat.stdout.read(1)                      # type: ignore
+
+        cat.stdin.close()                           # type: ignore
+
+
+def export_zip(url: str, dst: Path) -> None:
+    """Export a snapshot of repository's default branch into a zip archive, submodules included.
+
+    Files are streamed straight from git objects of a shallow bare clone, no working tree is created.
+
+    :param str url: URL to the repository.
+    :param Path dst: Path to the zip archive.
+    :return: None
+    """
+    log.warning(f"Exporting {url} into {dst.name}..")
+
+    tmp = dst.with_name(f"{dst.name}.partial")
+
+    try:
+        with tempfile.TemporaryDirectory() as repo, zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as zf:
+            ccmd.launch(f"git clone -q --bare --depth 1 {url} {repo}")
+            _export_tree(zf, Path(repo), url, "HEAD")
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+    os.replace(tmp, dst)
@@ -40,7 +40,8 @@ def parse_args() -> argparse.Namespace:
     )
     parser.add_argument(
         "--codename",
-        help="select device codename"
+        nargs="+",
+        help="select device codename(s)"
     )
     parser.add_argument(
         "--base",
@@ -89,6 +90,22 @@ def parse_args() -> argparse.Namespace:
         dest="defconfig",
         help="specify path to custom defconfig",
     )
+    parser.add_argument(
+        "--compiler-cache",
+        dest="compiler_cache",
+        help="select compiler cache",
+        choices={"ccache", "sccache"}
+    )
+    parser.add_argument(
+        "--incremental",
+        help="keep kernel build output between builds",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--variants",
+        help="build both KernelSU and non-KernelSU kernel variants",
+        action="store_true"
+    )
     parser.add_argument(
         "--shared",
         help="only setup the shared tools in the environment",
@@ -104,24 +121,27 @@ def main(args: argparse.Namespace) -> None:
 
         case "kernel":
             kernel_builder = KernelBuilder(
-                codename = args.codename,
+                codename = args.codename[0],
                 base = args.base,
                 lkv = args.lkv,
                 clean_kernel = args.clean_kernel,
                 ksu = args.ksu,
                 defconfig = args.defconfig,
+                compiler_cache = args.compiler_cache,
+                incremental = args.incremental,
+                variants = args.variants,
                 rmanager = ResourceManager(
-                    codename = args.codename,
+                    codename = args.codename[0],
                     lkv = args.lkv,
                     base = args.base
                 )
             )
-            kc = KernelCommand(kernel_builder=kernel_builder)
+            kc = KernelCommand(kernel_builder=kernel_builder, codenames=args.codename)
             kc.execute()
 
         case "assets":
             assets_collector = AssetsCollector(
-                codename = args.codename,
+                codename = args.codename[0],
                 base = args.base,
                 chroot = args.chroot,
                 clean_assets = args.clean_assets,
@@ -133,20 +153,22 @@ def main(args: argparse.Namespace) -> None:
 
         case "bundle":
             kernel_builder = KernelBuilder(
-                codename = args.codename,
+                codename = args.codename[0],
                 base = args.base,
                 lkv = args.lkv,
                 clean_kernel = args.clean_kernel,
                 ksu = args.ksu,
                 defconfig = args.defconfig,
+                compiler_cache = args.compiler_cache,
+                incremental = args.incremental,
                 rmanager = ResourceManager(
-                    codename = args.codename,
+                    codename = args.codename[0],
                     lkv = args.lkv,
                     base = args.base
                 )
             )
             assets_collector = AssetsCollector(
-                codename = args.codename,
+                codename = args.codename[0],
                 base = args.base,
                 chroot = args.chroot,
                 clean_assets = args.clean_assets,
@@ -157,7 +179,8 @@ def main(args: argparse.Namespace) -> None:
                 kernel_builder = kernel_builder,
                 assets_collector = assets_collector,
                 package_type = args.package_type,
-                base = args.base
+                base = args.base,
+                codenames = args.codename
             )
             bc.execute()
 